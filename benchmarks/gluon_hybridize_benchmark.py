@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Per call latency of a Gluon model zoo network run imperatively, hybridized, hybridized
+with static_alloc/static_shape, and imported from an exported hybrid graph, as done by
+GluonImperativeBaseService on worker start when hybridize is enabled.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import mxnet as mx
+
+
+def measure(net, data, number):
+    net(data).wait_to_read()
+    begin = time.time()
+    for _ in range(number):
+        net(data).wait_to_read()
+    return (time.time() - begin) / number * 1000
+
+
+def create(model):
+    net = mx.gluon.model_zoo.vision.get_model(model, pretrained=False)
+    net.initialize(mx.init.Xavier())
+    return net
+
+
+def run(model, batch_size, number):
+    data = mx.nd.random.uniform(shape=(batch_size, 3, 224, 224))
+    print("{} batch {}".format(model, batch_size))
+    print("{:<32}{:>16}{:>14}".format("mode", "first call(ms)", "mean(ms)"))
+
+    net = create(model)
+    start = time.time()
+    net(data).wait_to_read()
+    print("{:<32}{:>16.2f}{:>14.2f}".format("imperative", (time.time() - start) * 1000, measure(net, data, number)))
+
+    net = create(model)
+    net.hybridize()
+    start = time.time()
+    net(data).wait_to_read()
+    print("{:<32}{:>16.2f}{:>14.2f}".format("hybridize", (time.time() - start) * 1000, measure(net, data, number)))
+
+    net = create(model)
+    net.hybridize(static_alloc=True, static_shape=True)
+    start = time.time()
+    net(data).wait_to_read()
+    print("{:<32}{:>16.2f}{:>14.2f}".format("hybridize static", (time.time() - start) * 1000,
+                                            measure(net, data, number)))
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        prefix = os.path.join(tmp_dir, model)
+        net.export(prefix)
+        start = time.time()
+        imported = mx.gluon.SymbolBlock.imports(prefix + "-symbol.json", ["data"], prefix + "-0000.params")
+        imported.hybridize(static_alloc=True, static_shape=True)
+        imported(data).wait_to_read()
+        print("{:<32}{:>16.2f}{:>14.2f}".format("imported static", (time.time() - start) * 1000,
+                                                measure(imported, data, number)))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gluon hybridize latency benchmark")
+    parser.add_argument("--model", default="resnet18_v1", help="Gluon model zoo network")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--number", type=int, default=50, help="iterations per measurement")
+    args = parser.parse_args()
+    run(args.model, args.batch_size, args.number)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Decode and resize time of JPEG images to the input size of a vision model: full resolution
+mx.image.imdecode, as the vision services did, against the reduced resolution decode of every
+available backend of mms.utils.image_decode. The corpus is a set of JPEG files (--images) or
+synthetic photos at the resolutions of common cameras and phones.
+"""
+
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+import mxnet as mx
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from mms.utils import image_decode
+
+CORPUS_SIZES = [
+    ("VGA", 640, 480),
+    ("720p", 1280, 720),
+    ("1080p", 1920, 1080),
+    ("8MP phone", 3264, 2448),
+    ("12MP phone", 4032, 3024),
+    ("24MP camera", 6000, 4000),
+]
+
+
+def synthetic_jpeg(width, height, quality=90):
+    """
+    Smooth gradients with mild noise, compresses like a photo unlike uniform noise.
+    """
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, np.newaxis]
+    img_arr = np.stack([x + 0 * y, 0 * x + y, (x + y) / 2], axis=2)
+    img_arr += np.random.normal(0, 8, size=img_arr.shape).astype(np.float32)
+    output = BytesIO()
+    Image.fromarray(np.clip(img_arr, 0, 255).astype(np.uint8)).save(output, format="jpeg", quality=quality)
+    return output.getvalue()
+
+
+def load_corpus(args):
+    if args.images:
+        corpus = []
+        for name in sorted(os.listdir(args.images)):
+            with open(os.path.join(args.images, name), "rb") as f:
+                buf = f.read()
+            if image_decode.is_jpeg(buf):
+                width, height, _ = image_decode.jpeg_header(buf)
+                corpus.append(("{} {}x{}".format(name, width, height), buf))
+        return corpus
+    return [("{} {}x{}".format(name, width, height), synthetic_jpeg(width, height))
+            for name, width, height in CORPUS_SIZES]
+
+
+def measure(func, number):
+    func()
+    begin = time.time()
+    for _ in range(number):
+        func()
+    return (time.time() - begin) / number * 1000
+
+
+def run(args):
+    corpus = load_corpus(args)
+    backends = image_decode.available_backends()
+    width, height = args.size
+
+    def full(buf):
+        mx.image.imresize(mx.image.imdecode(buf), width, height).wait_to_read()
+
+    def reduced(buf, backend):
+        img_arr = mx.nd.array(image_decode.decode(buf, size=(width, height), backend=backend), dtype=np.uint8)
+        mx.image.imresize(img_arr, width, height).wait_to_read()
+
+    print("decode and resize to {}x{}, ms per image".format(width, height))
+    print("{:<28}{:>10}".format("image", "imdecode") + "".join("{:>12}".format(b) for b in backends))
+    totals = [0.0] * (len(backends) + 1)
+    for name, buf in corpus:
+        times = [measure(lambda: full(buf), args.number)]
+        times += [measure(lambda b=b: reduced(buf, b), args.number) for b in backends]
+        totals = [t + m for t, m in zip(totals, times)]
+        print("{:<28}{:>10.2f}".format(name, times[0]) + "".join("{:>12.2f}".format(t) for t in times[1:]))
+    print("{:<28}{:>10.2f}".format("total", totals[0]) + "".join("{:>12.2f}".format(t) for t in totals[1:]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Image decode benchmark")
+    parser.add_argument("--images", default=None, help="directory of JPEG files instead of the synthetic corpus")
+    parser.add_argument("--size", type=int, nargs=2, default=[224, 224], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--number", type=int, default=10, help="iterations per image")
+    run(parser.parse_args())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Latency, throughput and top-1 agreement of an INT8 quantized model against the FP32 model, as run by
+MXNetBaseService with quantize enabled. Calibration and evaluation inputs are random unless a
+model directory with a calibration file (calibration.nd or calibration.npy) is given, use
+--pretrained or --checkpoint for meaningful agreement numbers.
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import mxnet as mx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    from mms.model_service import quantization
+
+
+def load_fp32(args, shape):
+    if args.checkpoint:
+        return mx.model.load_checkpoint(args.checkpoint, args.epoch)
+
+    net = mx.gluon.model_zoo.vision.get_model(args.model, pretrained=args.pretrained)
+    if not args.pretrained:
+        net.initialize(mx.init.Xavier())
+    net.hybridize()
+    net(mx.nd.zeros((1,) + shape))
+    sym = net(mx.sym.var("data"))
+    aux_names = set(sym.list_auxiliary_states())
+    params = dict((name, param.data()) for name, param in net.collect_params().items())
+    return (sym, dict((k, v) for k, v in params.items() if k not in aux_names),
+            dict((k, v) for k, v in params.items() if k in aux_names))
+
+
+def bind(model, batch_size, shape):
+    sym, arg_params, aux_params = model
+    mod = mx.mod.Module(symbol=sym, data_names=["data"], label_names=None)
+    mod.bind(for_training=False, data_shapes=[("data", (batch_size,) + shape)])
+    mod.set_params(arg_params, aux_params, allow_missing=True, allow_extra=True)
+    return mod
+
+
+def measure(mod, data, number):
+    batch = mx.io.DataBatch([data])
+    mod.forward(batch)
+    mod.get_outputs()[0].wait_to_read()
+    begin = time.time()
+    for _ in range(number):
+        mod.forward(batch)
+        mod.get_outputs()[0].wait_to_read()
+    return (time.time() - begin) / number
+
+
+def predict(model, data, batch_size, shape):
+    mod = bind(model, batch_size, shape)
+    labels = []
+    for start in range(0, data.shape[0], batch_size):
+        mod.forward(mx.io.DataBatch([data[start:start + batch_size]]))
+        labels.append(mod.get_outputs()[0].argmax(axis=1))
+    return mx.nd.concat(*labels, dim=0).asnumpy()
+
+
+def run(args):
+    shape = tuple(int(dim) for dim in args.shape.split(","))
+    fp32 = load_fp32(args, shape)
+
+    samples = quantization.load_calibration(args.calibration_dir, ["data"]) if args.calibration_dir else None
+    if samples is not None:
+        samples = samples["data"]
+    else:
+        samples = mx.nd.random.uniform(shape=(args.calib_size + args.eval_size,) + shape)
+    calib, evaluation = samples[:args.calib_size], samples[args.calib_size:]
+
+    begin = time.time()
+    int8 = quantization.quantize(*fp32, calib_data={"data": calib}, calib_mode=args.calib_mode)
+    print("{} quantized in {:.1f} s ({} mode, {} calibration samples)".format(
+        args.checkpoint or args.model, time.time() - begin, args.calib_mode, calib.shape[0]))
+
+    print("{:<8}{:>20}{:>26}".format("model", "batch 1 latency(ms)",
+                                     "batch {} samples/s".format(args.batch_size)))
+    for name, model in (("FP32", fp32), ("INT8", int8)):
+        latency = measure(bind(model, 1, shape), evaluation[0:1], args.number)
+        duration = measure(bind(model, args.batch_size, shape), evaluation[0:args.batch_size], args.number)
+        print("{:<8}{:>20.2f}{:>26.1f}".format(name, latency * 1000, args.batch_size / duration))
+
+    size = evaluation.shape[0] - evaluation.shape[0] % args.batch_size
+    if size > 0:
+        evaluation = evaluation[:size]
+        agreement = (predict(fp32, evaluation, args.batch_size, shape) ==
+                     predict(int8, evaluation, args.batch_size, shape)).mean()
+        print("top-1 agreement on {} samples: {:.2%}".format(size, agreement))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="INT8 quantization benchmark")
+    parser.add_argument("--model", default="resnet18_v1", help="Gluon model zoo network")
+    parser.add_argument("--pretrained", action="store_true", help="download pretrained model zoo weights")
+    parser.add_argument("--checkpoint", default=None, help="prefix of a symbol/params checkpoint instead of --model")
+    parser.add_argument("--epoch", type=int, default=0)
+    parser.add_argument("--shape", default="3,224,224", help="input shape without batch dimension")
+    parser.add_argument("--calibration-dir", default=None, help="directory with calibration.nd or calibration.npy")
+    parser.add_argument("--calib-mode", default="naive", choices=["naive", "entropy"])
+    parser.add_argument("--calib-size", type=int, default=64, help="number of calibration samples")
+    parser.add_argument("--eval-size", type=int, default=128, help="number of samples for top-1 agreement")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--number", type=int, default=20, help="iterations per measurement")
+    run(parser.parse_args())
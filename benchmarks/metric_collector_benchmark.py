@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Cost of a system metrics sample: a new metric_collector.py process per sample, as the frontend
+used to start, against samples requested from a single long lived collector. Reports the wall
+time and the CPU time of the collector per sample, and the CPU share of one core the collector
+takes at the frontend metric interval.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+COLLECTOR = os.path.join(ROOT, "mms", "metrics", "metric_collector.py")
+ENV = dict(os.environ, PYTHONPATH=ROOT)
+
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+from mms.metrics.metric_collector import MIN_CPU_INTERVAL
+
+
+def start():
+    return subprocess.Popen([sys.executable, COLLECTOR], stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=ENV,
+                            universal_newlines=True)
+
+
+def read_sample(collector):
+    # System metrics and worker memory, each followed by an empty line
+    for _ in range(2):
+        while collector.stdout.readline().strip():
+            pass
+
+
+def cpu_time(process):
+    times = process.cpu_times()
+    return times.user + times.system
+
+
+def spawn(pids, number):
+    cpu = 0.0
+    begin = time.time()
+    for _ in range(number):
+        collector = start()
+        collector.stdin.write(pids + "\n")
+        collector.stdin.flush()
+        read_sample(collector)
+        # CPU time of the process is only complete once its interpreter shut down
+        before = os.times()
+        collector.stdin.close()
+        collector.wait()
+        after = os.times()
+        collector.stdout.close()
+        cpu += (after[2] + after[3]) - (before[2] + before[3])
+    return (time.time() - begin) / number, cpu / number
+
+
+def persistent(pids, number):
+    collector = start()
+    handle = psutil.Process(collector.pid)
+    collector.stdin.write(pids + "\n")
+    collector.stdin.flush()
+    read_sample(collector)
+    cpu = cpu_time(handle)
+    wall = 0.0
+    for _ in range(number):
+        # The collector measures CPU utilization over at least MIN_CPU_INTERVAL between samples
+        time.sleep(MIN_CPU_INTERVAL)
+        begin = time.time()
+        collector.stdin.write(pids + "\n")
+        collector.stdin.flush()
+        read_sample(collector)
+        wall += time.time() - begin
+    wall /= number
+    cpu = (cpu_time(handle) - cpu) / number
+    collector.stdin.close()
+    collector.wait()
+    collector.stdout.close()
+    return wall, cpu
+
+
+def run(args):
+    # Worker pid to model name, as written by the frontend
+    workers = dict((str(p.pid), "model") for p in list(psutil.process_iter())[-args.workers:])
+    pids = json.dumps(workers)
+    print("{} worker pids, {} samples".format(len(workers), args.number))
+    print("{:<24}{:>16}{:>16}{:>24}".format("collector", "wall ms/sample", "cpu ms/sample",
+                                           "cpu % at {}s interval".format(args.interval)))
+    for name, func in (("process per sample", spawn), ("long lived", persistent)):
+        wall, cpu = func(pids, args.number)
+        print("{:<24}{:>16.2f}{:>16.2f}{:>24.4f}".format(name, wall * 1000, cpu * 1000, cpu / args.interval * 100))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="System metrics collector benchmark")
+    parser.add_argument("--workers", type=int, default=4, help="number of pids to sample memory of")
+    parser.add_argument("--number", type=int, default=20, help="samples per collector")
+    parser.add_argument("--interval", type=float, default=60, help="frontend metric_time_interval in seconds")
+    run(parser.parse_args())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Worker side metrics overhead per batch: the legacy path, which formats every metric as a [METRICS]
+log line written to stdout, against metrics aggregated in the worker and sent in the metrics
+section of the response frame, with and without per request metrics and with metrics also sent to
+a StatsD agent.
+"""
+
+import argparse
+import logging
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from mms.metrics.metrics_aggregator import MetricsAggregator
+from mms.metrics.metrics_channel import metrics_channel
+from mms.metrics.metrics_store import MetricsStore
+from mms.metrics.statsd_emitter import StatsdEmitter
+from mms.protocol.otf_message_handler import create_metrics_section
+from mms.service import emit_metrics
+
+logger = logging.getLogger("metrics_benchmark")
+
+
+def record(metrics, batch_size):
+    """
+    Metrics of a batch as added by Service.predict and a handler with a few custom metrics.
+    """
+    for idx in range(batch_size):
+        metrics.add_time("PreprocessTime", 1.5 + idx * 0.1, idx)
+        metrics.add_counter("ImageCount", 1, idx)
+    metrics.add_time("InferenceTime", 12.5)
+    metrics.add_time("PredictionTime", 20.25)
+
+
+def legacy(args):
+    metrics = MetricsStore(args.request_ids, "model")
+    record(metrics, args.batch_size)
+    for metric in metrics.store:
+        logger.info("[METRICS]%s", str(metric))
+
+
+def structured(args, aggregator, sample, emitter=None):
+    metrics = MetricsStore(args.request_ids, "model", aggregator, sample, emitter)
+    record(metrics, args.batch_size)
+    emit_metrics(metrics.store)
+    return create_metrics_section(metrics_channel.drain())
+
+
+def measure(func, number):
+    func()
+    begin = time.time()
+    for _ in range(number):
+        func()
+    return (time.time() - begin) / number * 1e6
+
+
+def run(args):
+    # Worker logs go to stdout, which the frontend reads through a pipe
+    devnull = open(os.devnull, "w")
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(threadName)s %(name)s - %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    args.request_ids = dict((idx, "req-{}".format(idx)) for idx in range(args.batch_size))
+    aggregator = MetricsAggregator("model", interval=0, emit=emit_metrics)
+
+    print("batch size {}, microseconds per batch".format(args.batch_size))
+    print("{:<40}{:>12.1f}".format("[METRICS] log lines", measure(lambda: legacy(args), args.number)))
+    print("{:<40}{:>12.1f}".format("aggregated, response frame", measure(
+        lambda: structured(args, aggregator, False), args.number)))
+    print("{:<40}{:>12.1f}".format("aggregated + per request, response frame", measure(
+        lambda: structured(args, aggregator, True), args.number)))
+    # A UDP listener standing in for the local StatsD agent
+    agent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    agent.bind(("127.0.0.1", 0))
+    emitter = StatsdEmitter("model", *agent.getsockname())
+    print("{:<40}{:>12.1f}".format("aggregated + StatsD, response frame", measure(
+        lambda: structured(args, aggregator, False, emitter), args.number)))
+    agent.close()
+    start = time.time()
+    aggregator.flush()
+    print("{:<40}{:>12.1f}".format("interval flush of summaries", (time.time() - start) * 1e6))
+    devnull.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Metrics emission benchmark")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--number", type=int, default=2000, help="iterations per measurement")
+    run(parser.parse_args())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Load time, time to ready and per worker memory of MXNetBaseService workers loading parameters
+with mx.model.load_checkpoint against the memory mapped layout. A number of workers start together,
+each loads the model and runs one forward computation; unique (USS) and proportional (PSS) memory
+of every worker is sampled once all of them are ready.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import psutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def export(model, model_dir):
+    import mxnet as mx
+
+    net = mx.gluon.model_zoo.vision.get_model(model, pretrained=False)
+    net.initialize(mx.init.Xavier())
+    net.hybridize()
+    net(mx.nd.zeros((1, 3, 224, 224)))
+    net.export(os.path.join(model_dir, model))
+    with open(os.path.join(model_dir, "signature.json"), "w") as f:
+        json.dump({"input_type": "application/json", "output_type": "application/json",
+                   "inputs": [{"data_name": "data", "data_shape": [1, 3, 224, 224]}]}, f)
+
+
+def worker(model, model_dir):
+    """
+    Run in the child process: load the model as a worker does, report and wait to be sampled.
+    """
+    import mxnet as mx
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        from mms.model_service.mxnet_model_service import MXNetBaseService
+
+    start = time.time()
+    manifest = {"Model": {"Symbol": model + "-symbol.json", "Parameters": model + "-0000.params",
+                          "Signature": "signature.json", "Model-Name": model}}
+    service = MXNetBaseService(model, model_dir, manifest)
+    loaded = time.time() - start
+    service._inference([mx.nd.ones((1, 3, 224, 224))])[0].wait_to_read()  # pylint: disable=protected-access
+    print(json.dumps({"load": loaded, "ready": time.time() - start}))
+    sys.stdout.flush()
+    sys.stdin.readline()
+
+
+def measure(args, model_dir, name):
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", model_dir, "--model", args.model]
+    procs = [subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+             for _ in range(args.workers)]
+    results = [json.loads(proc.stdout.readline().decode("utf-8")) for proc in procs]
+    memory = [psutil.Process(proc.pid).memory_full_info() for proc in procs]
+    for proc in procs:
+        proc.communicate(b"\n")
+
+    print("{:<24}{:>12.3f}{:>12.3f}{:>12.1f}{:>12.1f}".format(
+        name, sum(r["load"] for r in results) / len(results), sum(r["ready"] for r in results) / len(results),
+        sum(m.uss for m in memory) / len(memory) / 1024 ** 2, sum(m.pss for m in memory) / len(memory) / 1024 ** 2))
+
+
+def run(args):
+    model_dir = tempfile.mkdtemp()
+    try:
+        export(args.model, model_dir)
+        params_file = os.path.join(model_dir, args.model + "-0000.params")
+        print("{}: {:.1f} MB parameters, {} workers".format(
+            args.model, os.path.getsize(params_file) / 1024.0 ** 2, args.workers))
+        print("{:<24}{:>12}{:>12}{:>12}{:>12}".format("loading", "load(s)", "ready(s)", "USS(MB)", "PSS(MB)"))
+        measure(args, model_dir, "load_checkpoint")
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            from mms.model_service.mmap_params import convert_params
+        convert_params(params_file)
+        measure(args, model_dir, "memory mapped")
+    finally:
+        shutil.rmtree(model_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameter loading benchmark")
+    parser.add_argument("--model", default="resnet50_v1", help="Gluon model zoo network")
+    parser.add_argument("--workers", type=int, default=4, help="number of workers started together")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+    if arguments.worker is not None:
+        worker(arguments.model, arguments.worker)
+    else:
+        run(arguments)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Forward latency and throughput of a model under MXNet runtime profiles, to choose the runtimeProfile
+of a model archive for the current host. Every profile runs in a new process, as the worker does,
+because MXNet reads the settings when the library is loaded.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from mms.utils.runtime_profile import apply_runtime_profile
+
+DEFAULT_PROFILES = [
+    {},
+    {"engineType": "NaiveEngine"},
+    {"engineType": "ThreadedEngine", "cpuWorkerThreads": 1},
+    {"engineType": "ThreadedEnginePerDevice", "cpuWorkerThreads": 2},
+    {"engineType": "ThreadedEnginePerDevice", "ompThreads": 4},
+    {"subgraphBackend": "MKLDNN"},
+    {"memoryPool": "Round"},
+]
+
+
+def measure(args, profile):
+    """
+    Run in the child process: apply the profile, then load MXNet and the model.
+    """
+    # Same defaults as the model server worker
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("MXNET_USE_OPERATOR_TUNING", "0")
+    apply_runtime_profile(profile)
+
+    import mxnet as mx
+
+    shape = (args.batch_size,) + tuple(int(dim) for dim in args.shape.split(","))
+    if args.checkpoint:
+        sym, arg_params, aux_params = mx.model.load_checkpoint(args.checkpoint, args.epoch)
+    else:
+        net = mx.gluon.model_zoo.vision.get_model(args.model, pretrained=False)
+        net.initialize(mx.init.Xavier())
+        net.hybridize()
+        net(mx.nd.zeros(shape))
+        sym = net(mx.sym.var("data"))
+        params = dict((name, param.data()) for name, param in net.collect_params().items())
+        aux_names = set(sym.list_auxiliary_states())
+        arg_params = dict((name, value) for name, value in params.items() if name not in aux_names)
+        aux_params = dict((name, value) for name, value in params.items() if name in aux_names)
+
+    data_name = [name for name in sym.list_inputs() if name not in arg_params and name not in aux_params][0]
+    mod = mx.mod.Module(symbol=sym, data_names=[data_name], label_names=None)
+    mod.bind(for_training=False, data_shapes=[(data_name, shape)])
+    mod.set_params(arg_params, aux_params, allow_missing=True, allow_extra=True)
+
+    batch = mx.io.DataBatch([mx.nd.random.uniform(shape=shape)])
+    for _ in range(args.warmup):
+        mod.forward(batch)
+        mod.get_outputs()[0].wait_to_read()
+
+    latencies = []
+    for _ in range(args.number):
+        start = time.time()
+        mod.forward(batch)
+        mod.get_outputs()[0].wait_to_read()
+        latencies.append(time.time() - start)
+
+    latencies.sort()
+    mean = sum(latencies) / len(latencies)
+    return {
+        "mean": mean * 1000,
+        "p90": latencies[int(len(latencies) * 0.9)] * 1000,
+        "throughput": args.batch_size / mean,
+    }
+
+
+def run(args):
+    if args.profiles:
+        with open(args.profiles) as f:
+            profiles = json.load(f)
+    else:
+        profiles = DEFAULT_PROFILES
+
+    print("{} batch {}, {} iterations".format(args.checkpoint or args.model, args.batch_size, args.number))
+    print("{:<72}{:>10}{:>10}{:>14}".format("profile", "mean(ms)", "p90(ms)", "samples/s"))
+    results = []
+    for profile in profiles:
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", json.dumps(profile)] + sys.argv[1:]
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = proc.communicate()
+        name = json.dumps(profile) if profile else "worker defaults"
+        if proc.returncode != 0:
+            print("{:<72}{:>10}".format(name, "failed"))
+            sys.stderr.write(err.decode("utf-8"))
+            continue
+        result = json.loads(out.decode("utf-8").strip().splitlines()[-1])
+        print("{:<72}{:>10.2f}{:>10.2f}{:>14.1f}".format(name, result["mean"], result["p90"], result["throughput"]))
+        results.append((result["mean"], profile))
+
+    if results:
+        best = min(results, key=lambda item: item[0])[1]
+        print("fastest profile: {}".format(json.dumps(best)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MXNet runtime profile benchmark")
+    parser.add_argument("--model", default="resnet18_v1", help="Gluon model zoo network")
+    parser.add_argument("--checkpoint", default=None, help="prefix of a symbol/params checkpoint instead of --model")
+    parser.add_argument("--epoch", type=int, default=0, help="epoch of the checkpoint")
+    parser.add_argument("--shape", default="3,224,224", help="input shape without batch dimension")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--number", type=int, default=50, help="iterations per profile")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--profiles", default=None, help="JSON file with a list of profiles to compare")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        print(json.dumps(measure(args, json.loads(args.child))))
+    else:
+        run(args)
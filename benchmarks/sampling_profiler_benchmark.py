@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Overhead of the profilers of the worker. Reports the cost of one sample of a 30 frames deep stack,
+and the CPU time of a CPU bound Python workload, standing in for the preprocessing of a handler,
+without the profiler, with the sampling profiler at several sampling intervals, with cProfile for
+comparison, and while the memory profiler traces allocations.
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from mms.utils.memory_profiler import MemoryProfiler, is_supported as memory_profiler_supported
+from mms.utils.sampling_profiler import SamplingProfiler, cpu_time
+
+
+def decode(payload):
+    return json.loads(payload)
+
+
+def normalize(values):
+    total = float(sum(values)) or 1.0
+    return [value / total for value in values]
+
+
+def preprocess(payload):
+    data = decode(payload)
+    return [normalize(row) for row in data["rows"]]
+
+
+def workload(number):
+    payload = json.dumps({"rows": [list(range(i, i + 64)) for i in range(64)]})
+    for _ in range(number):
+        preprocess(payload)
+
+
+def measure(number, repeat):
+    best = None
+    for _ in range(repeat):
+        begin = cpu_time()
+        workload(number)
+        duration = cpu_time() - begin
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+def sample_cost(number, depth=30):
+    """
+    Microseconds per sample, the signal handler called directly on a stack of depth frames.
+    """
+    if depth > 0:
+        return sample_cost(number, depth - 1)
+    profiler = SamplingProfiler()
+    frame = sys._getframe()  # pylint: disable=protected-access
+    begin = time.time()
+    for _ in range(number):
+        profiler._sample(None, frame)  # pylint: disable=protected-access
+    return (time.time() - begin) / number * 1e6
+
+
+def run(args):
+    cost = sample_cost(20000)
+    print("{:<32}{:>8.1f} us, {:.2f}% of a core at 100 samples/s".format("cost per sample", cost, cost * 100 / 1e4))
+    workload(args.number)
+    baseline = measure(args.number, args.repeat)
+    print("{:<32}{:>8.3f} s".format("no profiler", baseline))
+    for interval in (0.01, 0.005, 0.001):
+        profiler = SamplingProfiler(interval)
+        profiler.start()
+        duration = measure(args.number, args.repeat)
+        samples = profiler.samples
+        stacks = len(profiler.collapsed().splitlines())
+        print("{:<32}{:>8.3f} s {:>+7.1f}%  {} samples, {} stacks".format(
+            "sampling every {:g} ms".format(interval * 1000), duration, (duration / baseline - 1) * 100,
+            samples, stacks))
+    profile = cProfile.Profile()
+    profile.enable()
+    duration = measure(args.number, args.repeat)
+    profile.disable()
+    print("{:<32}{:>8.3f} s {:>+7.1f}%".format("cProfile", duration, (duration / baseline - 1) * 100))
+    if memory_profiler_supported():
+        profiler = MemoryProfiler()
+        profiler.start()
+        duration = measure(args.number, args.repeat)
+        profiler.collect()
+        print("{:<32}{:>8.3f} s {:>+7.1f}%".format("memory profiler", duration, (duration / baseline - 1) * 100))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker profilers overhead benchmark")
+    parser.add_argument("--number", type=int, default=2000, help="workload iterations per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="measurements, the fastest is reported")
+    run(parser.parse_args())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Compare payload size and encode/decode cost of the serializers registered in
+mms.protocol.serializers against the legacy json.dumps(indent=2) output, and the
+decode cost of binary tensor inputs.
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from mms.protocol import serializers
+
+
+def payloads(size):
+    rnd = random.Random(0)
+    return {
+        "classification": [{"probability": rnd.random(), "class": "n%08d label" % i} for i in range(5)],
+        "embedding": [rnd.random() for _ in range(size)],
+        "tabular": [{"f%d" % c: rnd.random() for c in range(16)} for _ in range(size // 16)],
+    }
+
+
+def legacy_encode(value):
+    return json.dumps(value, indent=2).encode("utf-8")
+
+
+def legacy_decode(buf):
+    return json.loads(buf.decode("utf-8"))
+
+
+def run(size, number):
+    content_types = [serializers.JSON_CONTENT_TYPE]
+    if serializers.has_encoder(serializers.MSGPACK_CONTENT_TYPE):
+        content_types.append(serializers.MSGPACK_CONTENT_TYPE)
+
+    print("json backend: {}".format("orjson" if serializers.orjson else
+                                    "ujson" if serializers.ujson else "json"))
+    print("{:<16}{:<24}{:>12}{:>14}{:>14}".format("payload", "serializer", "bytes", "encode(us)", "decode(us)"))
+    for name, value in sorted(payloads(size).items()):
+        buf = legacy_encode(value)
+        enc = timeit.timeit(lambda: legacy_encode(value), number=number) / number * 1e6
+        dec = timeit.timeit(lambda: legacy_decode(buf), number=number) / number * 1e6
+        print("{:<16}{:<24}{:>12}{:>14.1f}{:>14.1f}".format(name, "json indent=2", len(buf), enc, dec))
+
+        for content_type in content_types:
+            buf = serializers.encode(content_type, value)
+            enc = timeit.timeit(lambda ct=content_type: serializers.encode(ct, value), number=number)
+            dec = timeit.timeit(lambda ct=content_type, b=buf: serializers.decode(ct, b), number=number)
+            print("{:<16}{:<24}{:>12}{:>14.1f}{:>14.1f}".format(
+                name, content_type, len(buf), enc / number * 1e6, dec / number * 1e6))
+
+
+def run_tensor_decode(size, number):
+    """
+    Compare decoding a float32 vector sent as JSON list, npy file and raw bytes.
+    """
+    import numpy as np
+
+    array = np.random.rand(size).astype(np.float32)
+    fp = io.BytesIO()
+    np.save(fp, array)
+    inputs = [
+        ("application/json", bytearray(json.dumps(array.tolist()).encode("utf-8"))),
+        ("application/x-npy", bytearray(fp.getvalue())),
+        ("application/octet-stream;dtype=float32;shape={}".format(size), bytearray(array.tobytes())),
+    ]
+
+    print("\n{:<56}{:>12}{:>14}".format("tensor input ({} floats)".format(size), "bytes", "decode(us)"))
+    for content_type, buf in inputs:
+        count = 1 if content_type == "application/json" else number
+        dec = timeit.timeit(lambda ct=content_type, b=buf: serializers.decode(ct, b), number=count) / count * 1e6
+        print("{:<56}{:>12}{:>14.1f}".format(content_type, len(buf), dec))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serializer payload size benchmark")
+    parser.add_argument("--size", type=int, default=4096, help="number of floats in embedding/tabular payloads")
+    parser.add_argument("--number", type=int, default=200, help="iterations per measurement")
+    parser.add_argument("--tensor-size", type=int, default=1000000, help="number of floats in tensor input")
+    args = parser.parse_args()
+    run(args.size, args.number)
+    if serializers.np is not None:
+        run_tensor_decode(args.tensor_size, args.number)
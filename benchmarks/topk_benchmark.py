@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Compare top-k postprocessing of a classification batch output: the former per row
+argsort with a device sync per value against the vectorized mms.utils.mxnet.ndarray.top_k.
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import warnings
+
+import mxnet as mx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    from mms.utils.mxnet import ndarray
+
+
+def legacy_top_probability(data, labels, top=5):
+    sorted_prob = mx.nd.argsort(data[0], is_ascend=False)
+    top_prob = [int(x.asscalar()) for x in sorted_prob[0:top]]
+    return [{'probability': float(data[0, i].asscalar()), 'class': labels[i]} for i in top_prob]
+
+
+def legacy_batch(data, labels, top):
+    rows = mx.nd.split(data, axis=0, num_outputs=data.shape[0])
+    rows = [rows] if not isinstance(rows, list) else rows
+    return [legacy_top_probability(row, labels, top) for row in rows]
+
+
+def run(batch_size, num_classes, top, number):
+    labels = ["class %d" % i for i in range(num_classes)]
+    data = mx.nd.softmax(mx.nd.random.uniform(shape=(batch_size, num_classes)))
+    data.wait_to_read()
+
+    assert [[p['class'] for p in row] for row in legacy_batch(data, labels, top)] == \
+        [[p['class'] for p in row] for row in ndarray.top_k(data, labels, top)]
+
+    print("batch {} x {} classes, top {}".format(batch_size, num_classes, top))
+    for name, func in (("argsort + asscalar per row", legacy_batch), ("top_k", ndarray.top_k)):
+        duration = timeit.timeit(lambda f=func: f(data, labels, top), number=number) / number * 1000
+        print("{:<32}{:>10.3f} ms".format(name, duration))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Top-k postprocessing benchmark")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--classes", type=int, default=1000)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20, help="iterations per measurement")
+    args = parser.parse_args()
+    run(args.batch_size, args.classes, args.top, args.number)
@@ -10,6 +10,7 @@
 
 from mxnet.gluon import nn
 from mxnet.gluon.block import HybridBlock
+import ndarray
 from gluon_base_service import GluonBaseService
 
 """
@@ -66,12 +67,12 @@ class HybridAlexnetService(GluonBaseService):
         self.net = GluonHybridAlexNet()
         self.param_filename = "alexnet.params"
         super(HybridAlexnetService, self).initialize(params)
-        self.net.hybridize()
+        # Static allocation reuses the memory of the cached graph across requests
+        self.net.hybridize(static_alloc=True, static_shape=True)
 
     def postprocess(self, data):
-        idx = data.topk(k=5)[0]
-        return [[{'class': (self.labels[int(i.asscalar())]).split()[1], 'probability':
-                 float(data[0, int(i.asscalar())].asscalar())} for i in idx]]
+        top = ndarray.top_k(data, self.labels, top=5)[0]
+        return [[{'class': p['class'].split()[1], 'probability': p['probability']} for p in top]]
 
 
 svc = HybridAlexnetService()
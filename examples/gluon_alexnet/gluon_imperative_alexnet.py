@@ -10,6 +10,7 @@
 
 from mxnet import gluon
 from mxnet.gluon import nn
+import ndarray
 from gluon_base_service import GluonBaseService
 
 """
@@ -68,9 +69,8 @@ class ImperativeAlexnetService(GluonBaseService):
         super(ImperativeAlexnetService, self).initialize(params)
 
     def postprocess(self, data):
-        idx = data.topk(k=5)[0]
-        return [[{'class': (self.labels[int(i.asscalar())]).split()[1], 'probability':
-                 float(data[0, int(i.asscalar())].asscalar())} for i in idx]]
+        top = ndarray.top_k(data, self.labels, top=5)[0]
+        return [[{'class': p['class'].split()[1], 'probability': p['probability']} for p in top]]
 
 
 svc = ImperativeAlexnetService()
@@ -9,6 +9,7 @@
 # permissions and limitations under the License.
 
 import mxnet
+import ndarray
 from gluon_base_service import GluonBaseService
 
 """
@@ -35,9 +36,8 @@ class PretrainedAlexnetService(GluonBaseService):
         :param data:
         :return:
         """
-        idx = data.topk(k=5)[0]
-        return [[{'class': (self.labels[int(i.asscalar())]).split()[1], 'probability':
-                float(data[0, int(i.asscalar())].asscalar())} for i in idx]]
+        top = ndarray.top_k(data, self.labels, top=5)[0]
+        return [[{'class': p['class'].split()[1], 'probability': p['probability']} for p in top]]
 
 
 svc = PretrainedAlexnetService()
@@ -11,6 +11,9 @@ class MXNetLSTMService(ModelHandler):
     """
     MXNetLSTMService service class. This service consumes a sentence
     from length 0 to 60 and generates a sentence with the same size.
+
+    Requests with a X-MMS-Session-Id header continue the sentence of earlier requests
+    of the session, the recurrent states are restored instead of recomputing the sequence.
     """
 
     def __init__(self):
@@ -21,6 +24,8 @@ class MXNetLSTMService(ModelHandler):
         self.signature = None
         self.data_names = None
         self.data_shapes = None
+        self.state_names = None
+        self.state_shapes = None
         self.epoch = 100
 
         self.buckets = [10, 20, 30, 40, 50, 60]
@@ -74,6 +79,11 @@ class MXNetLSTMService(ModelHandler):
 
         stack = mx.rnn.FusedRNNCell(num_hidden, num_layers=num_layers, mode="lstm").unfuse()
 
+        # Begin states are inputs and final states are outputs, so sessions can carry them between requests
+        self.state_names = ["state_{}".format(i) for i in range(len(stack.state_info))]
+        self.state_shapes = [(name, (1, num_hidden)) for name in self.state_names]
+        self.data_shapes.extend(self.state_shapes)
+
         # Define symbol generation function for bucket module
         def sym_gen(seq_len):
             data = mx.sym.Variable("data")
@@ -81,13 +91,15 @@ class MXNetLSTMService(ModelHandler):
                                      output_dim=num_embed, name="embed")
 
             stack.reset()
-            outputs, _ = stack.unroll(seq_len, inputs=embed, merge_outputs=True)
+            begin_state = [mx.sym.Variable(name) for name in self.state_names]
+            outputs, states = stack.unroll(seq_len, inputs=embed, begin_state=begin_state, merge_outputs=True)
 
             pred = mx.sym.Reshape(outputs, shape=(-1, num_hidden))
             pred = mx.sym.FullyConnected(data=pred, num_hidden=len(self.vocab), name="pred")
             pred = mx.sym.softmax(pred, name='softmax')
 
-            return pred, ('data',), None
+            outputs = [pred] + [mx.sym.BlockGrad(state) for state in states]
+            return mx.sym.Group(outputs), ('data',) + tuple(self.state_names), None
 
         self.mxnet_ctx = mx.cpu() if gpu_id is None else mx.gpu(gpu_id)
 
@@ -126,11 +138,33 @@ class MXNetLSTMService(ModelHandler):
         return res
 
     def inference(self, data):
-        data_batch = nlp.pad_sentence(
-            data[0], self.buckets, invalid_label=self.invalid_label,
-            data_name=self.data_names[0], layout=self.layout)
-        self.mx_model.forward(data_batch)
-        return self.mx_model.get_outputs()
+        request_id = self._context.request_ids[0]
+        session_id = self._context.get_session_id(request_id)
+        states = self._context.get_session_state(request_id)
+        if states is None:
+            states = [mx.nd.zeros(shape, self.mxnet_ctx) for _, shape in self.state_shapes]
+
+        if session_id is None:
+            data_batch = nlp.pad_sentence(
+                data[0], self.buckets, invalid_label=self.invalid_label,
+                data_name=self.data_names[0], layout=self.layout)
+            sentence = data_batch.data[0]
+            bucket_key = data_batch.bucket_key
+        else:
+            # Padding would be fed through the recurrent states, session requests use the exact length
+            sentence = mx.nd.array([data[0]], dtype='float32')
+            bucket_key = len(data[0])
+
+        provide_data = [mx.io.DataDesc(name=self.data_names[0], shape=sentence.shape, layout=self.layout)]
+        provide_data.extend(mx.io.DataDesc(name=name, shape=shape) for name, shape in self.state_shapes)
+        data_batch = mx.io.DataBatch([sentence] + states, pad=0, bucket_key=bucket_key, provide_data=provide_data)
+        self.mx_model.forward(data_batch, is_train=False)
+        outputs = self.mx_model.get_outputs()
+
+        if session_id is not None:
+            # Executor outputs are overwritten by the next forward pass
+            self._context.set_session_state(request_id, [state.copy() for state in outputs[1:]])
+        return outputs[:1]
 
     def postprocess(self, data):
         # Generate predicted sentences
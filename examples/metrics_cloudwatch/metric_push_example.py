@@ -11,7 +11,6 @@
 """
 Examples for pushing a log to boto client to cloudwatch
 """
-import types
 import json
 
 import boto3 as boto
@@ -26,13 +25,7 @@ def generate_system_metrics(mod):
     :param mod:
     :return:
     """
-    members = dir(mod)
-    for i in members:
-        value = getattr(mod, i)
-        if isinstance(value, types.FunctionType) and value.__name__ != 'collect_all':
-            value()
-
-    return json.dumps(sys_metric.system_metrics, indent=4, separators=(',', ':'), cls=MetricEncoder)
+    return json.dumps(mod.collect(), indent=4, separators=(',', ':'), cls=MetricEncoder)
 
 
 def push_cloudwatch(metric_json, client):
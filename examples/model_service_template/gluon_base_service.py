@@ -34,6 +34,9 @@ class GluonBaseService(object):
         self._signature = None
         self.labels = None
         self.signature = None
+        # Normalization constants, scaled so that scaling to [0, 1] is folded in
+        self.mean = mx.nd.array([0.485 * 255, 0.456 * 255, 0.406 * 255])
+        self.std = mx.nd.array([0.229 * 255, 0.224 * 255, 0.225 * 255])
 
     def initialize(self, params):
         """
@@ -99,10 +102,7 @@ class GluonBaseService(object):
         img_arr = mx.img.imdecode(img)
         img_arr = mx.image.imresize(img_arr, w, h)
         img_arr = img_arr.astype(np.float32)
-        img_arr /= 255
-        img_arr = mx.image.color_normalize(img_arr,
-                                           mean=mx.nd.array([0.485, 0.456, 0.406]),
-                                           std=mx.nd.array([0.229, 0.224, 0.225]))
+        img_arr = mx.image.color_normalize(img_arr, mean=self.mean, std=self.std)
         img_arr = mx.nd.transpose(img_arr, (2, 0, 1))
         img_arr = img_arr.expand_dims(axis=0)
         return img_arr
@@ -130,7 +130,7 @@ class GluonBaseService(object):
         assert hasattr(self, 'labels'), \
             "Can't find labels attribute. Did you put synset.txt file into " \
             "model archive or manually load class label file in __init__?"
-        return [[ndarray.top_probability(d, self.labels, top=5) for d in data]]
+        return [ndarray.top_k(data, self.labels, top=5)[0]]
 
     def predict(self, data):
         data = self.preprocess(data)
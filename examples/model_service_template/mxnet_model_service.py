@@ -137,17 +137,8 @@ class MXNetModelService(ModelHandler):
         check_input_shape(model_input, self.signature)
         model_input = [item.as_in_context(self.mxnet_ctx) for item in model_input]
         self.mx_model.forward(DataBatch(model_input))
-        model_input = self.mx_model.get_outputs()
-        # by pass lazy evaluation get_outputs either returns a list of nd arrays
-        # a list of list of NDArray
-        for d in model_input:
-            if isinstance(d, list):
-                for n in model_input:
-                    if isinstance(n, mx.ndarray.ndarray.NDArray):
-                        n.wait_to_read()
-            elif isinstance(d, mx.ndarray.ndarray.NDArray):
-                d.wait_to_read()
-        return model_input
+        # Forward is asynchronous, outputs are synchronized when postprocess reads them
+        return self.mx_model.get_outputs()
 
     def postprocess(self, inference_output):
         if self.error is not None:
@@ -11,10 +11,12 @@
 import mxnet as mx
 import json
 import os
-import numpy as np
 from collections import namedtuple
 import logging
 
+from mms.utils.batch_buffer import BatchBufferPool
+from mxnet_utils import ndarray
+
 
 class MXNetVisionServiceBatching(object):
     def __init__(self):
@@ -28,32 +30,11 @@ class MXNetVisionServiceBatching(object):
         self.epoch = 0
         self._context = None
         self._batch_size = 0
+        self._num_requests = 0
+        self.buffer_pool = None
         self.initialized = False
         self.erroneous_reqs = set()
 
-    # noinspection PyMethodMayBeStatic
-    def top_probability(data, labels, top=5):
-        """
-        Get top probability prediction from NDArray.
-
-        :param data: NDArray
-            Data to be predicted
-        :param labels: List
-            List of class labels
-        :param top:
-        :return: List
-            List of probability: class pairs in sorted order
-        """
-        dim = len(data.shape)
-        if dim > 2:
-            data = mx.nd.array(
-                np.squeeze(data.asnumpy(), axis=tuple(range(dim)[2:])))
-        sorted_prob = mx.nd.argsort(data[0], is_ascend=False)
-        # pylint: disable=deprecated-lambda
-        top_prob = map(lambda x: int(x.asscalar()), sorted_prob[0:top])
-        return [{'probability': float(data[0, i].asscalar()), 'class': labels[i]}
-                for i in top_prob]
-
     def initialize(self, context):
         """
         Initialize model. This will be called during model loading time
@@ -111,6 +92,9 @@ class MXNetVisionServiceBatching(object):
         self.mx_model.bind(for_training=False, data_shapes=data_shapes)
         self.mx_model.set_params(arg_params, aux_params, allow_missing=True, allow_extra=True)
 
+        # Batch input tensors are allocated once and reused, preprocess writes each image into its slot
+        self.buffer_pool = BatchBufferPool.from_signature(self.signature, self._batch_size, ctx=self.mxnet_ctx)
+
     def inference(self, model_input):
         """
         Internal inference methods for MXNet. Run forward computation and
@@ -118,34 +102,33 @@ class MXNetVisionServiceBatching(object):
 
         :param model_input: list of NDArray
             Preprocessed inputs in NDArray format.
-        :return: list of NDArray
-            Inference output.
+        :return: NDArray
+            Inference output with one row for each entry of the batch.
         """
         batch = namedtuple('Batch', ['data'])
 
         self.mx_model.forward(batch([model_input]), is_train=False)
-        outputs = self.mx_model.get_outputs()
-        res = mx.ndarray.split(outputs[0], axis=0, num_outputs=outputs[0].shape[0])
-        res = [res] if not isinstance(res, list) else res
-        return res
+        return self.mx_model.get_outputs()[0]
 
     def preprocess(self, request):
         """
-        Decode all input images into ndarray.
+        Decode all input images into a preallocated batch tensor.
 
-        Note: This implementation doesn't properly handle error cases in batch mode,
-        If one of the input images is corrupted, all requests in the batch will fail.
+        Every request takes the slot matching its index in the batch, slots of erroneous
+        requests and slots after the last request are left as padding.
 
         :param request:
         :return:
         """
-        img_list = []
+        self.erroneous_reqs = set()
         param_name = self.signature['inputs'][0]['data_name']
         input_shape = self.signature['inputs'][0]['data_shape']
         # We are assuming input shape is NCHW
-        [c, h, w] = input_shape[1:]
+        [h, w] = input_shape[2:]
 
+        batch = self.buffer_pool.acquire()[0]
         for idx, data in enumerate(request):
+            slot = batch.next_slot()
             img = data.get(param_name)
             if img is None:
                 img = data.get("body")
@@ -166,25 +149,20 @@ class MXNetVisionServiceBatching(object):
                 continue
 
             img_arr = mx.image.imresize(img_arr, w, h, 2)
-            img_arr = mx.nd.transpose(img_arr, (2, 0, 1))
-            self._num_requests = idx + 1
-            img_list.append(img_arr)
-        
-        logging.debug("Worker :{} received {} requests".format(os.getpid(), self._num_requests))
-        reqs = mx.nd.stack(*img_list)
-        reqs = reqs.as_in_context(self.mxnet_ctx)
+            slot[:] = mx.nd.transpose(img_arr, (2, 0, 1))
 
-        if (self._batch_size - self._num_requests) != 0:
-            padding = mx.nd.zeros((self._batch_size - self._num_requests, c, h, w), self.mxnet_ctx, 'uint8')
-            reqs = mx.nd.concat(reqs, padding, dim=0)
+        self._num_requests = batch.fill
+        logging.debug("Worker :{} received {} requests".format(os.getpid(), self._num_requests))
 
-        return reqs
+        return batch.data
 
     def postprocess(self, data):
+        # Top 5 of all requests are computed at once, padding rows are skipped
+        top = ndarray.top_k(data[:self._num_requests], self.labels, top=5)
         res = []
-        for idx, resp in data[:self._num_requests]:
+        for idx, resp in enumerate(top):
             if idx not in self.erroneous_reqs:
-                res.append(self.top_probability(resp, self.labels, top=5))
+                res.append(resp)
             else:
                 res.append("This request was not processed successfully. Refer to mms.log for additional information")
         return res
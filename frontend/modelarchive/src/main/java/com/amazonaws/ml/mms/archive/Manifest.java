@@ -137,6 +137,7 @@ public class Manifest {
 
         private String engineName;
         private String engineVersion;
+        private Map<String, Object> runtimeProfile;
 
         public Engine() {}
 
@@ -155,6 +156,14 @@ public class Manifest {
         public void setEngineVersion(String engineVersion) {
             this.engineVersion = engineVersion;
         }
+
+        public Map<String, Object> getRuntimeProfile() {
+            return runtimeProfile;
+        }
+
+        public void setRuntimeProfile(Map<String, Object> runtimeProfile) {
+            this.runtimeProfile = runtimeProfile;
+        }
     }
 
     public static final class Model {
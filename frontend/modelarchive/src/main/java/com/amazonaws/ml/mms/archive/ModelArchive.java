@@ -33,7 +33,10 @@ import java.nio.charset.StandardCharsets;
 import java.security.DigestInputStream;
 import java.security.MessageDigest;
 import java.security.NoSuchAlgorithmException;
+import java.util.Arrays;
 import java.util.Enumeration;
+import java.util.List;
+import java.util.Map;
 import java.util.regex.Pattern;
 import java.util.zip.ZipEntry;
 import java.util.zip.ZipFile;
@@ -54,6 +57,19 @@ public class ModelArchive {
 
     private static final String MANIFEST_FILE = "MANIFEST.json";
 
+    // Runtime profile settings and environment variable prefixes the worker applies, as in
+    // mms/utils/runtime_profile.py
+    private static final List<String> RUNTIME_PROFILE_SETTINGS =
+            Arrays.asList(
+                    "engineType",
+                    "subgraphBackend",
+                    "cpuWorkerThreads",
+                    "ompThreads",
+                    "memoryPool",
+                    "operatorTuning");
+    private static final List<String> RUNTIME_PROFILE_ENV_PREFIXES =
+            Arrays.asList("MXNET_", "OMP_", "KMP_");
+
     private Manifest manifest;
     private String url;
     private File modelDir;
@@ -319,12 +335,42 @@ public class ModelArchive {
             if (manifest.getEngine() != null && manifest.getEngine().getEngineName() == null) {
                 throw new InvalidModelException("engineName is required in <engine>.");
             }
+
+            if (manifest.getEngine() != null) {
+                validateRuntimeProfile(manifest.getEngine().getRuntimeProfile());
+            }
         } catch (InvalidModelException e) {
             clean();
             throw e;
         }
     }
 
+    /**
+     * Checks the settings of a runtime profile, unknown settings would only be found when a worker
+     * loads the model.
+     *
+     * @param runtimeProfile runtime settings, or null
+     * @throws InvalidModelException if a setting is unknown
+     */
+    public static void validateRuntimeProfile(Map<String, Object> runtimeProfile)
+            throws InvalidModelException {
+        if (runtimeProfile == null) {
+            return;
+        }
+        for (String name : runtimeProfile.keySet()) {
+            if (RUNTIME_PROFILE_SETTINGS.contains(name)) {
+                continue;
+            }
+            boolean env = false;
+            for (String prefix : RUNTIME_PROFILE_ENV_PREFIXES) {
+                env |= name.startsWith(prefix);
+            }
+            if (!env) {
+                throw new InvalidModelException("Unknown runtime profile setting: " + name);
+            }
+        }
+    }
+
     public Manifest getManifest() {
         return manifest;
     }
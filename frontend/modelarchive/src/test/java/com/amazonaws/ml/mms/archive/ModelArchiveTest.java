@@ -14,6 +14,8 @@ package com.amazonaws.ml.mms.archive;
 
 import java.io.File;
 import java.io.IOException;
+import java.util.HashMap;
+import java.util.Map;
 import org.apache.commons.io.FileUtils;
 import org.testng.Assert;
 import org.testng.annotations.BeforeTest;
@@ -74,4 +76,20 @@ public class ModelArchiveTest {
         archive = ModelArchive.downloadModel(modelStore, "noop-v1.0");
         Assert.assertEquals(archive.getModelName(), "noop");
     }
+
+    @Test
+    public void testValidateRuntimeProfile() throws InvalidModelException {
+        Map<String, Object> profile = new HashMap<>();
+        profile.put("engineType", "NaiveEngine");
+        profile.put("MXNET_EXEC_BULK_EXEC_INFERENCE", 1);
+        ModelArchive.validateRuntimeProfile(profile);
+
+        profile.put("PATH", "/tmp");
+        try {
+            ModelArchive.validateRuntimeProfile(profile);
+            Assert.fail("Unknown runtime profile setting accepted.");
+        } catch (InvalidModelException e) {
+            Assert.assertEquals(e.getMessage(), "Unknown runtime profile setting: PATH");
+        }
+    }
 }
@@ -134,13 +134,21 @@ public class DescribeModelResponse {
     }
 
     public void addWorker(
-            String id, long startTime, boolean isRunning, int gpuId, long memoryUsage) {
+            String id,
+            long startTime,
+            boolean isRunning,
+            int gpuId,
+            long memoryUsage,
+            long memoryUss,
+            long memoryPss) {
         Worker worker = new Worker();
         worker.setId(id);
         worker.setStartTime(new Date(startTime));
         worker.setStatus(isRunning ? "READY" : "UNLOADING");
         worker.setGpu(gpuId >= 0);
         worker.setMemoryUsage(memoryUsage);
+        worker.setMemoryUss(memoryUss);
+        worker.setMemoryPss(memoryPss);
         workers.add(worker);
     }
 
@@ -159,6 +167,8 @@ public class DescribeModelResponse {
         private String status;
         private boolean gpu;
         private long memoryUsage;
+        private long memoryUss;
+        private long memoryPss;
 
         public Worker() {}
 
@@ -201,6 +211,22 @@ public class DescribeModelResponse {
         public void setMemoryUsage(long memoryUsage) {
             this.memoryUsage = memoryUsage;
         }
+
+        public long getMemoryUss() {
+            return memoryUss;
+        }
+
+        public void setMemoryUss(long memoryUss) {
+            this.memoryUss = memoryUss;
+        }
+
+        public long getMemoryPss() {
+            return memoryPss;
+        }
+
+        public void setMemoryPss(long memoryPss) {
+            this.memoryPss = memoryPss;
+        }
     }
 
     public static final class Metrics {
@@ -23,6 +23,7 @@ import com.amazonaws.ml.mms.wlm.Model;
 import com.amazonaws.ml.mms.wlm.ModelManager;
 import io.netty.channel.ChannelHandlerContext;
 import io.netty.handler.codec.http.FullHttpRequest;
+import io.netty.handler.codec.http.HttpHeaderNames;
 import io.netty.handler.codec.http.HttpHeaderValues;
 import io.netty.handler.codec.http.HttpMethod;
 import io.netty.handler.codec.http.HttpUtil;
@@ -180,7 +181,12 @@ public class InferenceRequestHandler extends HttpRequestHandler {
             }
         } else {
             byte[] content = NettyUtils.getBytes(req.content());
-            inputData.addParameter(new InputParameter("body", content, contentType));
+            // Keep content type parameters, binary tensor payloads carry dtype and shape in them.
+            CharSequence bodyType = req.headers().get(HttpHeaderNames.CONTENT_TYPE);
+            if (bodyType == null) {
+                bodyType = contentType;
+            }
+            inputData.addParameter(new InputParameter("body", content, bodyType));
         }
         return inputData;
     }
@@ -12,24 +12,38 @@
  */
 package com.amazonaws.ml.mms.http;
 
+import com.amazonaws.ml.mms.archive.InvalidModelException;
 import com.amazonaws.ml.mms.archive.Manifest;
 import com.amazonaws.ml.mms.archive.ModelArchive;
 import com.amazonaws.ml.mms.archive.ModelException;
 import com.amazonaws.ml.mms.archive.ModelNotFoundException;
+import com.amazonaws.ml.mms.metrics.OpenMetrics;
 import com.amazonaws.ml.mms.openapi.OpenApiUtils;
 import com.amazonaws.ml.mms.util.ConfigManager;
+import com.amazonaws.ml.mms.util.JsonUtils;
 import com.amazonaws.ml.mms.util.NettyUtils;
+import com.amazonaws.ml.mms.util.messages.WorkerCommands;
 import com.amazonaws.ml.mms.wlm.Model;
 import com.amazonaws.ml.mms.wlm.ModelManager;
+import com.amazonaws.ml.mms.wlm.ProfileJob;
 import com.amazonaws.ml.mms.wlm.WorkerThread;
+import com.google.gson.JsonParseException;
+import com.google.gson.reflect.TypeToken;
 import io.netty.channel.ChannelHandlerContext;
+import io.netty.handler.codec.http.DefaultFullHttpResponse;
 import io.netty.handler.codec.http.FullHttpRequest;
+import io.netty.handler.codec.http.FullHttpResponse;
+import io.netty.handler.codec.http.HttpHeaderNames;
 import io.netty.handler.codec.http.HttpMethod;
 import io.netty.handler.codec.http.HttpResponseStatus;
+import io.netty.handler.codec.http.HttpVersion;
 import io.netty.handler.codec.http.QueryStringDecoder;
+import io.netty.util.CharsetUtil;
 import java.io.IOException;
+import java.lang.reflect.Type;
 import java.util.ArrayList;
 import java.util.Collections;
+import java.util.LinkedHashMap;
 import java.util.List;
 import java.util.Map;
 import java.util.concurrent.CompletableFuture;
@@ -42,6 +56,9 @@ import java.util.function.Function;
  */
 public class ManagementRequestHandler extends HttpRequestHandler {
 
+    private static final int MAX_PROFILE_SECONDS = 300;
+    private static final int MAX_MEMORY_PROFILE_SECONDS = 3600;
+
     /** Creates a new {@code ManagementRequestHandler} instance. */
     public ManagementRequestHandler() {}
 
@@ -52,11 +69,18 @@ public class ManagementRequestHandler extends HttpRequestHandler {
             QueryStringDecoder decoder,
             String[] segments)
             throws ModelException {
+        HttpMethod method = req.method();
+        if ("metrics".equals(segments[1]) && segments.length == 2) {
+            if (!HttpMethod.GET.equals(method)) {
+                throw new MethodNotAllowedException();
+            }
+            handleMetrics(ctx, req);
+            return;
+        }
         if (!"models".equals(segments[1])) {
             throw new ResourceNotFoundException();
         }
 
-        HttpMethod method = req.method();
         if (segments.length < 3) {
             if (HttpMethod.GET.equals(method)) {
                 handleListModels(ctx, decoder);
@@ -68,6 +92,28 @@ public class ManagementRequestHandler extends HttpRequestHandler {
             throw new MethodNotAllowedException();
         }
 
+        if (segments.length == 4 && "profile".equals(segments[3])) {
+            if (!HttpMethod.POST.equals(method)) {
+                throw new MethodNotAllowedException();
+            }
+            handleProfileModel(
+                    ctx, decoder, segments[2], WorkerCommands.PROFILE, 10, MAX_PROFILE_SECONDS);
+            return;
+        }
+        if (segments.length == 4 && "memory".equals(segments[3])) {
+            if (!HttpMethod.POST.equals(method)) {
+                throw new MethodNotAllowedException();
+            }
+            handleProfileModel(
+                    ctx,
+                    decoder,
+                    segments[2],
+                    WorkerCommands.MEMORY_PROFILE,
+                    60,
+                    MAX_MEMORY_PROFILE_SECONDS);
+            return;
+        }
+
         if (HttpMethod.GET.equals(method)) {
             handleDescribeModel(ctx, segments[2]);
         } else if (HttpMethod.PUT.equals(method)) {
@@ -84,6 +130,19 @@ public class ManagementRequestHandler extends HttpRequestHandler {
         NettyUtils.sendJsonResponse(ctx, OpenApiUtils.listManagementApis());
     }
 
+    private void handleMetrics(ChannelHandlerContext ctx, FullHttpRequest req) {
+        String accept = req.headers().get(HttpHeaderNames.ACCEPT);
+        String contentType =
+                accept != null && accept.contains("application/openmetrics-text")
+                        ? OpenMetrics.CONTENT_TYPE
+                        : OpenMetrics.PROMETHEUS_CONTENT_TYPE;
+        FullHttpResponse resp =
+                new DefaultFullHttpResponse(HttpVersion.HTTP_1_1, HttpResponseStatus.OK, false);
+        resp.headers().set(HttpHeaderNames.CONTENT_TYPE, contentType);
+        resp.content().writeCharSequence(OpenMetrics.getInstance().scrape(), CharsetUtil.UTF_8);
+        NettyUtils.sendHttpResponse(ctx, resp, true);
+    }
+
     private void handleListModels(ChannelHandlerContext ctx, QueryStringDecoder decoder) {
         int limit = NettyUtils.getIntParameter(decoder, "limit", 100);
         int pageToken = NettyUtils.getIntParameter(decoder, "next_page_token", 0);
@@ -148,7 +207,14 @@ public class ManagementRequestHandler extends HttpRequestHandler {
             boolean isRunning = worker.isRunning();
             int gpuId = worker.getGpuId();
             long memory = worker.getMemory();
-            resp.addWorker(workerId, startTime, isRunning, gpuId, memory);
+            resp.addWorker(
+                    workerId,
+                    startTime,
+                    isRunning,
+                    gpuId,
+                    memory,
+                    worker.getMemoryUss(),
+                    worker.getMemoryPss());
         }
 
         NettyUtils.sendJsonResponse(ctx, resp);
@@ -182,6 +248,8 @@ public class ManagementRequestHandler extends HttpRequestHandler {
                 throw new BadRequestException(e);
             }
         }
+        Map<String, Object> runtimeProfile =
+                parseRuntimeProfile(NettyUtils.getParameter(decoder, "runtime_profile", null));
 
         ModelManager modelManager = ModelManager.getInstance();
         final ModelArchive archive;
@@ -200,6 +268,9 @@ public class ManagementRequestHandler extends HttpRequestHandler {
         }
 
         modelName = archive.getModelName();
+        if (runtimeProfile != null) {
+            setRuntimeProfile(archive.getManifest(), runtimeProfile);
+        }
 
         final String msg = "Model \"" + modelName + "\" registered";
         if (initialWorkers <= 0) {
@@ -219,6 +290,44 @@ public class ManagementRequestHandler extends HttpRequestHandler {
                 });
     }
 
+    private static Map<String, Object> parseRuntimeProfile(String runtimeProfile) {
+        if (runtimeProfile == null) {
+            return null;
+        }
+        Type type = new TypeToken<Map<String, Object>>() {}.getType();
+        Map<String, Object> profile;
+        try {
+            profile = JsonUtils.GSON.fromJson(runtimeProfile, type);
+        } catch (JsonParseException e) {
+            profile = null;
+        }
+        if (profile == null) {
+            throw new BadRequestException("Invalid runtime_profile: " + runtimeProfile);
+        }
+        try {
+            ModelArchive.validateRuntimeProfile(profile);
+        } catch (InvalidModelException e) {
+            throw new BadRequestException(e.getMessage());
+        }
+        return profile;
+    }
+
+    /** Settings of the registration runtime profile override settings of the archive manifest. */
+    private static void setRuntimeProfile(Manifest manifest, Map<String, Object> runtimeProfile) {
+        Manifest.Engine engine = manifest.getEngine();
+        if (engine == null) {
+            engine = new Manifest.Engine();
+            engine.setEngineName("MXNet");
+            manifest.setEngine(engine);
+        }
+        Map<String, Object> profile = new LinkedHashMap<>();
+        if (engine.getRuntimeProfile() != null) {
+            profile.putAll(engine.getRuntimeProfile());
+        }
+        profile.putAll(runtimeProfile);
+        engine.setRuntimeProfile(profile);
+    }
+
     private void handleUnregisterModel(ChannelHandlerContext ctx, String modelName)
             throws ModelNotFoundException {
         ModelManager modelManager = ModelManager.getInstance();
@@ -229,6 +338,46 @@ public class ManagementRequestHandler extends HttpRequestHandler {
         NettyUtils.sendJsonResponse(ctx, new StatusResponse(msg));
     }
 
+    private void handleProfileModel(
+            ChannelHandlerContext ctx,
+            QueryStringDecoder decoder,
+            String modelName,
+            WorkerCommands command,
+            int defaultSeconds,
+            int maxSeconds)
+            throws ModelNotFoundException {
+        int seconds = NettyUtils.getIntParameter(decoder, "seconds", defaultSeconds);
+        if (seconds <= 0 || seconds > maxSeconds) {
+            throw new BadRequestException("seconds must be between 1 and " + maxSeconds + '.');
+        }
+        String workerId = NettyUtils.getParameter(decoder, "worker_id", null);
+
+        ModelManager modelManager = ModelManager.getInstance();
+        Model model = modelManager.getModels().get(modelName);
+        if (model == null) {
+            throw new ModelNotFoundException("Model not found: " + modelName);
+        }
+        WorkerThread worker = null;
+        for (WorkerThread thread : modelManager.getWorkers(modelName)) {
+            if (thread.isRunning() && (workerId == null || workerId.equals(thread.getWorkerId()))) {
+                worker = thread;
+                break;
+            }
+        }
+        if (worker == null) {
+            throw new ServiceUnavailableException(
+                    "No running worker to profile: " + (workerId == null ? modelName : workerId));
+        }
+
+        // The worker profiles while it serves requests, the profile is collected by a second
+        // control job once the start job has succeeded and the duration has passed. Both jobs run
+        // between batches.
+        String id = worker.getWorkerId();
+        if (!model.addJob(id, new ProfileJob(ctx, model, id, command, seconds))) {
+            throw new ServiceUnavailableException("Worker is not available: " + id);
+        }
+    }
+
     private void handleScaleModel(
             ChannelHandlerContext ctx, QueryStringDecoder decoder, String modelName)
             throws ModelNotFoundException {
@@ -0,0 +1,70 @@
+/*
+ * Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+ * with the License. A copy of the License is located at
+ *
+ * http://aws.amazon.com/apache2.0/
+ *
+ * or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+ * OR CONDITIONS OF ANY KIND, either express or implied. See the License for the specific language governing permissions
+ * and limitations under the License.
+ */
+package com.amazonaws.ml.mms.metrics;
+
+import java.util.Arrays;
+import java.util.concurrent.atomic.AtomicLongArray;
+import java.util.concurrent.atomic.DoubleAdder;
+
+/**
+ * A histogram with fixed bucket bounds for the OpenMetrics endpoint.
+ *
+ * <p>Buckets are allocated once, observations are lock free so that recording from the worker
+ * threads never waits on a scrape.
+ */
+public final class Histogram {
+
+    private double[] bounds;
+    private String[] labels;
+    private AtomicLongArray buckets;
+    private DoubleAdder sum = new DoubleAdder();
+
+    public Histogram(double... bounds) {
+        this.bounds = bounds.clone();
+        Arrays.sort(this.bounds);
+        labels = new String[this.bounds.length + 1];
+        for (int i = 0; i < this.bounds.length; ++i) {
+            labels[i] = String.valueOf(this.bounds[i]);
+        }
+        labels[this.bounds.length] = "+Inf";
+        buckets = new AtomicLongArray(labels.length);
+    }
+
+    public void observe(double value) {
+        int idx = Arrays.binarySearch(bounds, value);
+        if (idx < 0) {
+            idx = -idx - 1;
+        }
+        buckets.incrementAndGet(idx);
+        sum.add(value);
+    }
+
+    /**
+     * Writes the bucket, count and sum samples of the histogram.
+     *
+     * @param sb output
+     * @param name metric family name
+     * @param labels rendered labels of the histogram, without braces, may be empty
+     */
+    public void write(StringBuilder sb, String name, String labels) {
+        String separator = labels.isEmpty() ? "" : ",";
+        long count = 0;
+        for (int i = 0; i < this.labels.length; ++i) {
+            count += buckets.get(i);
+            sb.append(name).append("_bucket{").append(labels).append(separator);
+            sb.append("le=\"").append(this.labels[i]).append("\"} ").append(count).append('\n');
+        }
+        sb.append(name).append("_count{").append(labels).append("} ").append(count).append('\n');
+        sb.append(name).append("_sum{").append(labels).append("} ").append(sum.sum()).append('\n');
+    }
+}
@@ -12,6 +12,8 @@
  */
 package com.amazonaws.ml.mms.metrics;
 
+import com.google.gson.JsonArray;
+import com.google.gson.JsonElement;
 import com.google.gson.annotations.SerializedName;
 import java.util.ArrayList;
 import java.util.Arrays;
@@ -117,6 +119,30 @@ public class Metric {
         this.timestamp = timestamp;
     }
 
+    /**
+     * Creates a metric from an entry of the metrics section of a worker response frame: [name,
+     * unit, value, [[dimension, value], ...], requestId, timestamp].
+     */
+    public static Metric fromJson(JsonArray entry, String hostName) {
+        Metric metric = new Metric();
+        metric.setMetricName(entry.get(0).getAsString());
+        metric.setUnit(entry.get(1).getAsString());
+        metric.setValue(entry.get(2).getAsString());
+        JsonArray dims = entry.get(3).getAsJsonArray();
+        List<Dimension> list = new ArrayList<>(dims.size());
+        for (JsonElement dim : dims) {
+            JsonArray pair = dim.getAsJsonArray();
+            list.add(new Dimension(pair.get(0).getAsString(), pair.get(1).getAsString()));
+        }
+        metric.setDimensions(list);
+        if (!entry.get(4).isJsonNull()) {
+            metric.setRequestId(entry.get(4).getAsString());
+        }
+        metric.setTimestamp(entry.get(5).getAsString());
+        metric.setHostName(hostName);
+        return metric;
+    }
+
     public static Metric parse(String line) {
         // DiskAvailable.Gigabytes:311|#Level:Host,hostname:localhost
         Matcher matcher = PATTERN.matcher(line);
@@ -13,13 +13,16 @@
 package com.amazonaws.ml.mms.metrics;
 
 import com.amazonaws.ml.mms.util.ConfigManager;
+import com.amazonaws.ml.mms.util.JsonUtils;
 import com.amazonaws.ml.mms.wlm.ModelManager;
 import com.amazonaws.ml.mms.wlm.WorkerThread;
+import com.google.gson.JsonObject;
 import java.io.BufferedReader;
 import java.io.File;
 import java.io.IOException;
 import java.io.InputStreamReader;
-import java.io.OutputStream;
+import java.io.OutputStreamWriter;
+import java.io.Writer;
 import java.nio.charset.StandardCharsets;
 import java.util.ArrayList;
 import java.util.List;
@@ -34,6 +37,9 @@ public class MetricCollector implements Runnable {
     private static final org.apache.log4j.Logger loggerMetrics =
             org.apache.log4j.Logger.getLogger(ConfigManager.MMS_METRICS_LOGGER);
     private ConfigManager configManager;
+    private Process process;
+    private Writer writer;
+    private BufferedReader reader;
 
     public MetricCollector(ConfigManager configManager) {
         this.configManager = configManager;
@@ -42,107 +48,141 @@ public class MetricCollector implements Runnable {
     @Override
     public void run() {
         try {
-            // Collect System level Metrics
-            String[] args = new String[2];
-            args[0] = configManager.getPythonExecutable();
-            args[1] = "mms/metrics/metric_collector.py";
-            File workingDir = new File(configManager.getModelServerHome());
-
-            String pythonPath = System.getenv("PYTHONPATH");
-            String pythonEnv;
-            if ((pythonPath == null || pythonPath.isEmpty())
-                    && (!workingDir.getAbsolutePath().contains("site-package"))) {
-                pythonEnv = "PYTHONPATH=" + workingDir.getAbsolutePath();
-            } else {
-                pythonEnv = "PYTHONPATH=" + pythonPath;
-                if (!workingDir.getAbsolutePath().contains("site-package")) {
-                    pythonEnv += File.pathSeparatorChar + workingDir.getAbsolutePath(); // NOPMD
-                }
+            if (process == null || !process.isAlive()) {
+                startCollector();
             }
-            // sbin added for macs for python sysctl pythonpath
-            StringBuilder path = new StringBuilder();
-            path.append("PATH=").append(System.getenv("PATH"));
-            String osName = System.getProperty("os.name");
-            if (osName.startsWith("Mac OS X")) {
-                path.append(File.pathSeparatorChar).append("/sbin/");
-            }
-            String[] env = {pythonEnv, path.toString()};
-            final Process p = Runtime.getRuntime().exec(args, env, workingDir);
 
+            // Request a sample from the collector process, started once and kept running
             ModelManager modelManager = ModelManager.getInstance();
             Map<Integer, WorkerThread> workerMap = modelManager.getWorkers();
-            try (OutputStream os = p.getOutputStream()) {
-                writeWorkerPids(workerMap, os);
-            }
-
-            new Thread(
-                            () -> {
-                                try {
-                                    String error =
-                                            IOUtils.toString(
-                                                    p.getErrorStream(), StandardCharsets.UTF_8);
-                                    if (!error.isEmpty()) {
-                                        logger.error(error);
-                                    }
-                                } catch (IOException e) {
-                                    logger.error("", e);
-                                }
-                            })
-                    .start();
+            writeWorkerPids(workerMap, writer);
 
+            // Collect System level Metrics
             MetricManager metricManager = MetricManager.getInstance();
-            try (BufferedReader reader =
-                    new BufferedReader(
-                            new InputStreamReader(p.getInputStream(), StandardCharsets.UTF_8))) {
-                List<Metric> metricsSystem = new ArrayList<>();
-                metricManager.setMetrics(metricsSystem);
-
-                String line;
-                while ((line = reader.readLine()) != null) {
-                    if (line.isEmpty()) {
-                        break;
-                    }
-                    Metric metric = Metric.parse(line);
-                    if (metric == null) {
-                        logger.warn("Parse metrics failed: " + line);
-                    } else {
-                        loggerMetrics.info(metric);
-                        metricsSystem.add(metric);
-                    }
+            List<Metric> metricsSystem = new ArrayList<>();
+            String line;
+            while ((line = reader.readLine()) != null) {
+                if (line.isEmpty()) {
+                    break;
+                }
+                Metric metric = Metric.parse(line);
+                if (metric == null) {
+                    logger.warn("Parse metrics failed: " + line);
+                } else {
+                    loggerMetrics.info(metric);
+                    metricsSystem.add(metric);
                 }
+            }
+            metricManager.setMetrics(metricsSystem);
 
-                // Collect process level metrics
-                while ((line = reader.readLine()) != null) {
-                    String[] tokens = line.split(":");
-                    if (tokens.length != 2) {
-                        continue;
-                    }
+            // Collect process level metrics: pid:rss:uss:pss:swap:threads:fds:ctx_switches:cpu
+            while ((line = reader.readLine()) != null) {
+                if (line.isEmpty()) {
+                    break;
+                }
+                String[] tokens = line.split(":");
+                if (tokens.length < 2) {
+                    continue;
+                }
 
-                    Integer pid = Integer.valueOf(tokens[0]);
-                    WorkerThread worker = workerMap.get(pid);
+                Integer pid = Integer.valueOf(tokens[0]);
+                WorkerThread worker = workerMap.get(pid);
+                if (worker != null) {
                     worker.setMemory(Long.parseLong(tokens[1]));
+                    if (tokens.length >= 4) {
+                        worker.setMemoryUss(Long.parseLong(tokens[2]));
+                        worker.setMemoryPss(Long.parseLong(tokens[3]));
+                    }
+                    if (tokens.length >= 9) {
+                        worker.setCpuUtilization(Double.parseDouble(tokens[8]));
+                    }
                 }
             }
+            if (line == null) {
+                throw new IOException("Metric collector exited.");
+            }
         } catch (IOException e) {
             logger.error("", e);
+            stopCollector();
         }
     }
 
-    private void writeWorkerPids(Map<Integer, WorkerThread> workerMap, OutputStream os)
+    private void startCollector() throws IOException {
+        stopCollector();
+
+        String[] args = new String[2];
+        args[0] = configManager.getPythonExecutable();
+        args[1] = "mms/metrics/metric_collector.py";
+        File workingDir = new File(configManager.getModelServerHome());
+
+        String pythonPath = System.getenv("PYTHONPATH");
+        String pythonEnv;
+        if ((pythonPath == null || pythonPath.isEmpty())
+                && (!workingDir.getAbsolutePath().contains("site-package"))) {
+            pythonEnv = "PYTHONPATH=" + workingDir.getAbsolutePath();
+        } else {
+            pythonEnv = "PYTHONPATH=" + pythonPath;
+            if (!workingDir.getAbsolutePath().contains("site-package")) {
+                pythonEnv += File.pathSeparatorChar + workingDir.getAbsolutePath(); // NOPMD
+            }
+        }
+        // sbin added for macs for python sysctl pythonpath
+        StringBuilder path = new StringBuilder();
+        path.append("PATH=").append(System.getenv("PATH"));
+        String osName = System.getProperty("os.name");
+        if (osName.startsWith("Mac OS X")) {
+            path.append(File.pathSeparatorChar).append("/sbin/");
+        }
+        String[] env = {pythonEnv, path.toString()};
+        final Process p = Runtime.getRuntime().exec(args, env, workingDir);
+
+        new Thread(
+                        () -> {
+                            try (BufferedReader errReader =
+                                    new BufferedReader(
+                                            new InputStreamReader(
+                                                    p.getErrorStream(), StandardCharsets.UTF_8))) {
+                                String error;
+                                while ((error = errReader.readLine()) != null) {
+                                    logger.error(error);
+                                }
+                            } catch (IOException e) {
+                                logger.error("", e);
+                            }
+                        },
+                        "metric-collector-stderr")
+                .start();
+
+        process = p;
+        writer = new OutputStreamWriter(p.getOutputStream(), StandardCharsets.UTF_8);
+        reader =
+                new BufferedReader(
+                        new InputStreamReader(p.getInputStream(), StandardCharsets.UTF_8));
+    }
+
+    private void stopCollector() {
+        if (process != null) {
+            IOUtils.closeQuietly(writer);
+            IOUtils.closeQuietly(reader);
+            process.destroyForcibly();
+            process = null;
+        }
+    }
+
+    private void writeWorkerPids(Map<Integer, WorkerThread> workerMap, Writer os)
             throws IOException {
-        boolean first = true;
-        for (Integer pid : workerMap.keySet()) {
+        // Worker pid to model name, the collector sums the resource usage of workers per model
+        JsonObject workers = new JsonObject();
+        for (Map.Entry<Integer, WorkerThread> entry : workerMap.entrySet()) {
+            Integer pid = entry.getKey();
             if (pid < 0) {
                 logger.warn("worker pid is not available yet.");
                 continue;
             }
-            if (first) {
-                first = false;
-            } else {
-                IOUtils.write(",", os, StandardCharsets.UTF_8);
-            }
-            IOUtils.write(pid.toString(), os, StandardCharsets.UTF_8);
+            workers.addProperty(pid.toString(), entry.getValue().getModelName());
         }
+        os.write(JsonUtils.GSON.toJson(workers));
         os.write('\n');
+        os.flush();
     }
 }
@@ -0,0 +1,99 @@
+/*
+ * Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+ * with the License. A copy of the License is located at
+ *
+ * http://aws.amazon.com/apache2.0/
+ *
+ * or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+ * OR CONDITIONS OF ANY KIND, either express or implied. See the License for the specific language governing permissions
+ * and limitations under the License.
+ */
+package com.amazonaws.ml.mms.metrics;
+
+/** In memory histograms of a model, recorded by its workers and exposed by {@link OpenMetrics}. */
+public final class ModelMetrics {
+
+    private static final double[] TIME_BUCKETS = {
+        0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+    };
+    private static final double[] BATCH_SIZE_BUCKETS = {1, 2, 4, 8, 16, 32, 64, 128, 256, 512};
+    private static final double[] RATIO_BUCKETS = {0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1};
+
+    private String labels;
+    private Histogram predictionTime = new Histogram(TIME_BUCKETS);
+    private Histogram queueTime = new Histogram(TIME_BUCKETS);
+    private Histogram batchSize = new Histogram(BATCH_SIZE_BUCKETS);
+    private Histogram batchFill = new Histogram(RATIO_BUCKETS);
+    private Histogram batchFillTime = new Histogram(TIME_BUCKETS);
+
+    public ModelMetrics(String modelName) {
+        labels = "model_name=\"" + OpenMetrics.escape(modelName) + '"';
+    }
+
+    public String getLabels() {
+        return labels;
+    }
+
+    /**
+     * Records the time from sending a batch to the backend worker to its response.
+     *
+     * @param millis backend time in milliseconds
+     */
+    public void observePredictionTime(long millis) {
+        predictionTime.observe(millis / 1000d);
+    }
+
+    /**
+     * Records the time a request waited in the model queue before a worker picked it up.
+     *
+     * @param millis queue time in milliseconds
+     */
+    public void observeQueueTime(long millis) {
+        queueTime.observe(millis / 1000d);
+    }
+
+    public void observeBatchSize(int size) {
+        batchSize.observe(size);
+    }
+
+    /**
+     * Records the number of requests of a batch against the configured batch size.
+     *
+     * @param size number of requests of the batch
+     * @param configured configured batch size of the model
+     */
+    public void observeBatchFill(int size, int configured) {
+        batchFill.observe(Math.min((double) size / Math.max(configured, 1), 1));
+    }
+
+    /**
+     * Records the time a batch waited for more requests after its first request was taken.
+     *
+     * @param millis fill time in milliseconds
+     */
+    public void observeBatchFillTime(long millis) {
+        batchFillTime.observe(millis / 1000d);
+    }
+
+    public Histogram getPredictionTime() {
+        return predictionTime;
+    }
+
+    public Histogram getQueueTime() {
+        return queueTime;
+    }
+
+    public Histogram getBatchSize() {
+        return batchSize;
+    }
+
+    public Histogram getBatchFill() {
+        return batchFill;
+    }
+
+    public Histogram getBatchFillTime() {
+        return batchFillTime;
+    }
+}
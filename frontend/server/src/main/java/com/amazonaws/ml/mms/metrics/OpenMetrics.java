@@ -0,0 +1,206 @@
+/*
+ * Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+ * with the License. A copy of the License is located at
+ *
+ * http://aws.amazon.com/apache2.0/
+ *
+ * or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+ * OR CONDITIONS OF ANY KIND, either express or implied. See the License for the specific language governing permissions
+ * and limitations under the License.
+ */
+package com.amazonaws.ml.mms.metrics;
+
+import com.amazonaws.ml.mms.wlm.ModelManager;
+import com.amazonaws.ml.mms.wlm.WorkerThread;
+import java.util.ArrayList;
+import java.util.LinkedHashMap;
+import java.util.List;
+import java.util.Locale;
+import java.util.Map;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.ConcurrentMap;
+import java.util.regex.Pattern;
+
+/**
+ * OpenMetrics exposition of the in memory metrics: the histograms of each model, gauges of the
+ * workers and the latest sample of the system metrics collector.
+ *
+ * <p>A scrape only reads atomic counters and the last collector sample, it takes no lock that
+ * inference requests wait on.
+ */
+public final class OpenMetrics {
+
+    public static final String CONTENT_TYPE =
+            "application/openmetrics-text; version=1.0.0; charset=utf-8";
+    public static final String PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8";
+
+    private static final OpenMetrics OPEN_METRICS = new OpenMetrics();
+    private static final Pattern ACRONYM = Pattern.compile("([A-Z]+)([A-Z][a-z])");
+    private static final Pattern CAMEL_CASE = Pattern.compile("([a-z0-9])([A-Z])");
+
+    private ConcurrentMap<String, ModelMetrics> models;
+    private ConcurrentMap<String, String> names;
+    private volatile int capacity;
+
+    private OpenMetrics() {
+        models = new ConcurrentHashMap<>();
+        names = new ConcurrentHashMap<>();
+        capacity = 4096;
+    }
+
+    public static OpenMetrics getInstance() {
+        return OPEN_METRICS;
+    }
+
+    public ModelMetrics getModelMetrics(String modelName) {
+        return models.computeIfAbsent(modelName, ModelMetrics::new);
+    }
+
+    public void removeModel(String modelName) {
+        models.remove(modelName);
+    }
+
+    public String scrape() {
+        // Sized by the previous scrape so that the buffer is allocated once
+        StringBuilder sb = new StringBuilder(capacity);
+
+        writeHeader(sb, "mms_prediction_time_seconds", "histogram", "Backend time of a batch.");
+        for (ModelMetrics metrics : models.values()) {
+            Histogram histogram = metrics.getPredictionTime();
+            histogram.write(sb, "mms_prediction_time_seconds", metrics.getLabels());
+        }
+        writeHeader(
+                sb, "mms_queue_time_seconds", "histogram", "Time requests waited for a worker.");
+        for (ModelMetrics metrics : models.values()) {
+            metrics.getQueueTime().write(sb, "mms_queue_time_seconds", metrics.getLabels());
+        }
+        writeHeader(sb, "mms_batch_size", "histogram", "Number of requests of a batch.");
+        for (ModelMetrics metrics : models.values()) {
+            metrics.getBatchSize().write(sb, "mms_batch_size", metrics.getLabels());
+        }
+        writeHeader(
+                sb,
+                "mms_batch_fill_ratio",
+                "histogram",
+                "Requests of a batch against the configured batch size.");
+        for (ModelMetrics metrics : models.values()) {
+            metrics.getBatchFill().write(sb, "mms_batch_fill_ratio", metrics.getLabels());
+        }
+        writeHeader(
+                sb,
+                "mms_batch_fill_time_seconds",
+                "histogram",
+                "Time batches waited for more requests.");
+        for (ModelMetrics metrics : models.values()) {
+            Histogram histogram = metrics.getBatchFillTime();
+            histogram.write(sb, "mms_batch_fill_time_seconds", metrics.getLabels());
+        }
+
+        writeWorkers(sb);
+        writeCollectorMetrics(sb);
+
+        sb.append("# EOF\n");
+        capacity = sb.length() + sb.length() / 4;
+        return sb.toString();
+    }
+
+    private void writeWorkers(StringBuilder sb) {
+        List<String> labels = new ArrayList<>();
+        List<WorkerThread> workers = new ArrayList<>();
+        ModelManager modelManager = ModelManager.getInstance();
+        for (String modelName : modelManager.getModels().keySet()) {
+            String modelLabel = "model_name=\"" + escape(modelName) + "\",worker_id=\"";
+            for (WorkerThread worker : modelManager.getWorkers(modelName)) {
+                labels.add(modelLabel + worker.getWorkerId() + '"');
+                workers.add(worker);
+            }
+        }
+
+        writeHeader(sb, "mms_worker_memory_rss_bytes", "gauge", "Resident memory of a worker.");
+        for (int i = 0; i < workers.size(); ++i) {
+            writeSample(
+                    sb, "mms_worker_memory_rss_bytes", labels.get(i), workers.get(i).getMemory());
+        }
+        writeHeader(sb, "mms_worker_memory_uss_bytes", "gauge", "Memory only used by a worker.");
+        for (int i = 0; i < workers.size(); ++i) {
+            long memory = workers.get(i).getMemoryUss();
+            writeSample(sb, "mms_worker_memory_uss_bytes", labels.get(i), memory);
+        }
+        writeHeader(
+                sb,
+                "mms_worker_memory_pss_bytes",
+                "gauge",
+                "Memory of a worker with its share of shared pages.");
+        for (int i = 0; i < workers.size(); ++i) {
+            long memory = workers.get(i).getMemoryPss();
+            writeSample(sb, "mms_worker_memory_pss_bytes", labels.get(i), memory);
+        }
+        writeHeader(sb, "mms_worker_cpu_percent", "gauge", "CPU utilization of a worker.");
+        for (int i = 0; i < workers.size(); ++i) {
+            sb.append("mms_worker_cpu_percent{").append(labels.get(i)).append("} ");
+            sb.append(workers.get(i).getCpuUtilization()).append('\n');
+        }
+    }
+
+    private void writeCollectorMetrics(StringBuilder sb) {
+        // Metrics of the same family, e.g. of different models, are written together
+        Map<String, List<Metric>> families = new LinkedHashMap<>();
+        for (Metric metric : MetricManager.getInstance().getMetrics()) {
+            families.computeIfAbsent(getFamilyName(metric), k -> new ArrayList<>()).add(metric);
+        }
+        for (Map.Entry<String, List<Metric>> family : families.entrySet()) {
+            String name = family.getKey();
+            writeHeader(sb, name, "gauge", family.getValue().get(0).getMetricName() + '.');
+            for (Metric metric : family.getValue()) {
+                sb.append(name).append('{');
+                boolean first = true;
+                for (Dimension dimension : metric.getDimensions()) {
+                    if (!first) {
+                        sb.append(',');
+                    }
+                    first = false;
+                    sb.append(toSnakeCase(dimension.getName())).append("=\"");
+                    sb.append(escape(dimension.getValue())).append('"');
+                }
+                sb.append("} ").append(metric.getValue()).append('\n');
+            }
+        }
+    }
+
+    private String getFamilyName(Metric metric) {
+        String key = metric.getMetricName() + '.' + metric.getUnit();
+        String name = names.get(key);
+        if (name == null) {
+            name = "mms_" + toSnakeCase(metric.getMetricName());
+            String unit = metric.getUnit().toLowerCase(Locale.ROOT);
+            if (!"count".equals(unit) && !name.endsWith('_' + unit)) {
+                name += '_' + unit;
+            }
+            names.put(key, name);
+        }
+        return name;
+    }
+
+    private static void writeHeader(StringBuilder sb, String name, String type, String help) {
+        sb.append("# TYPE ").append(name).append(' ').append(type).append('\n');
+        sb.append("# HELP ").append(name).append(' ').append(help).append('\n');
+    }
+
+    private static void writeSample(StringBuilder sb, String name, String labels, long value) {
+        sb.append(name).append('{').append(labels).append("} ").append(value).append('\n');
+    }
+
+    static String toSnakeCase(String name) {
+        String snake = ACRONYM.matcher(name).replaceAll("$1_$2");
+        return CAMEL_CASE.matcher(snake).replaceAll("$1_$2").toLowerCase(Locale.ROOT);
+    }
+
+    static String escape(String value) {
+        if (value == null) {
+            return "";
+        }
+        return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n");
+    }
+}
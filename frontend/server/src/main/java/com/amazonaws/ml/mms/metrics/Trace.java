@@ -0,0 +1,148 @@
+/*
+ * Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+ * with the License. A copy of the License is located at
+ *
+ * http://aws.amazon.com/apache2.0/
+ *
+ * or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+ * OR CONDITIONS OF ANY KIND, either express or implied. See the License for the specific language governing permissions
+ * and limitations under the License.
+ */
+package com.amazonaws.ml.mms.metrics;
+
+import com.amazonaws.ml.mms.util.ConfigManager;
+import com.amazonaws.ml.mms.util.JsonUtils;
+import com.amazonaws.ml.mms.util.messages.RequestInput;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.concurrent.ThreadLocalRandom;
+import org.apache.log4j.Logger;
+
+/**
+ * Stage timings of a traced inference request.
+ *
+ * <p>Requests are traced when the client sends the X-MMS-Trace header, or at the configured
+ * trace_sample_rate. The frontend records the queue wait, the encoding of the batch and the
+ * backend time, the worker records its stages and sends them in the trace section of the
+ * response frame. The spans are returned in the Server-Timing response header and written to
+ * the trace log, one JSON record per request.
+ */
+public final class Trace {
+
+    public static final String TRACE_HEADER = "X-MMS-Trace";
+    public static final String SERVER_TIMING = "Server-Timing";
+
+    private static final Logger loggerTrace = Logger.getLogger(ConfigManager.MMS_TRACE_LOGGER);
+
+    private String requestId;
+    private String modelName;
+    private long timestamp;
+    private List<Span> spans = new ArrayList<>();
+
+    public Trace(String requestId, String modelName, long timestamp) {
+        this.requestId = requestId;
+        this.modelName = modelName;
+        this.timestamp = timestamp;
+    }
+
+    /**
+     * Whether a request is traced. Traced requests are marked with the trace header, in the case
+     * the worker looks up, so that the worker traces them as well.
+     *
+     * @param input request
+     * @return true if the request is traced
+     */
+    public static boolean isTraced(RequestInput input) {
+        boolean traced = false;
+        for (String name : input.getHeaders().keySet()) {
+            if (TRACE_HEADER.equalsIgnoreCase(name)) {
+                traced = true;
+                break;
+            }
+        }
+        if (!traced) {
+            double rate = ConfigManager.getInstance().getTraceSampleRate();
+            traced = rate > 0 && ThreadLocalRandom.current().nextDouble() < rate;
+        }
+        if (traced) {
+            input.updateHeaders(TRACE_HEADER, "true");
+        }
+        return traced;
+    }
+
+    public void add(String name, double millis) {
+        spans.add(new Span(name, millis));
+    }
+
+    public void addAll(List<Span> spans) {
+        if (spans != null) {
+            this.spans.addAll(spans);
+        }
+    }
+
+    public List<Span> getSpans() {
+        return spans;
+    }
+
+    /**
+     * Renders the spans as Server-Timing header value, e.g. "queue;dur=1.0, handler;dur=12.5".
+     *
+     * @return header value
+     */
+    public String getServerTiming() {
+        StringBuilder sb = new StringBuilder();
+        for (Span span : spans) {
+            if (sb.length() > 0) {
+                sb.append(", ");
+            }
+            sb.append(toToken(span.getName())).append(";dur=");
+            sb.append(Math.round(span.getDuration() * 1000) / 1000d);
+        }
+        return sb.toString();
+    }
+
+    /** Writes the trace to the trace log. */
+    public void log() {
+        loggerTrace.info(JsonUtils.GSON.toJson(this));
+    }
+
+    private static String toToken(String name) {
+        StringBuilder sb = new StringBuilder(name.length());
+        for (int i = 0; i < name.length(); ++i) {
+            char c = name.charAt(i);
+            if ((c >= 'a' && c <= 'z')
+                    || (c >= 'A' && c <= 'Z')
+                    || (c >= '0' && c <= '9')
+                    || c == '-'
+                    || c == '_'
+                    || c == '.') {
+                sb.append(c);
+            } else {
+                sb.append('_');
+            }
+        }
+        return sb.toString();
+    }
+
+    /** Duration of a stage of a request. */
+    public static final class Span {
+
+        private String name;
+        private double duration;
+
+        public Span(String name, double duration) {
+            this.name = name;
+            this.duration = duration;
+        }
+
+        public String getName() {
+            return name;
+        }
+
+        public double getDuration() {
+            return duration;
+        }
+    }
+}
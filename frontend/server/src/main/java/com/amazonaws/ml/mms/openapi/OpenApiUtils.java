@@ -327,6 +327,10 @@ public final class OpenApiUtils {
                         "integer",
                         "2",
                         "Maximum time, in seconds, the Model Server waits for a response from the model inference code, default: 120."));
+        operation.addParameter(
+                new QueryParameter(
+                        "runtime_profile",
+                        "MXNet runtime settings as a JSON object. These settings will override runtimeProfile in MANIFEST.json if present."));
         operation.addParameter(
                 new QueryParameter(
                         "initial_workers",
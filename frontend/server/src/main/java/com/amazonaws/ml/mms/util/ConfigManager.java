@@ -54,6 +54,7 @@ public final class ConfigManager {
     public static final String MODEL_METRICS_LOGGER = "MODEL_METRICS";
     public static final String MODEL_LOGGER = "MODEL_LOG";
     public static final String MMS_METRICS_LOGGER = "MMS_METRICS";
+    public static final String MMS_TRACE_LOGGER = "MMS_TRACE";
 
     private static final String DEBUG = "debug";
     private static final String INFERENCE_ADDRESS = "inference_address";
@@ -71,10 +72,12 @@ public final class ConfigManager {
     private static final String USE_NATIVE_IO = "use_native_io";
     private static final String IO_RATIO = "io_ratio";
     private static final String JOB_QUEUE_SIZE = "job_queue_size";
+    private static final String SESSION_TIMEOUT = "session_timeout";
 
     private static final String NUMBER_OF_GPU = "number_of_gpu";
     private static final String METRIC_TIME_INTERVAL = "metric_time_interval";
     private static final String ASYNC_LOGGING = "async_logging";
+    private static final String TRACE_SAMPLE_RATE = "trace_sample_rate";
 
     private static final String CORS_ALLOWED_ORIGIN = "cors_allowed_origin";
     private static final String CORS_ALLOWED_METHODS = "cors_allowed_methods";
@@ -202,6 +205,10 @@ public final class ConfigManager {
         return getIntProperty(JOB_QUEUE_SIZE, 100);
     }
 
+    public int getSessionTimeout() {
+        return getIntProperty(SESSION_TIMEOUT, 600);
+    }
+
     public int getNumberOfGpu() {
         return getIntProperty(NUMBER_OF_GPU, 0);
     }
@@ -225,6 +232,10 @@ public final class ConfigManager {
         return getIntProperty(METRIC_TIME_INTERVAL, 60);
     }
 
+    public double getTraceSampleRate() {
+        return Double.parseDouble(prop.getProperty(TRACE_SAMPLE_RATE, "0"));
+    }
+
     public String getModelServerHome() {
         String mmsHome = System.getenv("MODEL_SERVER_HOME");
         if (mmsHome == null) {
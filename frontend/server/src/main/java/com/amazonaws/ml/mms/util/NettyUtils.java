@@ -138,8 +138,9 @@ public final class NettyUtils {
      * @param ctx ChannelHandlerContext
      * @param resp HttpResponse to send
      * @param keepAlive if keep the connection
+     * @return the future of the write
      */
-    public static void sendHttpResponse(
+    public static ChannelFuture sendHttpResponse(
             ChannelHandlerContext ctx, FullHttpResponse resp, boolean keepAlive) {
         // Send the response and close the connection if necessary.
         Channel channel = ctx.channel();
@@ -192,10 +193,10 @@ public final class NettyUtils {
             headers.set(HttpHeaderNames.CONNECTION, HttpHeaderValues.CLOSE);
             ChannelFuture f = channel.writeAndFlush(resp);
             f.addListener(ChannelFutureListener.CLOSE);
-        } else {
-            headers.set(HttpHeaderNames.CONNECTION, HttpHeaderValues.KEEP_ALIVE);
-            channel.writeAndFlush(resp);
+            return f;
         }
+        headers.set(HttpHeaderNames.CONNECTION, HttpHeaderValues.KEEP_ALIVE);
+        return channel.writeAndFlush(resp);
     }
 
     /** Closes the specified channel after all queued write requests are flushed. */
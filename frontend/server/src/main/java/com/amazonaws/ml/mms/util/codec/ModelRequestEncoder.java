@@ -16,7 +16,9 @@ import com.amazonaws.ml.mms.util.messages.BaseModelRequest;
 import com.amazonaws.ml.mms.util.messages.InputParameter;
 import com.amazonaws.ml.mms.util.messages.ModelInferenceRequest;
 import com.amazonaws.ml.mms.util.messages.ModelLoadModelRequest;
+import com.amazonaws.ml.mms.util.messages.ModelProfileRequest;
 import com.amazonaws.ml.mms.util.messages.RequestInput;
+import com.amazonaws.ml.mms.util.messages.WorkerCommands;
 import io.netty.buffer.ByteBuf;
 import io.netty.channel.ChannelHandler;
 import io.netty.channel.ChannelHandlerContext;
@@ -59,6 +61,11 @@ public class ModelRequestEncoder extends MessageToByteEncoder<BaseModelRequest>
                 encodeRequest(input, out);
             }
             out.writeInt(-1); // End of List
+        } else if (msg instanceof ModelProfileRequest) {
+            ModelProfileRequest request = (ModelProfileRequest) msg;
+            out.writeByte(request.getCommand() == WorkerCommands.MEMORY_PROFILE ? 'M' : 'P');
+            encodeField(request.getRequestId(), out);
+            out.writeInt(request.getDuration());
         }
     }
 
@@ -12,13 +12,23 @@
  */
 package com.amazonaws.ml.mms.util.codec;
 
+import com.amazonaws.ml.mms.http.ErrorResponse;
+import com.amazonaws.ml.mms.metrics.Metric;
+import com.amazonaws.ml.mms.metrics.Trace;
+import com.amazonaws.ml.mms.util.ConfigManager;
 import com.amazonaws.ml.mms.util.messages.ModelWorkerResponse;
 import com.amazonaws.ml.mms.util.messages.Predictions;
+import com.google.gson.JsonArray;
+import com.google.gson.JsonElement;
+import com.google.gson.JsonObject;
+import com.google.gson.JsonParser;
 import io.netty.buffer.ByteBuf;
 import io.netty.channel.ChannelHandlerContext;
 import io.netty.handler.codec.ByteToMessageDecoder;
 import java.util.ArrayList;
+import java.util.HashMap;
 import java.util.List;
+import java.util.Map;
 
 public class ModelResponseDecoder extends ByteToMessageDecoder {
 
@@ -69,6 +79,33 @@ public class ModelResponseDecoder extends ByteToMessageDecoder {
                 predictions.add(prediction);
             }
             resp.setPredictions(predictions);
+
+            // Metrics section ends the frame
+            len = CodecUtils.readLength(in, maxBufferSize);
+            if (len == CodecUtils.BUFFER_UNDER_RUN) {
+                return;
+            }
+            if (len > 0) {
+                resp.setMetrics(parseMetrics(CodecUtils.readString(in, len)));
+            }
+
+            // Spans of traced requests follow the metrics
+            len = CodecUtils.readLength(in, maxBufferSize);
+            if (len == CodecUtils.BUFFER_UNDER_RUN) {
+                return;
+            }
+            if (len > 0) {
+                resp.setTraces(parseTraces(CodecUtils.readString(in, len)));
+            }
+
+            // Requests the worker rejected on their own end the frame
+            len = CodecUtils.readLength(in, maxBufferSize);
+            if (len == CodecUtils.BUFFER_UNDER_RUN) {
+                return;
+            }
+            if (len > 0) {
+                resp.setErrors(parseErrors(CodecUtils.readString(in, len)));
+            }
             out.add(resp);
             completed = true;
         } finally {
@@ -77,4 +114,41 @@ public class ModelResponseDecoder extends ByteToMessageDecoder {
             }
         }
     }
+
+    private static List<Metric> parseMetrics(String json) {
+        String hostName = ConfigManager.getInstance().getHostName();
+        JsonArray entries = new JsonParser().parse(json).getAsJsonArray();
+        List<Metric> metrics = new ArrayList<>(entries.size());
+        for (JsonElement entry : entries) {
+            metrics.add(Metric.fromJson(entry.getAsJsonArray(), hostName));
+        }
+        return metrics;
+    }
+
+    private static Map<String, ErrorResponse> parseErrors(String json) {
+        JsonObject entries = new JsonParser().parse(json).getAsJsonObject();
+        Map<String, ErrorResponse> errors = new HashMap<>();
+        for (Map.Entry<String, JsonElement> entry : entries.entrySet()) {
+            JsonArray error = entry.getValue().getAsJsonArray();
+            errors.put(
+                    entry.getKey(),
+                    new ErrorResponse(error.get(0).getAsInt(), error.get(1).getAsString()));
+        }
+        return errors;
+    }
+
+    private static Map<String, List<Trace.Span>> parseTraces(String json) {
+        JsonObject entries = new JsonParser().parse(json).getAsJsonObject();
+        Map<String, List<Trace.Span>> traces = new HashMap<>();
+        for (Map.Entry<String, JsonElement> entry : entries.entrySet()) {
+            JsonArray items = entry.getValue().getAsJsonArray();
+            List<Trace.Span> spans = new ArrayList<>(items.size());
+            for (JsonElement item : items) {
+                JsonArray span = item.getAsJsonArray();
+                spans.add(new Trace.Span(span.get(0).getAsString(), span.get(1).getAsDouble()));
+            }
+            traces.put(entry.getKey(), spans);
+        }
+        return traces;
+    }
 }
@@ -0,0 +1,40 @@
+/*
+ * Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+ * with the License. A copy of the License is located at
+ *
+ * http://aws.amazon.com/apache2.0/
+ *
+ * or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+ * OR CONDITIONS OF ANY KIND, either express or implied. See the License for the specific language governing permissions
+ * and limitations under the License.
+ */
+package com.amazonaws.ml.mms.util.messages;
+
+public class ModelProfileRequest extends BaseModelRequest {
+
+    /**
+     * ModelProfileRequest starts the sampling profiler (PROFILE) or the memory profiler
+     * (MEMORY_PROFILE) of a backend worker for a duration, or stops it and collects the profile
+     * when the duration is 0.
+     */
+    private String requestId;
+
+    private int duration;
+
+    public ModelProfileRequest(
+            WorkerCommands command, String modelName, String requestId, int duration) {
+        super(command, modelName);
+        this.requestId = requestId;
+        this.duration = duration;
+    }
+
+    public String getRequestId() {
+        return requestId;
+    }
+
+    public int getDuration() {
+        return duration;
+    }
+}
@@ -12,13 +12,21 @@
  */
 package com.amazonaws.ml.mms.util.messages;
 
+import com.amazonaws.ml.mms.http.ErrorResponse;
+import com.amazonaws.ml.mms.metrics.Metric;
+import com.amazonaws.ml.mms.metrics.Trace;
+import java.util.Collections;
 import java.util.List;
+import java.util.Map;
 
 public class ModelWorkerResponse {
 
     private int code;
     private String message;
     private List<Predictions> predictions;
+    private List<Metric> metrics = Collections.emptyList();
+    private Map<String, List<Trace.Span>> traces = Collections.emptyMap();
+    private Map<String, ErrorResponse> errors = Collections.emptyMap();
 
     public ModelWorkerResponse() {}
 
@@ -46,6 +54,30 @@ public class ModelWorkerResponse {
         this.predictions = predictions;
     }
 
+    public List<Metric> getMetrics() {
+        return metrics;
+    }
+
+    public void setMetrics(List<Metric> metrics) {
+        this.metrics = metrics;
+    }
+
+    public Map<String, List<Trace.Span>> getTraces() {
+        return traces;
+    }
+
+    public void setTraces(Map<String, List<Trace.Span>> traces) {
+        this.traces = traces;
+    }
+
+    public Map<String, ErrorResponse> getErrors() {
+        return errors;
+    }
+
+    public void setErrors(Map<String, ErrorResponse> errors) {
+        this.errors = errors;
+    }
+
     public void appendPredictions(Predictions prediction) {
         this.predictions.add(prediction);
     }
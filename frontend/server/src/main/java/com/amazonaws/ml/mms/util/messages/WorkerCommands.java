@@ -10,7 +10,11 @@ public enum WorkerCommands {
     @SerializedName("unload")
     UNLOAD("unload"),
     @SerializedName("stats")
-    STATS("stats");
+    STATS("stats"),
+    @SerializedName("profile")
+    PROFILE("profile"),
+    @SerializedName("memory_profile")
+    MEMORY_PROFILE("memory_profile");
 
     private String command;
 
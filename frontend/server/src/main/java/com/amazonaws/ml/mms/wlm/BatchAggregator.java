@@ -12,12 +12,18 @@
  */
 package com.amazonaws.ml.mms.wlm;
 
+import com.amazonaws.ml.mms.http.ErrorResponse;
+import com.amazonaws.ml.mms.metrics.ModelMetrics;
+import com.amazonaws.ml.mms.metrics.OpenMetrics;
+import com.amazonaws.ml.mms.metrics.Trace;
 import com.amazonaws.ml.mms.util.messages.BaseModelRequest;
 import com.amazonaws.ml.mms.util.messages.ModelInferenceRequest;
 import com.amazonaws.ml.mms.util.messages.ModelLoadModelRequest;
+import com.amazonaws.ml.mms.util.messages.ModelProfileRequest;
 import com.amazonaws.ml.mms.util.messages.ModelWorkerResponse;
 import com.amazonaws.ml.mms.util.messages.Predictions;
 import com.amazonaws.ml.mms.util.messages.RequestInput;
+import com.amazonaws.ml.mms.util.messages.WorkerCommands;
 import io.netty.handler.codec.http.HttpResponseStatus;
 import java.util.LinkedHashMap;
 import java.util.Map;
@@ -30,20 +36,20 @@ public class BatchAggregator {
 
     private Model model;
     private Map<String, Job> jobs;
+    private ModelMetrics modelMetrics;
 
     public BatchAggregator(Model model) {
         this.model = model;
         jobs = new LinkedHashMap<>();
+        modelMetrics = OpenMetrics.getInstance().getModelMetrics(model.getModelName());
     }
 
-    public BaseModelRequest getRequest(String threadName, WorkerState state)
-            throws InterruptedException {
+    public BaseModelRequest getRequest(String threadName) throws InterruptedException {
         jobs.clear();
 
         ModelInferenceRequest req = new ModelInferenceRequest(model.getModelName());
 
-        model.pollBatch(
-                threadName, (state == WorkerState.WORKER_MODEL_LOADED) ? 0 : Long.MAX_VALUE, jobs);
+        model.pollBatch(threadName, jobs);
 
         for (Job j : jobs.values()) {
             if (j.isControlCmd()) {
@@ -53,6 +59,12 @@ public class BatchAggregator {
                                     + "Control messages should be processed/retrieved one at a time.");
                 }
                 RequestInput input = j.getPayload();
+                if (j.getCmd() == WorkerCommands.PROFILE
+                        || j.getCmd() == WorkerCommands.MEMORY_PROFILE) {
+                    int duration = Integer.parseInt(input.getStringParameter("duration"));
+                    return new ModelProfileRequest(
+                            j.getCmd(), model.getModelName(), j.getJobId(), duration);
+                }
                 int gpuId = -1;
                 String gpu = input.getStringParameter("gpu");
                 if (gpu != null) {
@@ -61,14 +73,49 @@ public class BatchAggregator {
                 return new ModelLoadModelRequest(model, gpuId);
             } else {
                 j.setScheduled();
-                req.addRequest(j.getPayload());
+                modelMetrics.observeQueueTime(j.getQueueTime());
+                if (j.getTrace() != null) {
+                    j.getTrace().add("queue", j.getQueueTime());
+                }
+                RequestInput input = j.getPayload();
+                // The worker reports the time requests waited from this time stamp
+                input.updateHeaders(Model.ENQUEUE_TIME_HEADER, String.valueOf(j.getBegin()));
+                req.addRequest(input);
             }
         }
+        if (!jobs.isEmpty()) {
+            modelMetrics.observeBatchSize(jobs.size());
+            modelMetrics.observeBatchFill(jobs.size(), model.getBatchSize());
+        }
         return req;
     }
 
+    /**
+     * Adds the stages of the whole batch to the traced requests of the batch.
+     *
+     * @param encodeTime time to encode and write the batch to the worker in milliseconds
+     * @param backendTime time from writing the batch to the response of the worker in milliseconds
+     */
+    public void traceBatch(double encodeTime, long backendTime) {
+        for (Job job : jobs.values()) {
+            Trace trace = job.getTrace();
+            if (trace != null) {
+                trace.add("encode", encodeTime);
+                trace.add("worker", backendTime);
+            }
+        }
+    }
+
     public void sendResponse(ModelWorkerResponse message) {
-        // TODO: Handle prediction level code
+        // Requests rejected by the worker, e.g. inputs that could not be decoded, fail on their own
+        for (Map.Entry<String, ErrorResponse> entry : message.getErrors().entrySet()) {
+            Job job = jobs.remove(entry.getKey());
+            if (job == null) {
+                throw new IllegalStateException("Unexpected job: " + entry.getKey());
+            }
+            ErrorResponse error = entry.getValue();
+            job.sendError(HttpResponseStatus.valueOf(error.getCode()), error.getMessage());
+        }
 
         if (message.getCode() == 200) {
             if (jobs.isEmpty()) {
@@ -82,6 +129,9 @@ public class BatchAggregator {
                 if (job == null) {
                     throw new IllegalStateException("Unexpected job: " + jobId);
                 }
+                if (job.getTrace() != null) {
+                    job.getTrace().addAll(message.getTraces().get(jobId));
+                }
                 job.response(prediction.getResp(), prediction.getContentType());
             }
         } else {
@@ -103,6 +153,13 @@ public class BatchAggregator {
             logger.warn("Load model failed: {}, error: {}", message.getModelName(), error);
             return;
         }
+        if (message instanceof ModelProfileRequest) {
+            Job job = jobs.remove(((ModelProfileRequest) message).getRequestId());
+            if (job != null) {
+                job.sendError(HttpResponseStatus.INTERNAL_SERVER_ERROR, error);
+            }
+            return;
+        }
 
         if (message != null) {
             ModelInferenceRequest msg = (ModelInferenceRequest) message;
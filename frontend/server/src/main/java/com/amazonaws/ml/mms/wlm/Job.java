@@ -12,16 +12,20 @@
  */
 package com.amazonaws.ml.mms.wlm;
 
+import com.amazonaws.ml.mms.http.BadRequestException;
 import com.amazonaws.ml.mms.http.InternalServerException;
+import com.amazonaws.ml.mms.metrics.Trace;
 import com.amazonaws.ml.mms.util.NettyUtils;
 import com.amazonaws.ml.mms.util.messages.RequestInput;
 import com.amazonaws.ml.mms.util.messages.WorkerCommands;
+import io.netty.channel.ChannelFuture;
 import io.netty.channel.ChannelHandlerContext;
 import io.netty.handler.codec.http.DefaultFullHttpResponse;
 import io.netty.handler.codec.http.FullHttpResponse;
 import io.netty.handler.codec.http.HttpHeaderNames;
 import io.netty.handler.codec.http.HttpResponseStatus;
 import io.netty.handler.codec.http.HttpVersion;
+import java.util.Map;
 import org.slf4j.Logger;
 import org.slf4j.LoggerFactory;
 
@@ -36,6 +40,7 @@ public class Job {
     private RequestInput input;
     private long begin;
     private long scheduled;
+    private Trace trace;
 
     public Job(
             ChannelHandlerContext ctx, String modelName, WorkerCommands cmd, RequestInput input) {
@@ -46,6 +51,13 @@ public class Job {
 
         begin = System.currentTimeMillis();
         scheduled = begin;
+        if (!isControlCmd() && Trace.isTraced(input)) {
+            trace = new Trace(input.getRequestId(), modelName, begin);
+        }
+    }
+
+    public ChannelHandlerContext getCtx() {
+        return ctx;
     }
 
     public String getJobId() {
@@ -68,10 +80,36 @@ public class Job {
         return input;
     }
 
+    public String getSessionId() {
+        for (Map.Entry<String, String> entry : input.getHeaders().entrySet()) {
+            if (Model.SESSION_HEADER.equalsIgnoreCase(entry.getKey())) {
+                return entry.getValue();
+            }
+        }
+        return null;
+    }
+
+    /**
+     * Returns the trace of the request.
+     *
+     * @return the trace, or null if the request is not traced
+     */
+    public Trace getTrace() {
+        return trace;
+    }
+
+    public long getBegin() {
+        return begin;
+    }
+
     public void setScheduled() {
         scheduled = System.currentTimeMillis();
     }
 
+    public long getQueueTime() {
+        return scheduled - begin;
+    }
+
     public void response(byte[] body, CharSequence contentType) {
         FullHttpResponse resp =
                 new DefaultFullHttpResponse(HttpVersion.HTTP_1_1, HttpResponseStatus.OK, false);
@@ -79,6 +117,9 @@ public class Job {
             resp.headers().set(HttpHeaderNames.CONTENT_TYPE, contentType);
         }
         resp.content().writeBytes(body);
+        if (trace != null) {
+            resp.headers().set(Trace.SERVER_TIMING, trace.getServerTiming());
+        }
 
         /*
          * We can load the models based on the configuration file.Since this Job is
@@ -87,7 +128,19 @@ public class Job {
          * by external clients.
          */
         if (ctx != null) {
-            NettyUtils.sendHttpResponse(ctx, resp, true);
+            long writeBegin = System.nanoTime();
+            ChannelFuture future = NettyUtils.sendHttpResponse(ctx, resp, true);
+            if (trace != null) {
+                // The write time is only known once the response is flushed, so it is only
+                // part of the trace log
+                future.addListener(
+                        f -> {
+                            trace.add("write", (System.nanoTime() - writeBegin) / 1000000d);
+                            trace.log();
+                        });
+            }
+        } else if (trace != null) {
+            trace.log();
         }
 
         logger.debug(
@@ -104,7 +157,14 @@ public class Job {
          * by external clients.
          */
         if (ctx != null) {
-            NettyUtils.sendError(ctx, status, new InternalServerException(error));
+            if (status.code() == HttpResponseStatus.BAD_REQUEST.code()) {
+                NettyUtils.sendError(ctx, status, new BadRequestException(error));
+            } else {
+                NettyUtils.sendError(ctx, status, new InternalServerException(error));
+            }
+        }
+        if (trace != null) {
+            trace.log();
         }
 
         logger.debug(
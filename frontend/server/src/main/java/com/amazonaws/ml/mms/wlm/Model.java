@@ -13,15 +13,20 @@
 package com.amazonaws.ml.mms.wlm;
 
 import com.amazonaws.ml.mms.archive.ModelArchive;
+import com.amazonaws.ml.mms.metrics.OpenMetrics;
 import com.amazonaws.ml.mms.util.ConfigManager;
+import io.netty.handler.codec.http.HttpResponseStatus;
 import java.io.File;
+import java.util.Collections;
+import java.util.Iterator;
+import java.util.LinkedHashMap;
 import java.util.Map;
-import java.util.Objects;
 import java.util.concurrent.ConcurrentHashMap;
 import java.util.concurrent.ConcurrentMap;
 import java.util.concurrent.LinkedBlockingDeque;
 import java.util.concurrent.TimeUnit;
 import java.util.concurrent.atomic.AtomicInteger;
+import java.util.concurrent.locks.Condition;
 import java.util.concurrent.locks.ReentrantLock;
 import org.slf4j.Logger;
 import org.slf4j.LoggerFactory;
@@ -29,6 +34,9 @@ import org.slf4j.LoggerFactory;
 public class Model {
 
     public static final String DEFAULT_DATA_QUEUE = "DATA_QUEUE";
+    public static final String SESSION_HEADER = "X-MMS-Session-Id";
+    public static final String ENQUEUE_TIME_HEADER = "X-MMS-Enqueue-Time";
+    private static final int MAX_SESSIONS = 100000;
     private static final Logger logger = LoggerFactory.getLogger(Model.class);
 
     private ModelArchive modelArchive;
@@ -38,6 +46,12 @@ public class Model {
     private int maxBatchDelay;
     private ReentrantLock lock;
     private int responseTimeout;
+    private int queueSize;
+    private long sessionTimeout;
+
+    // Signalled when a job is added, idle worker threads wait on it instead of polling the queues
+    private ReentrantLock signalLock;
+    private Condition jobsAvailable;
 
     // Total number of subsequent inference request failures
     private AtomicInteger failedInfReqs;
@@ -45,8 +59,14 @@ public class Model {
     // Per worker thread job queue. This separates out the control queue from data queue
     private ConcurrentMap<String, LinkedBlockingDeque<Job>> jobsDb;
 
-    public Model(ModelArchive modelArchive, int queueSize) {
+    // Worker thread holding the state of each session, in access order. Sessions idle for longer
+    // than the session timeout expire, least recently used sessions are dropped above MAX_SESSIONS.
+    private Map<String, SessionRoute> sessions;
+
+    public Model(ModelArchive modelArchive, int queueSize, int sessionTimeout) {
         this.modelArchive = modelArchive;
+        this.queueSize = queueSize;
+        this.sessionTimeout = TimeUnit.SECONDS.toMillis(sessionTimeout);
         batchSize = 1;
         maxBatchDelay = 100;
         jobsDb = new ConcurrentHashMap<>();
@@ -54,6 +74,19 @@ public class Model {
         jobsDb.putIfAbsent(DEFAULT_DATA_QUEUE, new LinkedBlockingDeque<>(queueSize));
         failedInfReqs = new AtomicInteger(0);
         lock = new ReentrantLock();
+        signalLock = new ReentrantLock();
+        jobsAvailable = signalLock.newCondition();
+        sessions =
+                Collections.synchronizedMap(
+                        new LinkedHashMap<String, SessionRoute>(16, 0.75f, true) {
+                            private static final long serialVersionUID = 1L;
+
+                            @Override
+                            protected boolean removeEldestEntry(
+                                    Map.Entry<String, SessionRoute> eldest) {
+                                return size() > MAX_SESSIONS;
+                            }
+                        });
     }
 
     public String getModelName() {
@@ -104,31 +137,75 @@ public class Model {
         this.maxBatchDelay = maxBatchDelay;
     }
 
-    public void addJob(String threadId, Job job) {
+    public void addJobQueue(String threadId) {
+        jobsDb.putIfAbsent(threadId, new LinkedBlockingDeque<>(queueSize));
+    }
+
+    public boolean addJob(String threadId, Job job) {
+        // The queue of a worker is removed when it is scaled down, jobs for it are not queued
         LinkedBlockingDeque<Job> blockingDeque = jobsDb.get(threadId);
-        if (blockingDeque == null) {
-            blockingDeque = new LinkedBlockingDeque<>();
-            jobsDb.put(threadId, blockingDeque);
+        if (blockingDeque == null || !blockingDeque.offer(job)) {
+            return false;
         }
-        blockingDeque.offer(job);
+        // The job is for one thread only, every waiting thread is woken up to check its queue
+        signalJobs(true);
+        return true;
     }
 
     public void removeJobQueue(String threadId) {
         if (!threadId.equals(DEFAULT_DATA_QUEUE)) {
-            jobsDb.remove(threadId);
+            synchronized (sessions) {
+                sessions.values().removeIf(route -> route.threadId.equals(threadId));
+            }
+            LinkedBlockingDeque<Job> jobsQueue = jobsDb.remove(threadId);
+            if (jobsQueue != null) {
+                // Session requests routed to this worker can be served by any other worker,
+                // control jobs were meant for this worker only.
+                for (Job job : jobsQueue) {
+                    if (job.isControlCmd()) {
+                        job.sendError(
+                                HttpResponseStatus.SERVICE_UNAVAILABLE,
+                                "Worker " + threadId + " was scaled down.");
+                    } else if (!jobsDb.get(DEFAULT_DATA_QUEUE).offer(job)) {
+                        job.sendError(
+                                HttpResponseStatus.SERVICE_UNAVAILABLE, "Job queue is full.");
+                    }
+                }
+                signalJobs(true);
+            }
         }
     }
 
     public boolean addJob(Job job) {
-        return jobsDb.get(DEFAULT_DATA_QUEUE).offer(job);
+        String sessionId = job.getSessionId();
+        if (sessionId != null) {
+            String threadId = getSessionWorker(sessionId);
+            if (threadId != null) {
+                LinkedBlockingDeque<Job> jobsQueue = jobsDb.get(threadId);
+                if (jobsQueue != null) {
+                    // A full worker queue is reported as unavailable like a full data queue
+                    if (!jobsQueue.offer(job)) {
+                        return false;
+                    }
+                    signalJobs(true);
+                    return true;
+                }
+                sessions.remove(sessionId);
+            }
+        }
+        if (!jobsDb.get(DEFAULT_DATA_QUEUE).offer(job)) {
+            return false;
+        }
+        signalJobs(false);
+        return true;
     }
 
     public void addFirst(Job job) {
         jobsDb.get(DEFAULT_DATA_QUEUE).addFirst(job);
+        signalJobs(false);
     }
 
-    public void pollBatch(String threadId, long waitTime, Map<String, Job> jobsRepo)
-            throws InterruptedException {
+    public void pollBatch(String threadId, Map<String, Job> jobsRepo) throws InterruptedException {
         if (jobsRepo == null || threadId == null || threadId.isEmpty()) {
             throw new IllegalArgumentException("Invalid input given provided");
         }
@@ -138,41 +215,130 @@ public class Model {
                     "The jobs repo provided contains stale jobs. Clear them!!");
         }
 
-        LinkedBlockingDeque<Job> jobsQueue = jobsDb.get(threadId);
-        if (jobsQueue != null && !jobsQueue.isEmpty()) {
-            Job j = jobsQueue.poll(waitTime, TimeUnit.MILLISECONDS);
-            if (j != null) {
-                jobsRepo.put(j.getJobId(), j);
-                return;
+        LinkedBlockingDeque<Job> dataQueue = jobsDb.get(DEFAULT_DATA_QUEUE);
+        while (true) {
+            // Control jobs and session requests routed to this worker come first
+            LinkedBlockingDeque<Job> jobsQueue = jobsDb.get(threadId);
+            if (jobsQueue != null) {
+                Job j = jobsQueue.poll();
+                if (j != null) {
+                    jobsRepo.put(j.getJobId(), j);
+                    if (!dataQueue.isEmpty()) {
+                        // This thread may have been woken up for a data job, pass it on
+                        signalJobs(false);
+                    }
+                    return;
+                }
             }
-        }
 
-        try {
-            lock.lockInterruptibly();
-            long maxDelay = maxBatchDelay;
-            jobsQueue = jobsDb.get(DEFAULT_DATA_QUEUE);
-
-            Job j = jobsQueue.poll(Long.MAX_VALUE, TimeUnit.MILLISECONDS);
-            logger.trace("get first job: {}", Objects.requireNonNull(j).getJobId());
-
-            jobsRepo.put(j.getJobId(), j);
-            long begin = System.currentTimeMillis();
-            for (int i = 0; i < batchSize - 1; ++i) {
-                j = jobsQueue.poll(maxDelay, TimeUnit.MILLISECONDS);
-                if (j == null) {
-                    break;
+            // A single thread at a time fills a batch from the data queue
+            if (lock.tryLock()) {
+                try {
+                    Job j = dataQueue.poll();
+                    if (j != null) {
+                        pollJobs(threadId, j, jobsRepo);
+                        return;
+                    }
+                } finally {
+                    lock.unlock();
+                    if (!dataQueue.isEmpty()) {
+                        // Jobs left over by this batch are taken by another waiting thread
+                        signalJobs(false);
+                    }
                 }
-                long end = System.currentTimeMillis();
-                maxDelay -= end - begin;
-                begin = end;
-                jobsRepo.put(j.getJobId(), j);
-                if (maxDelay <= 0) {
-                    break;
+            }
+
+            signalLock.lockInterruptibly();
+            try {
+                // Checked under the signal lock, a job added after the checks above signals only
+                // once this thread waits.
+                jobsQueue = jobsDb.get(threadId);
+                if ((jobsQueue == null || jobsQueue.isEmpty())
+                        && (dataQueue.isEmpty() || lock.isLocked())) {
+                    jobsAvailable.await();
                 }
+            } finally {
+                signalLock.unlock();
+            }
+        }
+    }
+
+    private void signalJobs(boolean all) {
+        signalLock.lock();
+        try {
+            if (all) {
+                jobsAvailable.signalAll();
+            } else {
+                jobsAvailable.signal();
             }
-            logger.trace("sending jobs, size: {}", jobsRepo.size());
         } finally {
-            lock.unlock();
+            signalLock.unlock();
+        }
+    }
+
+    private void pollJobs(String threadId, Job first, Map<String, Job> jobsRepo)
+            throws InterruptedException {
+        long maxDelay = maxBatchDelay;
+        LinkedBlockingDeque<Job> jobsQueue = jobsDb.get(DEFAULT_DATA_QUEUE);
+
+        Job j = first;
+        logger.trace("get first job: {}", j.getJobId());
+
+        addToBatch(threadId, j, jobsRepo);
+        long begin = System.currentTimeMillis();
+        long fillBegin = begin;
+        for (int i = 0; i < batchSize - 1; ++i) {
+            j = jobsQueue.poll(maxDelay, TimeUnit.MILLISECONDS);
+            if (j == null) {
+                break;
+            }
+            long end = System.currentTimeMillis();
+            maxDelay -= end - begin;
+            begin = end;
+            addToBatch(threadId, j, jobsRepo);
+            if (maxDelay <= 0) {
+                break;
+            }
+        }
+        if (batchSize > 1) {
+            OpenMetrics.getInstance()
+                    .getModelMetrics(getModelName())
+                    .observeBatchFillTime(System.currentTimeMillis() - fillBegin);
+        }
+        logger.trace("sending jobs, size: {}", jobsRepo.size());
+    }
+
+    private void addToBatch(String threadId, Job job, Map<String, Job> jobsRepo) {
+        String sessionId = job.getSessionId();
+        if (sessionId != null) {
+            // Later requests of this session are routed to this worker
+            long now = System.currentTimeMillis();
+            synchronized (sessions) {
+                expireSessions(now);
+                sessions.put(sessionId, new SessionRoute(threadId, now));
+            }
+        }
+        jobsRepo.put(job.getJobId(), job);
+    }
+
+    private String getSessionWorker(String sessionId) {
+        long now = System.currentTimeMillis();
+        synchronized (sessions) {
+            expireSessions(now);
+            SessionRoute route = sessions.get(sessionId);
+            if (route == null) {
+                return null;
+            }
+            route.lastAccess = now;
+            return route.threadId;
+        }
+    }
+
+    private void expireSessions(long now) {
+        // Sessions are in access order, the idle ones are at the head
+        Iterator<SessionRoute> it = sessions.values().iterator();
+        while (it.hasNext() && now - it.next().lastAccess > sessionTimeout) {
+            it.remove();
         }
     }
 
@@ -191,4 +357,15 @@ public class Model {
     public void setResponseTimeout(int responseTimeout) {
         this.responseTimeout = responseTimeout;
     }
+
+    private static final class SessionRoute {
+
+        String threadId;
+        long lastAccess;
+
+        SessionRoute(String threadId, long lastAccess) {
+            this.threadId = threadId;
+            this.lastAccess = lastAccess;
+        }
+    }
 }
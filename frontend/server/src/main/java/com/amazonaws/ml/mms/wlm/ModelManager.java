@@ -18,6 +18,7 @@ import com.amazonaws.ml.mms.archive.ModelException;
 import com.amazonaws.ml.mms.archive.ModelNotFoundException;
 import com.amazonaws.ml.mms.http.BadRequestException;
 import com.amazonaws.ml.mms.http.StatusResponse;
+import com.amazonaws.ml.mms.metrics.OpenMetrics;
 import com.amazonaws.ml.mms.util.ConfigManager;
 import com.amazonaws.ml.mms.util.NettyUtils;
 import io.netty.channel.ChannelHandlerContext;
@@ -96,7 +97,11 @@ public final class ModelManager {
 
         archive.validate();
 
-        Model model = new Model(archive, configManager.getJobQueueSize());
+        Model model =
+                new Model(
+                        archive,
+                        configManager.getJobQueueSize(),
+                        configManager.getSessionTimeout());
         model.setBatchSize(batchSize);
         model.setMaxBatchDelay(maxBatchDelay);
         model.setResponseTimeout(responseTimeout);
@@ -122,6 +127,7 @@ public final class ModelManager {
         wlm.modelChanged(model);
         model.getModelArchive().clean();
         startupModels.remove(modelName);
+        OpenMetrics.getInstance().removeModel(modelName);
         logger.info("Model {} unregistered.", modelName);
         return true;
     }
@@ -0,0 +1,93 @@
+/*
+ * Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+ * with the License. A copy of the License is located at
+ *
+ * http://aws.amazon.com/apache2.0/
+ *
+ * or in the "license" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+ * OR CONDITIONS OF ANY KIND, either express or implied. See the License for the specific language governing permissions
+ * and limitations under the License.
+ */
+package com.amazonaws.ml.mms.wlm;
+
+import com.amazonaws.ml.mms.util.messages.InputParameter;
+import com.amazonaws.ml.mms.util.messages.RequestInput;
+import com.amazonaws.ml.mms.util.messages.WorkerCommands;
+import io.netty.channel.ChannelHandlerContext;
+import io.netty.handler.codec.http.HttpResponseStatus;
+import java.util.UUID;
+import java.util.concurrent.TimeUnit;
+
+/**
+ * A profile of a worker, run by two control jobs. The start job begins profiling, once it has
+ * succeeded the collect job is queued after the duration and replies with the profile. A start that
+ * fails, e.g. because the worker is already profiled, replies with its error right away.
+ */
+public class ProfileJob extends Job {
+
+    private Model model;
+    private String workerId;
+    private int seconds;
+
+    /**
+     * Creates the start job of a profile.
+     *
+     * @param ctx context of the client request
+     * @param model model of the worker
+     * @param workerId worker to profile
+     * @param cmd PROFILE or MEMORY_PROFILE
+     * @param seconds duration of the profile
+     */
+    public ProfileJob(
+            ChannelHandlerContext ctx,
+            Model model,
+            String workerId,
+            WorkerCommands cmd,
+            int seconds) {
+        this(ctx, model, workerId, cmd, seconds, UUID.randomUUID().toString());
+    }
+
+    private ProfileJob(
+            ChannelHandlerContext ctx,
+            Model model,
+            String workerId,
+            WorkerCommands cmd,
+            int seconds,
+            String profileId) {
+        super(ctx, model.getModelName(), cmd, profileInput(profileId, seconds));
+        this.model = model;
+        this.workerId = workerId;
+        this.seconds = seconds;
+    }
+
+    private static RequestInput profileInput(String profileId, int seconds) {
+        // The collect job has the request id of its start job, the worker only returns the
+        // profile it started for that id.
+        RequestInput input = new RequestInput(profileId);
+        input.addParameter(new InputParameter("duration", String.valueOf(seconds * 1000)));
+        return input;
+    }
+
+    @Override
+    public void response(byte[] body, CharSequence contentType) {
+        if (seconds == 0) {
+            super.response(body, contentType);
+            return;
+        }
+
+        ProfileJob collect = new ProfileJob(getCtx(), model, workerId, getCmd(), 0, getJobId());
+        getCtx().executor()
+                .schedule(
+                        () -> {
+                            if (!model.addJob(workerId, collect)) {
+                                collect.sendError(
+                                        HttpResponseStatus.SERVICE_UNAVAILABLE,
+                                        "Worker is not available: " + workerId);
+                            }
+                        },
+                        seconds,
+                        TimeUnit.SECONDS);
+    }
+}
@@ -16,6 +16,7 @@ import com.amazonaws.ml.mms.archive.Manifest;
 import com.amazonaws.ml.mms.metrics.Metric;
 import com.amazonaws.ml.mms.util.ConfigManager;
 import com.amazonaws.ml.mms.util.Connector;
+import com.amazonaws.ml.mms.util.JsonUtils;
 import java.io.File;
 import java.io.IOException;
 import java.io.InputStream;
@@ -66,6 +67,12 @@ public class WorkerLifeCycle {
 
         environment.put("PYTHONPATH", pythonPath.toString());
 
+        // Runtime profile of the manifest, updated on registration, applied by the worker
+        Manifest.Engine engine = model.getModelArchive().getManifest().getEngine();
+        if (engine != null && engine.getRuntimeProfile() != null) {
+            environment.put("MMS_RUNTIME_PROFILE", JsonUtils.GSON.toJson(engine.getRuntimeProfile()));
+        }
+
         for (Map.Entry<String, String> entry : environment.entrySet()) {
             if (!blackList.matcher(entry.getKey()).matches()) {
                 envList.add(entry.getKey() + '=' + entry.getValue());
@@ -14,6 +14,8 @@ package com.amazonaws.ml.mms.wlm;
 
 import com.amazonaws.ml.mms.metrics.Dimension;
 import com.amazonaws.ml.mms.metrics.Metric;
+import com.amazonaws.ml.mms.metrics.ModelMetrics;
+import com.amazonaws.ml.mms.metrics.OpenMetrics;
 import com.amazonaws.ml.mms.util.ConfigManager;
 import com.amazonaws.ml.mms.util.Connector;
 import com.amazonaws.ml.mms.util.codec.ModelRequestEncoder;
@@ -48,6 +50,8 @@ public class WorkerThread implements Runnable {
     static final Logger logger = LoggerFactory.getLogger(WorkerThread.class);
     private static final org.apache.log4j.Logger loggerMmsMetrics =
             org.apache.log4j.Logger.getLogger(ConfigManager.MMS_METRICS_LOGGER);
+    private static final org.apache.log4j.Logger loggerModelMetrics =
+            org.apache.log4j.Logger.getLogger(ConfigManager.MODEL_METRICS_LOGGER);
 
     private Metric workerLoadTime;
 
@@ -73,6 +77,9 @@ public class WorkerThread implements Runnable {
     ArrayBlockingQueue<ModelWorkerResponse> replies;
     private int gpuId;
     private long memory;
+    private long memoryUss;
+    private long memoryPss;
+    private double cpuUtilization;
     private long startTime;
     private AtomicReference<Thread> currentThread = new AtomicReference<>();
     private String workerId;
@@ -80,6 +87,7 @@ public class WorkerThread implements Runnable {
     private WorkerState state;
 
     private WorkerLifeCycle lifeCycle;
+    private ModelMetrics modelMetrics;
 
     public WorkerState getState() {
         return state;
@@ -103,6 +111,7 @@ public class WorkerThread implements Runnable {
         this.listener = listener;
         startTime = System.currentTimeMillis();
         lifeCycle = new WorkerLifeCycle(configManager, model);
+        modelMetrics = OpenMetrics.getInstance().getModelMetrics(model.getModelName());
         replies = new ArrayBlockingQueue<>(1);
         workerLoadTime =
                 new Metric(
@@ -124,18 +133,24 @@ public class WorkerThread implements Runnable {
             connect();
 
             while (isRunning()) {
-                req = aggregator.getRequest(workerId, state);
+                req = aggregator.getRequest(workerId);
 
+                long encodeBegin = System.nanoTime();
                 backendChannel.writeAndFlush(req).sync();
 
                 long begin = System.currentTimeMillis();
+                double encodeTime = (System.nanoTime() - encodeBegin) / 1000000d;
                 ModelWorkerResponse reply = replies.poll(responseTimeout, TimeUnit.SECONDS);
 
                 long duration = System.currentTimeMillis() - begin;
                 logger.info("Backend response time: {}", duration);
 
                 if (reply != null) {
+                    aggregator.traceBatch(encodeTime, duration);
                     aggregator.sendResponse(reply);
+                    for (Metric metric : reply.getMetrics()) {
+                        loggerModelMetrics.info(metric);
+                    }
                 } else {
                     int val = model.incrFailedInfReqs();
                     logger.error("Number or consecutive unsuccessful inference {}", val);
@@ -145,6 +160,7 @@ public class WorkerThread implements Runnable {
                 switch (req.getCommand()) {
                     case PREDICT:
                         model.resetFailedInfReqs();
+                        modelMetrics.observePredictionTime(duration);
                         break;
                     case LOAD:
                         if (reply.getCode() == 200) {
@@ -199,6 +215,34 @@ public class WorkerThread implements Runnable {
         this.memory = memory;
     }
 
+    public long getMemoryUss() {
+        return memoryUss;
+    }
+
+    public void setMemoryUss(long memoryUss) {
+        this.memoryUss = memoryUss;
+    }
+
+    public long getMemoryPss() {
+        return memoryPss;
+    }
+
+    public void setMemoryPss(long memoryPss) {
+        this.memoryPss = memoryPss;
+    }
+
+    public double getCpuUtilization() {
+        return cpuUtilization;
+    }
+
+    public void setCpuUtilization(double cpuUtilization) {
+        this.cpuUtilization = cpuUtilization;
+    }
+
+    public String getModelName() {
+        return model.getModelName();
+    }
+
     private void connect() throws WorkerInitializationException, InterruptedException {
         if (!configManager.isDebug()) {
             lifeCycle.startWorker(port);
@@ -263,6 +307,7 @@ public class WorkerThread implements Runnable {
                                                         modelName,
                                                         WorkerCommands.LOAD,
                                                         input);
+                                        model.addJobQueue(workerId);
                                         model.addJob(workerId, job);
                                         latch.countDown();
                                     });
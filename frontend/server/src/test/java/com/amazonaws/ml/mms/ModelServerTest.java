@@ -19,6 +19,8 @@ import com.amazonaws.ml.mms.http.StatusResponse;
 import com.amazonaws.ml.mms.metrics.Dimension;
 import com.amazonaws.ml.mms.metrics.Metric;
 import com.amazonaws.ml.mms.metrics.MetricManager;
+import com.amazonaws.ml.mms.metrics.OpenMetrics;
+import com.amazonaws.ml.mms.metrics.Trace;
 import com.amazonaws.ml.mms.util.ConfigManager;
 import com.amazonaws.ml.mms.util.Connector;
 import com.amazonaws.ml.mms.util.JsonUtils;
@@ -161,12 +163,15 @@ public class ModelServerTest {
         testPredictions(channel);
         testPredictionsBinary(channel);
         testPredictionsJson(channel);
+        testPredictionsTrace(channel);
         testInvocationsJson(channel);
         testInvocationsMultipart(channel);
         testLegacyPredict(channel);
         testPredictionsInvalidRequestSize(channel);
         testPredictionsValidRequestSize(channel);
         testMetricManager();
+        testOpenMetrics(managementChannel);
+        testProfileWorkerScaledDown(managementChannel);
 
         channel.close();
         managementChannel.close();
@@ -373,6 +378,26 @@ public class ModelServerTest {
         Assert.assertEquals(result, "OK");
     }
 
+    private void testPredictionsTrace(Channel channel) throws InterruptedException {
+        result = null;
+        latch = new CountDownLatch(1);
+        DefaultFullHttpRequest req =
+                new DefaultFullHttpRequest(
+                        HttpVersion.HTTP_1_1, HttpMethod.POST, "/predictions/noop");
+        req.content().writeCharSequence("{\"data\": \"test\"}", CharsetUtil.UTF_8);
+        HttpUtil.setContentLength(req, req.content().readableBytes());
+        req.headers().set(HttpHeaderNames.CONTENT_TYPE, HttpHeaderValues.APPLICATION_JSON);
+        req.headers().set("x-mms-trace", "true");
+        channel.writeAndFlush(req);
+
+        latch.await();
+        Assert.assertEquals(result, "OK");
+        String timing = headers.get(Trace.SERVER_TIMING);
+        Assert.assertNotNull(timing);
+        Assert.assertTrue(timing.startsWith("queue;dur="));
+        Assert.assertTrue(timing.contains("handler;dur="));
+    }
+
     private void testPredictionsBinary(Channel channel) throws InterruptedException {
         result = null;
         latch = new CountDownLatch(1);
@@ -875,6 +900,59 @@ public class ModelServerTest {
         }
     }
 
+    private void testOpenMetrics(Channel channel) throws InterruptedException {
+        result = null;
+        latch = new CountDownLatch(1);
+        HttpRequest req =
+                new DefaultFullHttpRequest(HttpVersion.HTTP_1_1, HttpMethod.GET, "/metrics");
+        req.headers().set(HttpHeaderNames.ACCEPT, "application/openmetrics-text");
+        channel.writeAndFlush(req);
+        latch.await();
+
+        Assert.assertEquals(httpStatus, HttpResponseStatus.OK);
+        Assert.assertEquals(
+                headers.get(HttpHeaderNames.CONTENT_TYPE), OpenMetrics.CONTENT_TYPE);
+        Assert.assertTrue(
+                result.contains(
+                        "mms_prediction_time_seconds_bucket{model_name=\"noop\",le=\"+Inf\"}"));
+        Assert.assertTrue(result.contains("# TYPE mms_queue_time_seconds histogram"));
+        Assert.assertTrue(result.contains("# TYPE mms_batch_fill_ratio histogram"));
+        Assert.assertTrue(result.contains("mms_worker_memory_rss_bytes{model_name=\"noop\""));
+        Assert.assertTrue(result.contains("mms_cpu_utilization_percent{level=\"Host\"}"));
+        Assert.assertTrue(result.endsWith("# EOF\n"));
+    }
+
+    private void testProfileWorkerScaledDown(Channel channel) throws InterruptedException {
+        Channel profileChannel = connect(true);
+        Assert.assertNotNull(profileChannel, "Failed to connect to management port.");
+
+        // The worker is scaled down after the profile started, before it is collected. The
+        // scale down responds first, the profile last.
+        result = null;
+        latch = new CountDownLatch(2);
+        HttpRequest req =
+                new DefaultFullHttpRequest(
+                        HttpVersion.HTTP_1_1,
+                        HttpMethod.POST,
+                        "/models/noop_v0.1/profile?seconds=3");
+        profileChannel.writeAndFlush(req);
+        Thread.sleep(1000);
+        req =
+                new DefaultFullHttpRequest(
+                        HttpVersion.HTTP_1_1,
+                        HttpMethod.PUT,
+                        "/models/noop_v0.1?synchronous=true&min_worker=0&max_worker=0");
+        channel.writeAndFlush(req);
+        latch.await();
+
+        ErrorResponse resp = JsonUtils.GSON.fromJson(result, ErrorResponse.class);
+        Assert.assertEquals(httpStatus, HttpResponseStatus.SERVICE_UNAVAILABLE);
+        Assert.assertTrue(resp.getMessage().startsWith("Worker is not available"));
+        profileChannel.close();
+
+        testSyncScaleModel(channel);
+    }
+
     private Channel connect(boolean management) {
         Logger logger = LoggerFactory.getLogger(ModelServerTest.class);
 
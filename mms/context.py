@@ -11,6 +11,10 @@
 """
 Context object of incoming request
 """
+import time
+from contextlib import contextmanager
+
+from mms.utils.session_store import SESSION_HEADER, SessionStore
 
 
 class Context(object):
@@ -30,8 +34,12 @@ class Context(object):
             "server_version": mms_version
         }
         self.request_ids = None
+        # Requests of the current batch rejected before prediction, (code, message) by request id
+        self.request_errors = None
         self.request_processor = RequestProcessor(dict())
         self._metrics = None
+        self._trace = None
+        self._session_store = None
 
     @property
     def system_properties(self):
@@ -53,6 +61,51 @@ class Context(object):
     def metrics(self, metrics):
         self._metrics = metrics
 
+    @property
+    def trace(self):
+        """
+        Trace of the traced requests of the current batch, None when no request is traced.
+        """
+        return self._trace
+
+    @trace.setter
+    def trace(self, trace):
+        self._trace = trace
+
+    @contextmanager
+    def timer(self, name, idx=None):
+        """
+        Time a stage of the handler for the traced requests of the batch, e.g.
+
+            with context.timer("preprocess"):
+                data = self.preprocess(batch)
+
+        :param name: stage name
+        :param idx: index of the request in the batch, None for a stage of the whole batch
+        """
+        trace = self._trace
+        if trace is None:
+            yield
+            return
+        start = time.time()
+        try:
+            yield
+        finally:
+            trace.add(name, (time.time() - start) * 1000, idx)
+
+    @property
+    def session_store(self):
+        """
+        Worker local LRU store of session states, created on first use.
+        """
+        if self._session_store is None:
+            self._session_store = SessionStore()
+        return self._session_store
+
+    @session_store.setter
+    def session_store(self, session_store):
+        self._session_store = session_store
+
     def set_response_content_type(self, request_id, value):
         self._request_processor.add_response_property(request_id, {'content-type': value})
 
@@ -62,6 +115,48 @@ class Context(object):
             return response_headers.get('content-type')
         return None
 
+    def get_request_header(self, request_id, key):
+        """
+        Look up a request header, header names are matched case-insensitively.
+        """
+        request_headers = self._request_processor.get_request_property(request_id)
+        if request_headers is None:
+            return None
+        value = request_headers.get(key)
+        if value is None:
+            key = key.lower()
+            for name in request_headers:
+                if name.lower() == key:
+                    return request_headers[name]
+        return value
+
+    def get_session_id(self, request_id):
+        """
+        Session of a request, taken from the X-MMS-Session-Id header.
+        """
+        return self.get_request_header(request_id, SESSION_HEADER)
+
+    def get_session_state(self, request_id, default=None):
+        """
+        State stored by an earlier request of the same session, default when the request
+        has no session or the session state was evicted.
+        """
+        session_id = self.get_session_id(request_id)
+        if session_id is None:
+            return default
+        return self.session_store.get(session_id, default)
+
+    def set_session_state(self, request_id, state):
+        """
+        Store state for later requests of the same session.
+
+        :return: False if the request has no session or the state does not fit in the store
+        """
+        session_id = self.get_session_id(request_id)
+        if session_id is None:
+            return False
+        return self.session_store.put(session_id, state)
+
     def __eq__(self, other):
         return isinstance(other, Context) and self.__dict__ == other.__dict__
 
@@ -11,16 +11,70 @@
 """
 Single start point for system metrics and process metrics script
 
+The collector is a long lived process started by the frontend. Every line written to its stdin
+requests a sample, either a JSON object of worker pid to model name or the comma separated pids of
+the workers. A sample is written to stdout as the system metric lines followed by the resource usage
+of the workers summed per model, an empty line, one
+"pid:rss:uss:pss:swap:threads:fds:ctx_switches:cpu" line per worker and an empty line. psutil and
+the worker process handles stay loaded between samples, CPU utilization and context switches are
+measured over the interval since the previous sample. The collector exits when stdin is closed.
 """
+import json
 import logging
 import sys
+import time
+from builtins import str
+
+import psutil
 
 from mms.metrics import system_metrics
-from mms.metrics.process_memory_metric import check_process_mem_usage
+from mms.metrics.process_memory_metric import ProcessMetrics, model_metrics
 
-if __name__ == '__main__':
-    logging.basicConfig(stream=sys.stdout, format="%(message)s", level=logging.INFO)
+# Shortest interval CPU utilization is measured over, only waited for by the first sample
+MIN_CPU_INTERVAL = 0.1
+
+
+class MetricCollector(object):
+    """
+    Collects samples of system metrics and worker memory usage.
+    """
+
+    def __init__(self):
+        self._processes = ProcessMetrics()
+        # The first call of cpu_percent only records the baseline of the next one
+        psutil.cpu_percent()
+        self._last_sample = time.time()
+
+    def collect(self, workers):
+        """
+        :param workers: dict of worker pid to model name, or list of worker pid strings
+        :return: sample as text
+        """
+        elapsed = time.time() - self._last_sample
+        if elapsed < MIN_CPU_INTERVAL:
+            time.sleep(MIN_CPU_INTERVAL - elapsed)
+        self._last_sample = time.time()
 
-    system_metrics.collect_all(sys.modules['mms.metrics.system_metrics'])
+        models = dict((int(pid), model_name) for pid, model_name in workers.items()) \
+            if isinstance(workers, dict) else dict()
+        samples = self._processes.collect(list(models) if isinstance(workers, dict) else workers)
+
+        metrics = system_metrics.collect() + model_metrics(samples, models)
+        lines = [str(metric) for metric in metrics]
+        lines.append("")
+        lines += [":".join(str(value) for value in stats) for stats in samples]
+        lines.append("")
+        return "\n".join(lines) + "\n"
+
+    def run(self, stdin, stdout):
+        for line in iter(stdin.readline, ''):
+            line = line.strip()
+            workers = json.loads(line) if line.startswith("{") else line.split(",")
+            stdout.write(self.collect(workers))
+            stdout.flush()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr, format="%(message)s", level=logging.INFO)
 
-    check_process_mem_usage(sys.stdin)
+    MetricCollector().run(sys.stdin, sys.stdout)
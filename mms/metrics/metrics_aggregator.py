@@ -0,0 +1,187 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Worker level aggregation of model metrics.
+
+Metrics added through MetricsStore are aggregated per model, metric name, unit and dimensions:
+counters are summed, other metrics are recorded in log-linear histograms. Every flush interval the
+aggregates are emitted as summaries, one metric for each of count, sum, p50, p90 and p99 with the
+statistic as "Stat" dimension, instead of one metric per request and batch.
+"""
+import atexit
+import logging
+import math
+import os
+import threading
+import time
+
+from mms.metrics.dimension import Dimension
+from mms.metrics.metric import Metric
+
+METRICS_INTERVAL_ENV = "MMS_METRICS_INTERVAL"
+METRICS_SAMPLE_RATE_ENV = "MMS_METRICS_SAMPLE_RATE"
+DEFAULT_INTERVAL = 60
+# 16 buckets for each power of 2, values are reported with a relative error below 2.2%
+BUCKET_GROWTH = 2 ** (1.0 / 16)
+QUANTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+
+logger = logging.getLogger(__name__)
+
+
+def bucket_index(value):
+    if value <= 0:
+        return None
+    return int(math.floor(math.log(value, BUCKET_GROWTH)))
+
+
+class Histogram(object):
+    """
+    Histogram of log-linear buckets, sparse so that it covers any range of values.
+    """
+    __slots__ = ("count", "sum", "max", "zeros", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0
+        self.max = None
+        self.zeros = 0
+        self.buckets = dict()
+
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        if self.max is None or value > self.max:
+            self.max = value
+        idx = bucket_index(value)
+        if idx is None:
+            self.zeros += 1
+        else:
+            self.buckets[idx] = self.buckets.get(idx, 0) + 1
+
+    def quantile(self, q):
+        """
+        Value at quantile q, midpoint of the bucket holding it.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = self.zeros
+        if seen >= rank:
+            return 0
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if seen >= rank:
+                return min(BUCKET_GROWTH ** (idx + 0.5), self.max)
+        return self.max
+
+
+class Counter(object):
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def add(self, value):
+        self.value += value
+
+
+class MetricsAggregator(object):
+    """
+    Aggregates metrics of the model of a worker and flushes summaries on an interval, from a
+    background thread so that summaries are also emitted while the worker is idle.
+    """
+
+    def __init__(self, model_name, interval=None, emit=None):
+        """
+        :param model_name: model of the worker
+        :param interval: flush interval in seconds, MMS_METRICS_INTERVAL or 60 by default
+        :param emit: function called with the list of summary Metric objects of every flush
+        """
+        if interval is None:
+            interval = float(os.environ.get(METRICS_INTERVAL_ENV, DEFAULT_INTERVAL))
+        self.model_name = model_name
+        self.interval = interval
+        self._emit = emit
+        self._entries = dict()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def record(self, name, value, unit, counter=False, dimensions=None):
+        """
+        Add a value to the aggregate of a metric.
+
+        :param name: metric name
+        :param value: numeric value
+        :param unit: unit of the metric, as passed to MetricsStore
+        :param counter: sum values instead of recording them in a histogram
+        :param dimensions: list of Dimension, request specific dimensions must not be included
+        """
+        key = (name, unit, tuple((d.name, d.value) for d in dimensions) if dimensions else ())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = Counter() if counter else Histogram()
+                self._entries[key] = entry
+            entry.add(value)
+        if self._thread is None and self.interval > 0:
+            self.start()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="metrics-aggregator")
+            self._thread.daemon = True
+            self._thread.start()
+        # Summaries of the last interval are emitted when the worker exits
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            # noinspection PyBroadException
+            try:
+                self.flush()
+            except Exception:  # pylint: disable=broad-except
+                logger.warning("Failed to flush metrics.", exc_info=True)
+
+    def summaries(self):
+        """
+        Take the aggregates of the current interval and reset them.
+
+        :return: list of summary Metric objects
+        """
+        with self._lock:
+            entries = self._entries
+            self._entries = dict()
+
+        metrics = []
+        for (name, unit, dims), entry in entries.items():
+            dimensions = [Dimension("ModelName", self.model_name), Dimension("Level", "Model")]
+            dimensions += [Dimension(dim_name, dim_value) for dim_name, dim_value in dims]
+            if isinstance(entry, Counter):
+                metrics.append(Metric(name, entry.value, unit, dimensions, metric_method="counter"))
+                continue
+            metrics.append(Metric(name, entry.count, "count", dimensions + [Dimension("Stat", "count")]))
+            metrics.append(Metric(name, round(entry.sum, 3), unit, dimensions + [Dimension("Stat", "sum")]))
+            for stat, q in QUANTILES:
+                value = round(entry.quantile(q), 3)
+                metrics.append(Metric(name, value, unit, dimensions + [Dimension("Stat", stat)]))
+        return metrics
+
+    def flush(self):
+        metrics = self.summaries()
+        if metrics:
+            if self._emit is not None:
+                self._emit(metrics)
+            else:
+                for metric in metrics:
+                    logger.info("[METRICS]%s", str(metric))
@@ -0,0 +1,89 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Structured metrics channel from the worker to the frontend.
+
+Metrics are queued without blocking and sent to the frontend in the metrics section of the next
+OTF response frame, as structured data instead of formatted log lines. Metrics queued while the
+worker is idle, e.g. interval summaries of the aggregator, are written to stdout as [METRICS]
+lines by a background flusher once no response frame has picked them up for max_age seconds.
+"""
+import logging
+import threading
+import time
+from builtins import str
+from collections import deque
+
+MAX_PENDING = 10000
+DEFAULT_MAX_AGE = 5
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsChannel(object):
+    """
+    Bounded queue of metrics, the oldest metrics are dropped when it is full.
+    """
+
+    def __init__(self, max_pending=MAX_PENDING, max_age=DEFAULT_MAX_AGE):
+        self.max_age = max_age
+        self.dropped = 0
+        self._pending = deque(maxlen=max_pending)
+        self._last_drain = time.time()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, metrics):
+        """
+        Queue metrics, never blocks.
+
+        :param metrics: iterable of Metric
+        """
+        timestamp = int(time.time())
+        for metric in metrics:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append((timestamp, metric))
+        if self._thread is None and self.max_age > 0:
+            self._start()
+
+    def drain(self):
+        """
+        Take all queued metrics.
+
+        :return: list of (timestamp, Metric)
+        """
+        self._last_drain = time.time()
+        items = []
+        try:
+            while True:
+                items.append(self._pending.popleft())
+        except IndexError:
+            pass
+        return items
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="metrics-channel")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.max_age)
+            if self._pending and time.time() - self._last_drain >= self.max_age:
+                for _, metric in self.drain():
+                    logger.info("[METRICS]%s", str(metric))
+
+
+metrics_channel = MetricsChannel()
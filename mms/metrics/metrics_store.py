@@ -11,6 +11,7 @@
 """
 Metrics collection module
 """
+import numbers
 from builtins import str
 
 from mms.metrics.dimension import Dimension
@@ -20,9 +21,13 @@ from mms.metrics.metric import Metric
 class MetricsStore(object):
     """
     Class for creating, modifying different metrics. And keep them in a dictionary
+
+    With an aggregator, numeric metrics are also recorded in the worker level aggregates of the
+    model, and metrics of each request are only kept in the store when sample is True. Error
+    metrics are always kept. With a StatsD emitter, numeric metrics are also sent to a StatsD agent.
     """
 
-    def __init__(self, request_ids, model_name):
+    def __init__(self, request_ids, model_name, aggregator=None, sample=True, emitter=None):
         """
         Initialize metrics map,model name and request map
         """
@@ -30,6 +35,9 @@ class MetricsStore(object):
         self.request_ids = request_ids
         self.model_name = model_name
         self.cache = {}
+        self.aggregator = aggregator
+        self.sample = sample
+        self.emitter = emitter
 
     def _add_or_update(self, name, value, req_id, unit, metrics_method=None, dimensions=None):
         """
@@ -50,11 +58,19 @@ class MetricsStore(object):
         metrics_method: str, optional
             indicates type of metric operation if it is defined
         """
-        # IF req_id is none error Metric
-        if dimensions is None:
-            dimensions = list()
-        elif not isinstance(dimensions, list):
+        if dimensions is not None and not isinstance(dimensions, list):
             raise ValueError("Please provide a list of dimensions")
+        if req_id is not None and isinstance(value, numbers.Number):
+            if self.emitter is not None:
+                self.emitter.record(name, value, unit, metrics_method == 'counter', dimensions)
+            if self.aggregator is not None:
+                self.aggregator.record(name, value, unit, metrics_method == 'counter', dimensions)
+                if not self.sample:
+                    return
+
+        # IF req_id is none error Metric
+        # Dimensions of the caller are copied, they may be shared by several metrics
+        dimensions = list(dimensions) if dimensions is not None else list()
         if req_id is None:
             dimensions.append(Dimension("Level", "Error"))
         else:
@@ -128,7 +144,7 @@ class MetricsStore(object):
         if unit not in ['ms', 's']:
             raise ValueError("the unit for a timed metric should be one of ['ms', 's']")
         req_id = self._get_req(idx)
-        self._add_or_update(name, value, req_id, unit, dimensions)
+        self._add_or_update(name, value, req_id, unit, dimensions=dimensions)
 
     def add_size(self, name, value, idx=None, unit='MB', dimensions=None):
         """
@@ -150,7 +166,7 @@ class MetricsStore(object):
         if unit not in ['MB', 'kB', 'GB', 'B']:
             raise ValueError("The unit for size based metric is one of ['MB','kB', 'GB', 'B']")
         req_id = self._get_req(idx)
-        self._add_or_update(name, value, req_id, unit, dimensions)
+        self._add_or_update(name, value, req_id, unit, dimensions=dimensions)
 
     def add_percent(self, name, value, idx=None, dimensions=None):
         """
@@ -169,7 +185,7 @@ class MetricsStore(object):
         """
         unit = 'percent'
         req_id = self._get_req(idx)
-        self._add_or_update(name, value, req_id, unit, dimensions)
+        self._add_or_update(name, value, req_id, unit, dimensions=dimensions)
 
     def add_error(self, name, value, dimensions=None):
         """
@@ -186,7 +202,7 @@ class MetricsStore(object):
         unit = ''
 
         # noinspection PyTypeChecker
-        self._add_or_update(name, value, None, unit, dimensions)
+        self._add_or_update(name, value, None, unit, dimensions=dimensions)
 
     def add_metric(self, name, value, idx=None, unit=None, dimensions=None):
         """
@@ -206,4 +222,4 @@ class MetricsStore(object):
             list of dimensions for the metric
         """
         req_id = self._get_req(idx)
-        self._add_or_update(name, value, req_id, unit, dimensions)
+        self._add_or_update(name, value, req_id, unit, dimensions=dimensions)
@@ -14,9 +14,20 @@ Pass a json, collection of pids and gpuID
 """
 
 import logging
+from collections import namedtuple
 
 import psutil
 
+from mms.metrics.dimension import Dimension
+from mms.metrics.metric import Metric
+
+MB = 1024 * 1024
+
+# Memory in bytes. ctx_switches counts the voluntary and involuntary context switches and cpu is the
+# CPU utilization in percent of one core, both since the previous sample of the process.
+ProcessStats = namedtuple('ProcessStats',
+                          ['pid', 'rss', 'uss', 'pss', 'swap', 'threads', 'fds', 'ctx_switches', 'cpu'])
+
 
 def get_cpu_usage(pid):
     """
@@ -34,6 +45,115 @@ def get_cpu_usage(pid):
     return mem_utilization
 
 
+def get_process_stats(process):
+    """
+    Memory and resource usage of a process, read in one pass.
+
+    USS is the memory only the process maps, the memory freed when it exits. PSS adds the share of
+    the process in pages it shares with other processes, such as the shared libraries and the copy
+    on write pages of workers, so that PSS summed over processes does not count shared pages twice.
+    PSS falls back to USS on platforms that do not report it, USS, PSS and swap fall back to 0 when
+    the full memory info of the process is not accessible.
+
+    :param process: psutil.Process
+    :return: ProcessStats with the cumulative number of context switches of the process, and the CPU
+        utilization since the previous call for the same psutil.Process, 0 on the first call
+    """
+    with process.oneshot():
+        try:
+            memory = process.memory_full_info()
+        except psutil.AccessDenied:
+            memory = process.memory_info()
+        uss = getattr(memory, 'uss', 0)
+        ctx_switches = process.num_ctx_switches()
+        fds = process.num_fds() if hasattr(process, 'num_fds') else process.num_handles()
+        return ProcessStats(process.pid, memory.rss, uss, getattr(memory, 'pss', uss), getattr(memory, 'swap', 0),
+                            process.num_threads(), fds, ctx_switches.voluntary + ctx_switches.involuntary,
+                            process.cpu_percent())
+
+
+class ProcessMetrics(object):
+    """
+    Samples the worker processes, keeping their psutil handles and context switch counts between
+    samples.
+    """
+
+    def __init__(self):
+        self._processes = dict()
+        self._ctx_switches = dict()
+
+    def collect(self, pids):
+        """
+        Resource usage of the worker processes, handles of processes that are no longer listed are
+        released. Processes that cannot be read are reported with 0 values.
+
+        :param pids: list of pid strings or ints, empty strings are skipped
+        :return: list of ProcessStats
+        """
+        pids = [int(pid) for pid in pids if pid]
+        for pid in list(self._processes):
+            if pid not in pids:
+                del self._processes[pid]
+                self._ctx_switches.pop(pid, None)
+
+        samples = []
+        for pid in pids:
+            try:
+                process = self._processes.get(pid)
+                if process is None:
+                    process = psutil.Process(pid)
+                    self._processes[pid] = process
+                stats = get_process_stats(process)
+            except psutil.Error:
+                logging.error("Failed get process for pid: %s", pid, exc_info=True)
+                self._processes.pop(pid, None)
+                self._ctx_switches.pop(pid, None)
+                samples.append(ProcessStats(pid, 0, 0, 0, 0, 0, 0, 0, 0.0))
+                continue
+            last = self._ctx_switches.get(pid, 0)
+            self._ctx_switches[pid] = stats.ctx_switches
+            samples.append(stats._replace(ctx_switches=stats.ctx_switches - last))
+        return samples
+
+
+def model_metrics(samples, models):
+    """
+    Resource usage of the workers summed per model.
+
+    :param samples: list of ProcessStats
+    :param models: dict of pid to model name, processes without a model are left out
+    :return: list of Metric
+    """
+    totals = dict()
+    workers = dict()
+    for stats in samples:
+        model_name = models.get(stats.pid)
+        # Processes that could not be read are reported with 0 RSS
+        if model_name is None or not stats.rss:
+            continue
+        total = totals.get(model_name)
+        totals[model_name] = stats if total is None else ProcessStats(
+            None, *[a + b for a, b in zip(total[1:], stats[1:])])
+        workers[model_name] = workers.get(model_name, 0) + 1
+
+    metrics = []
+    for model_name in sorted(totals):
+        total = totals[model_name]
+        dimensions = [Dimension('ModelName', model_name), Dimension('Level', 'Model')]
+        metrics += [
+            Metric('Workers', workers[model_name], 'count', dimensions),
+            Metric('WorkerMemoryRSS', total.rss / MB, 'MB', dimensions),
+            Metric('WorkerMemoryUSS', total.uss / MB, 'MB', dimensions),
+            Metric('WorkerMemoryPSS', total.pss / MB, 'MB', dimensions),
+            Metric('WorkerSwap', total.swap / MB, 'MB', dimensions),
+            Metric('WorkerThreads', total.threads, 'count', dimensions),
+            Metric('WorkerOpenFiles', total.fds, 'count', dimensions),
+            Metric('WorkerContextSwitches', total.ctx_switches, 'count', dimensions),
+            Metric('WorkerCPUUtilization', total.cpu, 'percent', dimensions),
+        ]
+    return metrics
+
+
 def check_process_mem_usage(stdin):
     """
 
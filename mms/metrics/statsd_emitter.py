@@ -0,0 +1,198 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+StatsD/DogStatsD emitter of model metrics.
+
+Numeric metrics added through MetricsStore are sent over UDP to a local StatsD or DogStatsD agent,
+which aggregates them. Recording only puts the metric on a bounded queue, metrics are dropped when
+the queue is full. A background thread renders the metrics, with the dimension tags rendered once,
+and packs as many metrics as fit in a datagram of max_packet_size bytes.
+"""
+import logging
+import os
+import re
+import socket
+import threading
+from builtins import str
+
+try:
+    import queue
+except ImportError:  # python 2
+    import Queue as queue  # pylint: disable=import-error
+
+STATSD_ADDRESS_ENV = "MMS_STATSD_ADDRESS"
+STATSD_FORMAT_ENV = "MMS_STATSD_FORMAT"
+STATSD_MAX_PACKET_SIZE_ENV = "MMS_STATSD_MAX_PACKET_SIZE"
+DEFAULT_PORT = 8125
+# Payload of a datagram that fits a 1500 bytes Ethernet MTU with IP and UDP headers, as DogStatsD clients use
+DEFAULT_MAX_PACKET_SIZE = 1432
+DEFAULT_QUEUE_SIZE = 10000
+FORMATS = ("dogstatsd", "statsd")
+# Characters with a meaning in the StatsD line protocol
+RESERVED = re.compile(r"[:|@#,\s]")
+
+logger = logging.getLogger(__name__)
+
+
+def sanitize(value):
+    return RESERVED.sub("_", str(value))
+
+
+class StatsdEmitter(object):
+    """
+    Sends the metrics of the model of a worker to a StatsD agent.
+
+    With the dogstatsd format the dimensions are sent as tags, "mms.PredictionTime:12.5|ms|#ModelName:resnet,...".
+    Plain StatsD has no tags, the model name and dimension values are part of the metric name,
+    "mms.resnet.PredictionTime:12.5|ms".
+    """
+
+    def __init__(self, model_name, host="127.0.0.1", port=DEFAULT_PORT, metric_format="dogstatsd", prefix="mms",
+                 max_packet_size=DEFAULT_MAX_PACKET_SIZE, queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        :param model_name: model of the worker
+        :param host: host of the agent
+        :param port: UDP port of the agent
+        :param metric_format: "dogstatsd" or "statsd"
+        :param prefix: prefix of the metric names
+        :param max_packet_size: maximum payload of a datagram in bytes
+        :param queue_size: maximum number of metrics waiting to be sent
+        """
+        if metric_format not in FORMATS:
+            raise ValueError("Unknown StatsD format {}, expected one of {}".format(metric_format, FORMATS))
+        family, _, _, _, address = socket.getaddrinfo(host, port, 0, socket.SOCK_DGRAM)[0]
+        self.address = address
+        self.max_packet_size = max_packet_size
+        self.dropped = 0
+        self.sent = 0
+        self._tagged = metric_format == "dogstatsd"
+        self._histogram_type = "h" if self._tagged else "g"
+        if self._tagged:
+            self._prefix = prefix + "."
+            self._model_tags = "|#ModelName:{},Level:Model".format(sanitize(model_name))
+        else:
+            self._prefix = "{}.{}.".format(prefix, sanitize(model_name))
+            self._model_tags = ""
+        self._tags = dict()
+        self._queue = queue.Queue(queue_size)
+        self._socket = socket.socket(family, socket.SOCK_DGRAM)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls, model_name):
+        """
+        Emitter configured by MMS_STATSD_ADDRESS ("host:port"), MMS_STATSD_FORMAT and
+        MMS_STATSD_MAX_PACKET_SIZE.
+
+        :return: StatsdEmitter, or None when MMS_STATSD_ADDRESS is not set
+        """
+        address = os.environ.get(STATSD_ADDRESS_ENV)
+        if not address:
+            return None
+        host, _, port = address.rpartition(":")
+        if not host or not port.isdigit():
+            host, port = address, DEFAULT_PORT
+        return cls(model_name, host.strip("[]"), int(port),
+                   metric_format=os.environ.get(STATSD_FORMAT_ENV, "dogstatsd"),
+                   max_packet_size=int(os.environ.get(STATSD_MAX_PACKET_SIZE_ENV, DEFAULT_MAX_PACKET_SIZE)))
+
+    def record(self, name, value, unit, counter=False, dimensions=None):
+        """
+        Queue a metric to send, never blocks.
+
+        :param name: metric name
+        :param value: numeric value
+        :param unit: unit of the metric, as passed to MetricsStore
+        :param counter: send as StatsD counter
+        :param dimensions: list of Dimension, request specific dimensions must not be included
+        """
+        try:
+            self._queue.put_nowait((name, value, unit, counter,
+                                    tuple((d.name, d.value) for d in dimensions) if dimensions else ()))
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="statsd-emitter")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            try:
+                while True:
+                    items.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            for packet in self.pack(self.render(*item) for item in items):
+                try:
+                    self._socket.sendto(packet, self.address)
+                    self.sent += 1
+                except socket.error as e:
+                    self.dropped += packet.count(b"\n") + 1
+                    logger.debug("Failed to send metrics to %s: %s", self.address, e)
+
+    def render(self, name, value, unit, counter, dims):
+        """
+        :return: metric line, e.g. "mms.PredictionTime:12.5|ms|#ModelName:resnet,Level:Model"
+        """
+        if counter:
+            metric_type = "c"
+        elif unit == "ms":
+            metric_type = "ms"
+        elif unit == "s":
+            metric_type = "ms"
+            value = value * 1000
+        else:
+            metric_type = self._histogram_type
+
+        tags = self._tags.get(dims)
+        if tags is None:
+            if self._tagged:
+                tags = self._model_tags + "".join(",{}:{}".format(sanitize(n), sanitize(v)) for n, v in dims)
+            else:
+                tags = "".join("{}.".format(sanitize(v)) for _, v in dims)
+            self._tags[dims] = tags
+
+        if self._tagged:
+            return "{}{}:{}|{}{}".format(self._prefix, name, value, metric_type, tags)
+        return "{}{}{}:{}|{}".format(self._prefix, tags, name, value, metric_type)
+
+    def pack(self, lines):
+        """
+        Pack metric lines into newline separated datagrams of at most max_packet_size bytes. A line
+        longer than max_packet_size is sent alone.
+
+        :param lines: iterable of metric lines
+        :return: list of datagram payloads
+        """
+        packets = []
+        packet = []
+        size = 0
+        for line in lines:
+            data = line.encode("utf-8")
+            if packet and size + 1 + len(data) > self.max_packet_size:
+                packets.append(b"\n".join(packet))
+                packet = []
+                size = 0
+            size += len(data) + (1 if packet else 0)
+            packet.append(data)
+        if packet:
+            packets.append(b"\n".join(packet))
+        return packets
@@ -11,7 +11,6 @@
 Module to collect system metrics for front-end
 """
 import logging
-import types
 from builtins import str
 
 import psutil
@@ -58,18 +57,38 @@ def disk_available():
     system_metrics.append(Metric('DiskAvailable', data, 'GB', dimension))
 
 
-def collect_all(mod):
+def collect():
     """
-    Collect all system metrics.
+    Sample all system metrics into a new list, virtual memory and disk usage are read once.
 
-    :param mod:
+    CPU utilization is measured since the previous call in the same process, the first call of a
+    process only returns a baseline. Long lived callers such as the metric collector daemon get
+    the utilization of each interval.
+
+    :return: list of Metric
+    """
+    cpu = psutil.cpu_percent()
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
+    return [
+        Metric('CPUUtilization', cpu, 'percent', dimension),
+        Metric('MemoryUsed', memory.used / (1024 * 1024), 'MB', dimension),
+        Metric('MemoryAvailable', memory.available / (1024 * 1024), 'MB', dimension),
+        Metric('MemoryUtilization', memory.percent, 'percent', dimension),
+        Metric('DiskUsage', disk.used / (1024 * 1024 * 1024), 'GB', dimension),
+        Metric('DiskUtilization', disk.percent, 'percent', dimension),
+        Metric('DiskAvailable', disk.free / (1024 * 1024 * 1024), 'GB', dimension),
+    ]
+
+
+def collect_all(mod=None):  # pylint: disable=unused-argument
+    """
+    Collect all system metrics into system_metrics, replacing the previous sample, and log them.
+
+    :param mod: unused, kept for compatibility
     :return:
     """
-    members = dir(mod)
-    for i in members:
-        value = getattr(mod, i)
-        if isinstance(value, types.FunctionType) and value.__name__ not in ('collect_all', 'log_msg'):
-            value()
+    system_metrics[:] = collect()
 
     for met in system_metrics:
         logging.info(str(met))
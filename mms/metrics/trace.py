@@ -0,0 +1,49 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Stage timings of traced requests.
+
+The frontend marks the requests it traces with the X-MMS-Trace header. The worker records the time
+each of those requests spent in decoding, in the entry point, in the stages timed by the handler
+with context.timer, and in encoding the response, and sends the spans back in the trace section of
+the response frame. Batches without traced requests record nothing.
+"""
+
+TRACE_HEADER = "X-MMS-Trace"
+
+
+class Trace(object):
+    """
+    Spans of the traced requests of a batch, in the order they were recorded.
+    """
+
+    def __init__(self, request_ids):
+        """
+        :param request_ids: ids of the traced requests, by index in the batch
+        """
+        self.request_ids = request_ids
+        self.spans = dict((req_id, []) for req_id in request_ids.values())
+
+    def add(self, name, duration, idx=None):
+        """
+        Add a span to a traced request, or to all traced requests of the batch.
+
+        :param name: stage name
+        :param duration: duration in milliseconds
+        :param idx: index of the request in the batch, None for a stage of the whole batch
+        """
+        if idx is None:
+            for spans in self.spans.values():
+                spans.append((name, duration))
+            return
+        req_id = self.request_ids.get(idx)
+        if req_id is not None:
+            self.spans[req_id].append((name, duration))
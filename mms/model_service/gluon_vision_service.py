@@ -10,34 +10,68 @@
 
 """`Gluon vision service` defines a Gluon base vision service
 """
+import logging
+import time
+
 import numpy as np
 import mxnet
 from mms.model_service.mxnet_model_service import GluonImperativeBaseService
+from mms.utils import image_decode
 from mms.utils.mxnet import ndarray
 
 
 class GluonVisionService(GluonImperativeBaseService):
     """MXNetVisionService defines a fundamental service for image classification task.
-    In preprocess, input image buffer is read to NDArray and resized respect to input
-    shape in signature.
+    In preprocess, input images of a batch are decoded and resized respect to input
+    shape in signature on a thread pool, then normalized as one NCHW batch.
     In post process, top-5 labels are returned.
     """
+    def __init__(self, model_name, model_dir, manifest, net=None, gpu=None):
+        super(GluonVisionService, self).__init__(model_name, model_dir, manifest, net, gpu)
+        # Normalization constants are created once, scaled so that scaling to [0, 1] is folded in
+        self._mean = np.array([0.485 * 255, 0.456 * 255, 0.406 * 255], dtype=np.float32)
+        self._std = np.array([0.229 * 255, 0.224 * 255, 0.225 * 255], dtype=np.float32)
+
+    def batch_inference(self, batch):
+        """
+        Preprocess the images of all requests as one batch and run one forward computation.
+        """
+        preprocess_start = time.time()
+        data = self._preprocess_images(batch)
+        inference_start = time.time()
+        data = self._inference(data)
+        postprocess_start = time.time()
+        results = self._postprocess(data)
+        end_time = time.time()
+
+        logging.info("preprocess time: %.2f", (inference_start - preprocess_start) * 1000)
+        logging.info("inference time: %.2f", (postprocess_start - inference_start) * 1000)
+        logging.info("postprocess time: %.2f", (end_time - postprocess_start) * 1000)
+        return results
+
     def _preprocess(self, data):
+        return self._preprocess_images([data])
+
+    def _preprocess_images(self, batch):
+        """
+        Decode and resize the images of every request on a thread pool, then normalize and
+        transpose them at once.
+
+        :param batch: raw input of each request
+        :return: list of NDArray, one NCHW batch for each input
+        """
         img_list = []
-        for idx, img in enumerate(data):
+        for idx, images in enumerate(zip(*batch)):
             input_shape = self.signature['inputs'][idx]['data_shape']
             # We are assuming input shape is NCHW
             [h, w] = input_shape[2:]
-            img_arr = mxnet.img.imdecode(img)
-            img_arr = mxnet.image.imresize(img_arr, w, h)
-            img_arr = img_arr.astype(np.float32)
-            img_arr /= 255
-            img_arr = mxnet.image.color_normalize(img_arr,
-                                                  mean=mxnet.nd.array([0.485, 0.456, 0.406]),
-                                                  std=mxnet.nd.array([0.229, 0.224, 0.225]))
-            img_arr = mxnet.nd.transpose(img_arr, (2, 0, 1))
-            img_arr = img_arr.expand_dims(axis=0)
-            img_list.append(img_arr)
+            decoded, decode_times = image_decode.decode_batch(images, size=(w, h), resize_to_size=True, interp=1)
+            start = time.time()
+            img_list.append(mxnet.nd.array(image_decode.to_nchw(decoded, self._mean, self._std)))
+            # Each image is charged its decode time and its share of the batch normalization
+            share = (time.time() - start) * 1000 / len(images)
+            for i, decode_time in enumerate(decode_times):
+                self._add_time("ImagePreprocessTime", decode_time + share, i)
         return img_list
 
     def _inference(self, data):
@@ -57,11 +91,12 @@ class GluonVisionService(GluonImperativeBaseService):
         """
         # Check input shape
         super(GluonVisionService, self)._inference(data)
-        output = self.net(data[0])
+        output = self._forward(data[0].as_in_context(self.ctx))
         return output.softmax()
 
     def _postprocess(self, data):
         assert hasattr(self, 'labels'), \
             "Can't find labels attribute. Did you put synset.txt file into " \
             "model archive or manually load class label file in __init__?"
-        return [ndarray.top_probability(d, self.labels, top=5) for d in data]
+        # Softmax output is a single NDArray with one row for each input
+        return ndarray.top_k(data, self.labels, top=5)
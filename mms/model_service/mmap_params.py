@@ -0,0 +1,145 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Memory mapped model parameters.
+
+mx.nd.load reads a .params file into private memory of every worker. The mmap layout stores the
+tensors of a .params file uncompressed and page aligned in <params>.mmap, with an index of names,
+offsets, shapes and dtypes in <params>.mmap.json. Tensors are mapped copy-on-write from the page
+cache and CPU NDArrays are created on the mapped memory without a copy, so the arrays returned by
+load_params are shared by the workers of a model. Binding a module still copies the parameters
+into the arrays of its executor, each worker keeps that copy in private memory. The layout is
+created on first load, or before packaging the archive:
+
+    python -m mms.model_service.mmap_params squeezenet/squeezenet_v1.1-0000.params
+"""
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import sys
+from multiprocessing.pool import ThreadPool
+
+import mxnet as mx
+import numpy as np
+
+MMAP_SUFFIX = ".mmap"
+INDEX_SUFFIX = ".mmap.json"
+ALIGNMENT = 4096
+MAX_LOAD_THREADS = 8
+
+
+def has_mmap_layout(params_file):
+    return os.path.isfile(params_file + MMAP_SUFFIX) and os.path.isfile(params_file + INDEX_SUFFIX)
+
+
+def convert_params(params_file):
+    """
+    Write the mmap layout of a .params file. Workers of a model may start together, the index is
+    moved last so that it never exists without complete tensor data.
+
+    :param params_file: path of .params file saved with mx.nd.save
+    """
+    arrays = mx.nd.load(params_file)
+    if isinstance(arrays, list):
+        arrays = dict((str(idx), array) for idx, array in enumerate(arrays))
+
+    tmp_file = "{}.{}".format(params_file, os.getpid())
+    index = dict()
+    offset = 0
+    with open(tmp_file + MMAP_SUFFIX, "wb") as f:
+        for name, array in arrays.items():
+            data = array.asnumpy()
+            padding = -offset % ALIGNMENT
+            f.write(b"\0" * padding)
+            offset += padding
+            index[name] = {"offset": offset, "shape": list(data.shape), "dtype": data.dtype.str}
+            f.write(data.tobytes())
+            offset += data.nbytes
+
+    with open(tmp_file + INDEX_SUFFIX, "w") as f:
+        json.dump(index, f)
+    os.rename(tmp_file + MMAP_SUFFIX, params_file + MMAP_SUFFIX)
+    os.rename(tmp_file + INDEX_SUFFIX, params_file + INDEX_SUFFIX)
+
+
+def load_params(params_file, ctx=None, convert=False):
+    """
+    Load parameters from the mmap layout of a .params file, in place of mx.nd.load.
+
+    CPU arrays are views of the mapped memory, creating them copies nothing, so they are created in
+    turn while the kernel reads ahead all tensors at once. Arrays for other contexts are copied
+    from the mapping by a pool of threads. The views are only shared as long as they are used as
+    is: Module.set_params and Block.load_parameters copy them into arrays of their own.
+
+    :param params_file: path of .params file
+    :param ctx: context of the arrays, CPU by default
+    :param convert: create the mmap layout if it does not exist yet
+    :return: dict of name and NDArray, same as mx.nd.load
+    """
+    if not has_mmap_layout(params_file):
+        if not convert:
+            return mx.nd.load(params_file)
+        try:
+            convert_params(params_file)
+        except (IOError, OSError) as e:
+            logging.warning("Failed to write memory mapped parameters: %s", e)
+            return mx.nd.load(params_file)
+
+    with open(params_file + INDEX_SUFFIX) as f:
+        index = json.load(f)
+    with open(params_file + MMAP_SUFFIX, "rb") as f:
+        # Copy-on-write, writes to arrays do not reach the file or other workers
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY) if index else None
+    if buf is not None and hasattr(buf, "madvise"):
+        buf.madvise(mmap.MADV_WILLNEED)
+
+    def _load(item):
+        name, entry = item
+        dtype = np.dtype(str(entry["dtype"]))
+        count = int(np.prod(entry["shape"], dtype=np.int64))
+        data = np.frombuffer(buf, dtype=dtype, count=count, offset=entry["offset"]).reshape(entry["shape"])
+        if ctx is None or ctx.device_type == "cpu":
+            return name, mx.nd.from_numpy(data, zero_copy=True)
+        return name, mx.nd.array(data, ctx=ctx, dtype=dtype)
+
+    if ctx is None or ctx.device_type == "cpu":
+        return dict(_load(item) for item in index.items())
+
+    pool = ThreadPool(min(MAX_LOAD_THREADS, multiprocessing.cpu_count()))
+    try:
+        return dict(pool.map(_load, index.items()))
+    finally:
+        pool.close()
+
+
+def load_checkpoint_params(params_file, convert=False):
+    """
+    Load arg_params and aux_params of a checkpoint, in place of mx.model.load_checkpoint.
+    """
+    arg_params = dict()
+    aux_params = dict()
+    for key, value in load_params(params_file, convert=convert).items():
+        tp, name = key.split(":", 1)
+        if tp == "arg":
+            arg_params[name] = value
+        if tp == "aux":
+            aux_params[name] = value
+    return arg_params, aux_params
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python -m mms.model_service.mmap_params <params file> [<params file> ...]")
+    for path in sys.argv[1:]:
+        convert_params(path)
+        print("{} -> {}".format(path, path + MMAP_SUFFIX))
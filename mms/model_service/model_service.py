@@ -19,6 +19,8 @@ import os
 import time
 from abc import ABCMeta, abstractmethod
 
+from mms.protocol import serializers
+
 
 class ModelService(object):
     """
@@ -33,6 +35,7 @@ class ModelService(object):
         self.ctx = None
         self._context = None
         self._signature = None
+        self._batch_size = 1
 
     def initialize(self, context):
         """
@@ -44,6 +47,7 @@ class ModelService(object):
         self._context = context
         properties = context.system_properties
         model_dir = properties.get("model_dir")
+        self._batch_size = properties.get("batch_size") or 1
 
         signature_file_path = os.path.join(model_dir, context.manifest['Model']['Signature'])
         if not os.path.isfile(signature_file_path):
@@ -94,6 +98,38 @@ class ModelService(object):
         """
         return self._signature
 
+    def batch_inference(self, batch):
+        """
+        Run inference for a batch of requests. This implementation runs inference for
+        each request, services that can batch the forward computation override it.
+
+        Parameters
+        ----------
+        batch : list of list of object
+            Raw input of each request.
+
+        Returns
+        -------
+        list of outputs, one for each request.
+        """
+        results = []
+        for input_data in batch:
+            ret = self.inference(input_data)
+            results.append(ret[0] if isinstance(ret, list) else ret)
+        return results
+
+    def _add_counter(self, name, value=1, idx=None):
+        if self._context is not None and self._context.metrics is not None:
+            self._context.metrics.add_counter(name, value, idx)
+
+    def _add_time(self, name, value, idx=None):
+        if self._context is not None and self._context.metrics is not None:
+            self._context.metrics.add_time(name, value, idx)
+
+    def _add_percent(self, name, value, idx=None):
+        if self._context is not None and self._context.metrics is not None:
+            self._context.metrics.add_percent(name, value, idx)
+
     # noinspection PyUnusedLocal
     def handle(self, data, context):  # pylint: disable=unused-argument
         """
@@ -105,24 +141,32 @@ class ModelService(object):
 
         """
         input_type = self._signature['input_type']
-
-        input_data = []
         data_name = self._signature["inputs"][0]["data_name"]
-        form_data = data[0].get(data_name)
-        if form_data is None:
-            form_data = data[0].get("body")
 
-        if form_data is None:
-            form_data = data[0].get("data")
+        batch = []
+        for request in data:
+            form_data = request.get(data_name)
+            if form_data is None:
+                form_data = request.get("body")
+
+            if form_data is None:
+                form_data = request.get("data")
+
+            if input_type == "application/json":
+                # user might not send content in HTTP request
+                if isinstance(form_data, (bytes, bytearray)):
+                    try:
+                        form_data = serializers.decode(input_type, form_data)
+                    except ValueError:
+                        # Accept python literals sent by older clients
+                        form_data = ast.literal_eval(form_data.decode("utf-8"))
 
-        if input_type == "application/json":
-            # user might not send content in HTTP request
-            if isinstance(form_data, (bytes, bytearray)):
-                form_data = ast.literal_eval(form_data.decode("utf-8"))
+            batch.append([form_data])
 
-        input_data.append(form_data)
+        if len(batch) > 1 or self._batch_size > 1:
+            return self.batch_inference(batch)
 
-        ret = self.inference(input_data)
+        ret = self.inference(batch[0])
         if isinstance(ret, list):
             return ret
 
@@ -14,11 +14,16 @@
 import json
 import os
 import logging
+import re
+import time
+from collections import OrderedDict
 
 import mxnet as mx
 from mxnet.io import DataBatch
 
 from .model_service import SingleNodeService
+from .mmap_params import has_mmap_layout, load_checkpoint_params
+from .quantization import load_quantized
 
 
 def check_input_shape(inputs, signature):
@@ -59,8 +64,37 @@ class MXNetBaseService(SingleNodeService):
     MXNetBaseService defines the fundamental loading model and inference
     operations when serving MXNet model. This is a base class and needs to be
     inherited.
+
+    Inputs whose shape differs from the bound shape, e.g. inputs with wildcard (0) dimensions
+    in signature.json, run on executors bound for their shape. The executors share memory with
+    the main module and are kept in a LRU cache of max_cached_shapes entries. Signature inputs
+    can set "shape_buckets", e.g. {"2": [224, 320, 480]}, to zero pad dimensions up to the next
+    bucket size so that fewer executors are bound. Output dimensions of the padded size on a
+    bucketed axis are cropped back to the size of the input.
+
+    Services that set lazy_outputs to True return outputs of the default postprocess as NDArrays.
+    Forward computation is asynchronous, outputs are only synchronized and copied to numpy when
+    MMS encodes the response, so the worker is not blocked between issuing forward computation
+    and encoding. Errors raised by the engine are reported as failed predictions.
+
+    Services that set quantize to True run the model in INT8 on CPU. The model is quantized with
+    the calibration file of the archive (calibration.nd or calibration.npy) using calib_mode, and
+    cached as <prefix>-int8-symbol.json and <prefix>-int8-0000.params next to the checkpoint, loaded
+    directly when present in the archive. Layers in quantize_excluded stay in FP32.
+
+    Parameters are memory mapped when the archive contains the mmap layout of the params file,
+    services that set mmap_params to True create it on first load. The CPU copy of the parameters
+    that the module keeps next to the executor is then shared by the workers of a model. The
+    executor still holds a private copy of the parameters in every worker.
     """
 
+    max_cached_shapes = 8
+    lazy_outputs = False
+    quantize = False
+    calib_mode = "naive"
+    quantize_excluded = None
+    mmap_params = False
+
     def __init__(self, model_name, model_dir, manifest, gpu=None):
         super(MXNetBaseService, self).__init__(model_name, model_dir, manifest, gpu)
         self.param_filename = None
@@ -78,12 +112,16 @@ class MXNetBaseService(SingleNodeService):
 
         data_names = []
         data_shapes = []
+        self._shape_buckets = []
         epoch = 0
         for input_data in self._signature['inputs']:
             data_names.append(input_data['data_name'])
+            buckets = input_data.get('shape_buckets', {})
+            self._shape_buckets.append(dict((int(axis), sorted(sizes)) for axis, sizes in buckets.items()))
             # Replace 0 entry in data shape with 1 for binding executor.
             # Set batch size as 1
-            data_shape = input_data['data_shape']
+            # Signature shape is copied, wildcard entries are used to check input shapes.
+            data_shape = list(input_data['data_shape'])
             data_shape[0] = 1
             # pylint: disable=consider-using-enumerate
             for idx in range(len(data_shape)):
@@ -99,12 +137,25 @@ class MXNetBaseService(SingleNodeService):
         except Exception:  # pylint: disable=broad-except
             logging.info("Failed to parse epoch from param file, setting epoch to 0")
 
-        sym, arg_params, aux_params = mx.model.load_checkpoint('%s/%s' %
-                                                               (model_dir, manifest['Model']['Symbol'][:-12]), epoch)
+        checkpoint = manifest['Model']['Symbol'][:-12]
+        sym = mx.sym.load('%s/%s-symbol.json' % (model_dir, checkpoint))
+        params_file = '%s/%s-%04d.params' % (model_dir, checkpoint, epoch)
+        arg_params, aux_params = load_checkpoint_params(params_file, convert=self.mmap_params)
+        mapped = has_mmap_layout(params_file)
+        if self.quantize:
+            quantized = self._load_quantized(model_dir, checkpoint, sym, arg_params, aux_params, data_names)
+            mapped = mapped and quantized[0] is sym
+            sym, arg_params, aux_params = quantized
         self.mx_model = mx.mod.Module(symbol=sym, context=self.ctx,
                                       data_names=data_names, label_names=None)
         self.mx_model.bind(for_training=False, data_shapes=data_shapes)
+        self._data_shapes = data_shapes
         self.mx_model.set_params(arg_params, aux_params, allow_missing=True, allow_extra=True)
+        if mapped:
+            self._share_params(arg_params, aux_params)
+        self._executor_cache = OrderedDict()
+        self.bind_count = 0
+        self.cache_hits = 0
 
         # Read synset file
         # If synset is not specified, check whether model archive contains synset file.
@@ -114,11 +165,209 @@ class MXNetBaseService(SingleNodeService):
             synset = archive_synset
             self.labels = [line.strip() for line in open(synset).readlines()]
 
+    def _share_params(self, arg_params, aux_params):
+        """
+        Module keeps a CPU copy of the parameters next to the executor. The copy is replaced by the
+        memory mapped arrays, which hold the same values.
+        """
+        # pylint: disable=protected-access
+        for params, module_params in ((arg_params, self.mx_model._arg_params),
+                                      (aux_params, self.mx_model._aux_params)):
+            for name, value in list(module_params.items()):
+                mapped = params.get(name)
+                if mapped is not None and mapped.shape == value.shape and mapped.dtype == value.dtype:
+                    module_params[name] = mapped
+
+    def _load_quantized(self, model_dir, checkpoint, sym, arg_params, aux_params, data_names):
+        if self.ctx.device_type != "cpu":
+            logging.info("INT8 inference is only supported on CPU, running FP32 model")
+            return sym, arg_params, aux_params
+
+        quantized = load_quantized(model_dir, checkpoint, sym, arg_params, aux_params, data_names,
+                                   self.calib_mode, self.quantize_excluded)
+        if quantized is None:
+            logging.warning("No calibration data in model archive, running FP32 model")
+            return sym, arg_params, aux_params
+        return quantized
+
+    def initialize(self, context):
+        """
+        Rebind the module at the batch size configured for the model.
+
+        :param context: MMS context object
+        :return:
+        """
+        super(MXNetBaseService, self).initialize(context)
+        if self._batch_size > 1:
+            self._data_shapes = [(name, (self._batch_size,) + shape[1:]) for name, shape in self._data_shapes]
+            self.mx_model.reshape(self._data_shapes)
+
+    def batch_inference(self, batch):
+        """
+        Preprocess every request, run one forward computation for the batch and postprocess
+        the outputs of each request. Partial batches are padded to the bound batch size, so
+        the module is not reshaped for every batch. Outputs are split along the first axis.
+        Requests with different input shapes are run as separate batches. The padded fraction
+        of each batch is reported as BatchPadding metric.
+
+        Parameters
+        ----------
+        batch : list of list of object
+            Raw input of each request.
+
+        Returns
+        -------
+        list of outputs, one for each request.
+        """
+        preprocess_start = time.time()
+        data = self._preprocess_batch(batch)
+        groups = OrderedDict()
+        for idx, inputs in enumerate(data):
+            groups.setdefault(tuple(item.shape[1:] for item in inputs), []).append(idx)
+        preprocess_time = time.time() - preprocess_start
+
+        # Forward computation of all shape groups is issued before outputs of any group are
+        # postprocessed, so that postprocessing overlaps the computation of later groups.
+        inference_start = time.time()
+        pending = []
+        for indices in groups.values():
+            sizes = [data[idx][0].shape[0] for idx in indices]
+            if self._batch_size > 1:
+                # Fraction of the forward computation spent on padding
+                self._add_percent("BatchPadding", round(100.0 * max(self._batch_size - sum(sizes), 0) /
+                                                        self._batch_size, 2))
+            inputs = [self._pad_batch(mx.nd.concat(*arrays, dim=0) if len(arrays) > 1 else arrays[0])
+                      for arrays in zip(*[data[idx] for idx in indices])]
+            outputs = self._detach_outputs(self._inference(inputs), len(groups) > 1)
+            pending.append((indices, sizes, outputs))
+        postprocess_start = time.time()
+        inference_time = postprocess_start - inference_start
+
+        results = [None] * len(batch)
+        for indices, sizes, outputs in pending:
+            offset = 0
+            for idx, size in zip(indices, sizes):
+                ret = self._postprocess([output[offset:offset + size] for output in outputs])
+                results[idx] = ret[0] if isinstance(ret, list) else ret
+                offset += size
+        postprocess_time = time.time() - postprocess_start
+
+        logging.info("preprocess time: %.2f", preprocess_time * 1000)
+        logging.info("inference time: %.2f", inference_time * 1000)
+        logging.info("postprocess time: %.2f", postprocess_time * 1000)
+        trace = self._context.trace if self._context is not None else None
+        if trace is not None:
+            trace.add("preprocess", preprocess_time * 1000)
+            trace.add("inference", inference_time * 1000)
+            trace.add("postprocess", postprocess_time * 1000)
+
+        return results
+
+    def _pad_batch(self, data):
+        pad = self._batch_size - data.shape[0]
+        if pad <= 0:
+            return data
+
+        padding = mx.nd.zeros((pad,) + data.shape[1:], ctx=data.context, dtype=data.dtype)
+        return mx.nd.concat(data, padding, dim=0)
+
+    def _bucket_inputs(self, data):
+        """
+        Zero pad inputs up to the configured shape buckets.
+        """
+        padded = []
+        for item, buckets in zip(data, self._shape_buckets):
+            shape = list(item.shape)
+            for axis, sizes in buckets.items():
+                for size in sizes:
+                    if size >= shape[axis]:
+                        shape[axis] = size
+                        break
+            if tuple(shape) != item.shape:
+                bucket = mx.nd.zeros(tuple(shape), ctx=item.context, dtype=item.dtype)
+                bucket[tuple(slice(0, dim) for dim in item.shape)] = item
+                item = bucket
+            padded.append(item)
+        return padded
+
+    def _crop_outputs(self, outputs, data, padded):
+        """
+        Crop outputs of inputs zero padded up to shape buckets back to the shape of the inputs.
+        Outputs are cropped on the bucketed axes where their size is the padded size, e.g. the
+        spatial axes of a segmentation map.
+        """
+        crops = dict()
+        for item, bucket, buckets in zip(data, padded, self._shape_buckets):
+            for axis in buckets:
+                if bucket.shape[axis] != item.shape[axis]:
+                    crops[axis] = (bucket.shape[axis], item.shape[axis])
+        if not crops:
+            return outputs
+
+        cropped = []
+        for output in outputs:
+            for axis, (padded_size, size) in crops.items():
+                if output.ndim > axis and output.shape[axis] == padded_size:
+                    output = mx.nd.slice_axis(output, axis=axis, begin=0, end=size)
+            cropped.append(output)
+        return cropped
+
+    def _get_module(self, data):
+        """
+        Module bound for the shapes of data. Shapes other than the bound shapes use executors
+        from the LRU cache, bound on demand with memory shared with the main module.
+        """
+        data_shapes = [(name, item.shape) for (name, _), item in zip(self._data_shapes, data)]
+        if data_shapes == self._data_shapes:
+            return self.mx_model
+
+        key = tuple(shape for _, shape in data_shapes)
+        module = self._executor_cache.pop(key, None)
+        if module is None:
+            module = mx.mod.Module(symbol=self.mx_model.symbol, context=self.ctx,
+                                   data_names=self.mx_model.data_names, label_names=None)
+            module.bind(for_training=False, data_shapes=data_shapes, shared_module=self.mx_model)
+            self.bind_count += 1
+            self._add_counter("ExecutorBindCount")
+            if len(self._executor_cache) >= self.max_cached_shapes:
+                self._executor_cache.popitem(last=False)
+        else:
+            self.cache_hits += 1
+            self._add_counter("ExecutorCacheHit")
+
+        self._executor_cache[key] = module
+        return module
+
+    def _preprocess_batch(self, batch):
+        """
+        Preprocess the raw inputs of every request of a batch. Services that can preprocess a
+        batch at once override it.
+
+        :param batch: raw input of each request
+        :return: list of preprocessed inputs of each request
+        """
+        return [self._preprocess(input_data) for input_data in batch]
+
     def _preprocess(self, data):
-        return map(mx.nd.array, data)
+        return [mx.nd.array(d) for d in data]
 
     def _postprocess(self, data):
-        return [str(d.asnumpy().tolist()) for d in data]
+        # Arrays are serialized by MMS according to the request Accept header: JSON by default,
+        # application/x-npy or application/octet-stream for binary output.
+        if self.lazy_outputs:
+            return list(data)
+        return [d.asnumpy() for d in data]
+
+    def _detach_outputs(self, outputs, copy):
+        """
+        Start copies of outputs, so that they are not overwritten by the next forward computation
+        of the same executor. Outputs on GPU are copied to host memory.
+        """
+        if self.ctx.device_type != "cpu":
+            return [output.copyto(mx.cpu()) for output in outputs]
+        if copy:
+            return [output.copy() for output in outputs]
+        return outputs
 
     def _inference(self, data):
         """Internal inference methods for MXNet. Run forward computation and
@@ -137,18 +386,12 @@ class MXNetBaseService(SingleNodeService):
         # Check input shape
         check_input_shape(data, self.signature)
         data = [item.as_in_context(self.ctx) for item in data]
-        self.mx_model.forward(DataBatch(data))
-        data = self.mx_model.get_outputs()
-        # by pass lazy evaluation get_outputs either returns a list of nd arrays
-        # a list of list of NDArray
-        for d in data:
-            if isinstance(d, list):
-                for n in data:
-                    if isinstance(n, mx.ndarray.ndarray.NDArray):
-                        n.wait_to_read()
-            elif isinstance(d, mx.ndarray.ndarray.NDArray):
-                d.wait_to_read()
-        return data
+        padded = self._bucket_inputs(data)
+        module = self._get_module(padded)
+        module.forward(DataBatch(padded))
+        # Forward is asynchronous, outputs are synchronized when they are read in postprocess,
+        # or when they are encoded into the response for lazy_outputs.
+        return self._crop_outputs(module.get_outputs(), data, padded)
 
     def ping(self):
         """
@@ -178,8 +421,15 @@ class GluonImperativeBaseService(SingleNodeService):
     """GluonImperativeBaseService defines the fundamental loading model and inference
        operations when serving Gluon model. This is a base class and needs to be
        inherited.
+
+       Services that set hybridize to True run HybridBlock networks as a cached graph with
+       static memory allocation. The graph traced on the first forward computation is exported
+       next to the model as <model_name>-hybrid-symbol.json and <model_name>-hybrid-0000.params,
+       later worker starts import it instead of tracing the network again.
     """
 
+    hybridize = False
+
     def __init__(self, model_name, model_dir, manifest, net=None, gpu=None):
         super(GluonImperativeBaseService, self).__init__(model_name, model_dir, manifest, gpu)
         self.param_filename = None
@@ -196,16 +446,29 @@ class GluonImperativeBaseService(SingleNodeService):
         except Exception:
             raise Exception('Failed to open model signature file: %s' % signature_file_path)
 
-        # Load MXNet module
-        # noinspection PyBroadException
-        try:
-            self.param_filename = manifest['Model']['Parameters']
-            if self.param_filename or self.net is not None:
-                self.net.load_params(os.path.join(model_dir, self.param_filename), ctx=self.ctx)
-            else:
-                logging.info("No parameters file given for this imperative service")
-        except Exception:  # pylint: disable=broad-except
-            logging.info("Failed to parse epoch from param file, setting epoch to 0")
+        self._export_prefix = None
+        hybrid_prefix = os.path.join(model_dir, "{}-hybrid".format(model_name))
+        if self.hybridize and os.path.isfile(hybrid_prefix + "-symbol.json") \
+                and os.path.isfile(hybrid_prefix + "-0000.params"):
+            self.net = self._import_hybrid(hybrid_prefix)
+        else:
+            # Load MXNet module
+            # noinspection PyBroadException
+            try:
+                self.param_filename = manifest['Model']['Parameters']
+                if self.param_filename or self.net is not None:
+                    self.net.load_params(os.path.join(model_dir, self.param_filename), ctx=self.ctx)
+                else:
+                    logging.info("No parameters file given for this imperative service")
+            except Exception:  # pylint: disable=broad-except
+                logging.info("Failed to parse epoch from param file, setting epoch to 0")
+
+            if self.hybridize:
+                if isinstance(self.net, mx.gluon.HybridBlock):
+                    self.net.hybridize(static_alloc=True, static_shape=True)
+                    self._export_prefix = hybrid_prefix
+                else:
+                    logging.info("Network is not a HybridBlock, running imperatively")
 
         # Read synset file
         # If synset is not specified, check whether model archive contains synset file.
@@ -215,6 +478,37 @@ class GluonImperativeBaseService(SingleNodeService):
             synset = archive_synset
             self.labels = [line.strip() for line in open(synset).readlines()]
 
+    def _import_hybrid(self, prefix):
+        symbol_file = prefix + "-symbol.json"
+        # Exported graphs name their inputs data, or data0, data1, ... for multiple inputs
+        input_names = [name for name in mx.sym.load(symbol_file).list_inputs() if re.match(r"data\d*$", name)]
+        net = mx.gluon.SymbolBlock.imports(symbol_file, input_names, prefix + "-0000.params", ctx=self.ctx)
+        net.hybridize(static_alloc=True, static_shape=True)
+        logging.info("Loaded hybridized network %s", symbol_file)
+        return net
+
+    def _export_hybrid(self):
+        prefix = self._export_prefix
+        self._export_prefix = None
+        tmp_prefix = "{}.{}".format(prefix, os.getpid())
+        try:
+            self.net.export(tmp_prefix)
+            # Workers of a model may start together, the symbol file is moved last so that
+            # it never exists without complete parameters.
+            os.rename(tmp_prefix + "-0000.params", prefix + "-0000.params")
+            os.rename(tmp_prefix + "-symbol.json", prefix + "-symbol.json")
+        except (IOError, OSError) as e:
+            logging.warning("Failed to export hybridized network: %s", e)
+
+    def _forward(self, *inputs):
+        """
+        Run the network, the hybridized graph is exported after the first forward computation.
+        """
+        output = self.net(*inputs)
+        if self._export_prefix is not None:
+            self._export_hybrid()
+        return output
+
     def _preprocess(self, data):
         pass
 
@@ -0,0 +1,150 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+INT8 quantization of MXNet symbolic models for CPU inference.
+
+Models are calibrated with inputs from the calibration file of the model archive, calibration.nd
+(NDArrays saved with mx.nd.save, as a dict keyed by input name or a list in input order) or
+calibration.npy for models with a single input. The quantized model is cached next to the model
+as <model_name>-int8-symbol.json and <model_name>-int8-0000.params. It can also be created before
+packaging the archive:
+
+    python -m mms.model_service.quantization --model-dir squeezenet --model-name squeezenet_v1.1
+"""
+import argparse
+import logging
+import os
+
+import mxnet as mx
+import numpy as np
+from mxnet.contrib import quantization
+
+CALIBRATION_FILES = ("calibration.nd", "calibration.npy")
+INT8_SUFFIX = "-int8"
+CALIB_BATCH_SIZE = 32
+
+
+def int8_prefix(model_dir, model_name):
+    return os.path.join(model_dir, model_name + INT8_SUFFIX)
+
+
+def load_calibration(model_dir, data_names):
+    """
+    Load calibration inputs of the model archive.
+
+    :param model_dir: model directory
+    :param data_names: input names of the model
+    :return: dict of input name and NDArray, None if the archive has no calibration file
+    """
+    for calib_file in CALIBRATION_FILES:
+        path = os.path.join(model_dir, calib_file)
+        if not os.path.isfile(path):
+            continue
+
+        if path.endswith(".npy"):
+            if len(data_names) != 1:
+                raise ValueError("calibration.npy is only supported for models with a single input.")
+            return {data_names[0]: mx.nd.array(np.load(path))}
+
+        arrays = mx.nd.load(path)
+        if isinstance(arrays, list):
+            arrays = dict(zip(data_names, arrays))
+        missing = [name for name in data_names if name not in arrays]
+        if missing:
+            raise ValueError("Calibration data is missing inputs: {}".format(", ".join(missing)))
+        return dict((name, arrays[name]) for name in data_names)
+
+    return None
+
+
+def quantize(sym, arg_params, aux_params, calib_data, calib_mode="naive", excluded_sym_names=None):
+    """
+    Quantize a model to INT8 and calibrate it with calib_data. Operators are fused for MKL-DNN
+    when MXNet is built with it.
+
+    :param sym: FP32 symbol
+    :param arg_params:
+    :param aux_params:
+    :param calib_data: dict of input name and NDArray of calibration samples
+    :param calib_mode: "naive" (min/max) or "entropy"
+    :param excluded_sym_names: names of layers kept in FP32
+    :return: quantized symbol, arg_params and aux_params
+    """
+    mkldnn = mx.runtime.Features().is_enabled("MKLDNN")
+    if mkldnn:
+        sym = sym.get_backend_symbol("MKLDNN_QUANTIZE")
+
+    data_names = list(calib_data.keys())
+    num_examples = calib_data[data_names[0]].shape[0]
+    calib_iter = mx.io.NDArrayIter(data=calib_data, batch_size=min(num_examples, CALIB_BATCH_SIZE))
+    qsym, qarg_params, qaux_params = quantization.quantize_model(
+        sym=sym, arg_params=arg_params, aux_params=aux_params, data_names=data_names, label_names=None,
+        ctx=mx.cpu(), excluded_sym_names=excluded_sym_names, calib_mode=calib_mode, calib_data=calib_iter,
+        num_calib_examples=num_examples, quantized_dtype="auto", quantize_mode="smart", logger=None)
+    if mkldnn:
+        qsym = qsym.get_backend_symbol("MKLDNN_QUANTIZE")
+    return qsym, qarg_params, qaux_params
+
+
+def save_quantized(prefix, sym, arg_params, aux_params):
+    """
+    Save a quantized model as checkpoint. Workers of a model may start together, the symbol file is
+    moved last so that it never exists without complete parameters.
+    """
+    tmp_prefix = "{}.{}".format(prefix, os.getpid())
+    mx.model.save_checkpoint(tmp_prefix, 0, sym, arg_params, aux_params)
+    os.rename(tmp_prefix + "-0000.params", prefix + "-0000.params")
+    os.rename(tmp_prefix + "-symbol.json", prefix + "-symbol.json")
+
+
+def load_quantized(model_dir, model_name, sym, arg_params, aux_params, data_names, calib_mode="naive",
+                   excluded_sym_names=None):
+    """
+    INT8 model of a model archive. The cached quantized model is loaded if present, otherwise the
+    model is quantized with the calibration data of the archive and cached.
+
+    :return: quantized symbol, arg_params and aux_params, None if the archive has no calibration data
+    """
+    prefix = int8_prefix(model_dir, model_name)
+    if os.path.isfile(prefix + "-symbol.json") and os.path.isfile(prefix + "-0000.params"):
+        logging.info("Loaded INT8 model %s", prefix)
+        return mx.model.load_checkpoint(prefix, 0)
+
+    calib_data = load_calibration(model_dir, data_names)
+    if calib_data is None:
+        return None
+
+    quantized = quantize(sym, arg_params, aux_params, calib_data, calib_mode, excluded_sym_names)
+    try:
+        save_quantized(prefix, *quantized)
+    except (IOError, OSError) as e:
+        logging.warning("Failed to save INT8 model: %s", e)
+    return quantized
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quantize a model to INT8 before packaging the model archive")
+    parser.add_argument("--model-dir", required=True, help="model directory with the calibration file")
+    parser.add_argument("--model-name", required=True, help="checkpoint prefix of the FP32 model")
+    parser.add_argument("--epoch", type=int, default=0)
+    parser.add_argument("--calib-mode", default="naive", choices=["naive", "entropy"])
+    parser.add_argument("--exclude", nargs="*", default=None, help="layers kept in FP32")
+    args = parser.parse_args()
+
+    fp32 = mx.model.load_checkpoint(os.path.join(args.model_dir, args.model_name), args.epoch)
+    inputs = [name for name in fp32[0].list_inputs()
+              if name not in fp32[1] and name not in fp32[2] and not name.endswith("_label")]
+    calibration = load_calibration(args.model_dir, inputs)
+    if calibration is None:
+        parser.error("No calibration file found in {}".format(args.model_dir))
+    save_quantized(int8_prefix(args.model_dir, args.model_name),
+                   *quantize(*fp32, calib_data=calibration, calib_mode=args.calib_mode,
+                             excluded_sym_names=args.exclude))
@@ -15,6 +15,7 @@ Communication message format: binary encoding
 
 # pylint: disable=redefined-builtin
 
+import json
 import logging
 import os
 import platform
@@ -23,8 +24,13 @@ import sys
 
 from mms.arg_parser import ArgParser
 from mms.model_loader import ModelLoaderFactory
-from mms.protocol.otf_message_handler import retrieve_msg, create_load_model_response
+from mms.metrics.metrics_channel import metrics_channel
+from mms.protocol.otf_message_handler import retrieve_msg, create_load_model_response, create_metrics_section, \
+    create_trace_section, create_profile_response, create_errors_section
 from mms.service import emit_metrics
+from mms.utils.memory_profiler import MemoryProfiler
+from mms.utils.runtime_profile import apply_runtime_profile, load_runtime_profile
+from mms.utils.sampling_profiler import SamplingProfiler
 
 MAX_FAILURE_THRESHOLD = 5
 SOCKET_ACCEPT_TIMEOUT = 30.0
@@ -35,6 +41,13 @@ class MXNetModelServiceWorker(object):
     """
     Backend worker to handle Model Server's python service code
     """
+
+    profiler = None
+    memory_profiler = None
+    # Request id of the running profiles, only their collect command gets the profile
+    profile_id = None
+    memory_profile_id = None
+
     def __init__(self, s_type=None, s_name=None, host_addr=None, port_num=None):
         if os.environ.get("OMP_NUM_THREADS") is None:
             os.environ["OMP_NUM_THREADS"] = "1"
@@ -92,6 +105,9 @@ class MXNetModelServiceWorker(object):
         if "gpu" in load_model_request:
             gpu = int(load_model_request["gpu"])
 
+        # Runtime profile is applied before the model handler imports mxnet
+        apply_runtime_profile(load_runtime_profile(model_dir))
+
         model_loader = ModelLoaderFactory.get_model_loader(model_dir)
         service = model_loader.load(model_name, model_dir, handler, gpu, batch_size)
 
@@ -99,6 +115,77 @@ class MXNetModelServiceWorker(object):
 
         return service, "loaded model {}".format(model_name), 200
 
+    def profile(self, profile_request):
+        """
+        Start the sampling profiler for a duration, or stop it and return the collapsed stacks
+        when the duration is 0. The collect command has the request id of its start command.
+        Batches are served while the profiler samples.
+
+        :param profile_request: dict with requestId and duration in milliseconds
+        :return: profile response
+        """
+        req_id = profile_request["requestId"].decode("utf-8")
+        duration = profile_request["duration"]
+        if duration > 0:
+            if self.profiler is None:
+                self.profiler = SamplingProfiler()
+            try:
+                self.profiler.start(duration / 1000.0)
+            except RuntimeError as e:
+                return create_profile_response(409, str(e), req_id)
+            self.profile_id = req_id
+            logging.info("Profiling worker for %d ms.", duration)
+            return create_profile_response(200, "Profiler started", req_id)
+
+        if self.profiler is None or not self.profiler.running or req_id != self.profile_id:
+            return create_profile_response(409, "Profiler is not running", req_id)
+        self.profile_id = None
+        samples = self.profiler.samples
+        profile = self.profiler.collapsed()
+        logging.info("Profile collected, %d samples.", samples)
+        return create_profile_response(200, "Profile collected", req_id, profile.encode("utf-8"))
+
+    def memory_profile(self, profile_request, service):
+        """
+        Start tracing memory allocations for a duration, or stop and return the growth of the Python
+        heap and of the NDArray storage as JSON when the duration is 0. The collect command has the
+        request id of its start command. Batches are served while allocations are traced.
+
+        :param profile_request: dict with requestId and duration in milliseconds
+        :param service: service of the loaded model
+        :return: profile response
+        """
+        req_id = profile_request["requestId"].decode("utf-8")
+        duration = profile_request["duration"]
+        if duration > 0:
+            if self.memory_profiler is None or not self.memory_profiler.running:
+                context = service.context if service is not None else None
+                if context is None:
+                    self.memory_profiler = MemoryProfiler()
+                else:
+                    self.memory_profiler = MemoryProfiler(context.model_name,
+                                                          context.system_properties.get("model_dir"))
+            try:
+                self.memory_profiler.start(duration / 1000.0)
+            except RuntimeError as e:
+                return create_profile_response(409, str(e), req_id)
+            self.memory_profile_id = req_id
+            logging.info("Tracing memory allocations for %d ms.", duration)
+            return create_profile_response(200, "Memory profiler started", req_id)
+
+        report = None
+        if self.memory_profiler is not None and req_id == self.memory_profile_id:
+            self.memory_profile_id = None
+            try:
+                report = self.memory_profiler.collect()
+            except RuntimeError:
+                pass
+        if report is None:
+            return create_profile_response(409, "Memory profiler is not running", req_id)
+        logging.info("Memory profile collected, Python heap grew by %d bytes.", report["python_heap"]["growth"])
+        return create_profile_response(200, "Memory profile collected", req_id, json.dumps(report).encode("utf-8"),
+                                       "application/json")
+
     def handle_connection(self, cl_socket):
         """
         Handle socket connection.
@@ -108,20 +195,33 @@ class MXNetModelServiceWorker(object):
         """
         service = None
         while True:
+            trace = None
+            errors = None
             cmd, msg = retrieve_msg(cl_socket)
             if cmd == b'I':
                 resp = service.predict(msg)
-                cl_socket.send(resp)
+                if service.context is not None and service.context.metrics is not None:
+                    emit_metrics(service.context.metrics.store)
+                if service.context is not None:
+                    trace = service.context.trace
+                    errors = service.context.request_errors
+            elif cmd == b'P':
+                resp = self.profile(msg)
+            elif cmd == b'M':
+                resp = self.memory_profile(msg, service)
             elif cmd == b'L':
                 service, result, code = self.load_model(msg)
                 resp = bytearray()
                 resp += create_load_model_response(code, result)
-                cl_socket.send(resp)
             else:
                 raise ValueError("Received unknown command: {}".format(cmd))
 
-            if service is not None and service.context is not None and service.context.metrics is not None:
-                emit_metrics(service.context.metrics.store)
+            # Queued metrics, including those of this batch, the spans of traced requests and the
+            # requests rejected on their own end the response frame
+            resp += create_metrics_section(metrics_channel.drain())
+            resp += create_trace_section(trace)
+            resp += create_errors_section(errors)
+            cl_socket.send(resp)
 
     def run_server(self):
         """
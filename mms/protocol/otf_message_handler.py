@@ -13,16 +13,22 @@ OTF Codec
 """
 import json
 import logging
+import numbers
 import struct
+import time
 
 from builtins import bytearray
 from builtins import bytes
 
+from mms.protocol import serializers
+
 
 int_size = 4
 END_OF_LIST = -1
 LOAD_MSG = b'L'
 PREDICT_MSG = b'I'
+PROFILE_MSG = b'P'
+MEMORY_PROFILE_MSG = b'M'
 RESPONSE = 3
 
 
@@ -38,6 +44,8 @@ def retrieve_msg(conn):
         msg = _retrieve_load_msg(conn)
     elif cmd == PREDICT_MSG:
         msg = _retrieve_inference_msg(conn)
+    elif cmd in (PROFILE_MSG, MEMORY_PROFILE_MSG):
+        msg = _retrieve_profile_msg(conn)
     else:
         raise ValueError("Invalid command: {}".format(cmd))
 
@@ -62,46 +70,149 @@ def create_predict_response(ret, req_id_map, message, code, context=None):
     msg += buf
 
     for idx in req_id_map:
-        buf = req_id_map[idx].encode('utf-8')
+        req_id = req_id_map[idx]
+        buf = req_id.encode('utf-8')
         msg += struct.pack("!i", len(buf))
         msg += buf
 
-        if context is None:
-            msg += struct.pack('!i', 0)  # content_type
-        else:
-            content_type = context.get_response_content_type(req_id_map[idx])
-            if content_type is None or len(content_type) == 0:
-                msg += struct.pack('!i', 0)  # content_type
-            else:
-                msg += struct.pack('!i', len(content_type))
-                msg += content_type.encode('utf-8')
+        content_type = None
+        if context is not None:
+            content_type = context.get_response_content_type(req_id)
 
         if ret is None:
             buf = b"error"
-            msg += struct.pack('!i', len(buf))
-            msg += buf
         else:
             val = ret[idx]
             if isinstance(val, str):
                 buf = val.encode("utf-8")
-                msg += struct.pack('!i', len(buf))
-                msg += buf
             elif isinstance(val, (bytes, bytearray)):
-                msg += struct.pack('!i', len(val))
-                msg += val
+                buf = val
             else:
+                output_type = content_type
+                if not serializers.has_encoder(output_type):
+                    output_type = _negotiate_content_type(context, req_id)
+                    if not content_type:
+                        content_type = output_type
                 try:
-                    json_value = json.dumps(val, indent=2).encode("utf-8")
-                    msg += struct.pack('!i', len(json_value))
-                    msg += json_value
-                except TypeError:
+                    buf = serializers.encode(output_type, val)
+                    if content_type == output_type:
+                        content_type = serializers.format_content_type(output_type, val)
+                except (TypeError, ValueError, OverflowError):
                     logging.warning("Unable to serialize model output.", exc_info=True)
                     return create_predict_response(None, req_id_map, "Unsupported model output data type.", 503)
 
+        if content_type is None or len(content_type) == 0:
+            msg += struct.pack('!i', 0)  # content_type
+        else:
+            content_type = content_type.encode('utf-8')
+            msg += struct.pack('!i', len(content_type))
+            msg += content_type
+
+        msg += struct.pack('!i', len(buf))
+        msg += buf
+
+    msg += struct.pack('!i', -1)  # End of list
+    return msg
+
+
+def create_profile_response(code, message, req_id, body=b"", content_type="text/plain"):
+    """
+    Create profile response, a frame with one prediction holding the profile.
+
+    :param code:
+    :param message:
+    :param req_id: request id of the profile command
+    :param body: collapsed stacks, or JSON memory report
+    :param content_type: content type of body
+    :return:
+    """
+    msg = bytearray()
+    msg += struct.pack('!i', code)
+
+    buf = message.encode("utf-8")
+    msg += struct.pack('!i', len(buf))
+    msg += buf
+
+    buf = req_id.encode("utf-8")
+    msg += struct.pack('!i', len(buf))
+    msg += buf
+    buf = content_type.encode("utf-8")
+    msg += struct.pack('!i', len(buf))
+    msg += buf
+    msg += struct.pack('!i', len(body))
+    msg += body
+
     msg += struct.pack('!i', -1)  # End of list
     return msg
 
 
+def create_metrics_section(metrics):
+    """
+    Metrics section that ends every response frame: length and JSON encoded list of metrics,
+    0 without metrics. Each metric is [name, unit, value, [[dimension, value], ...], request_id, timestamp].
+
+    :param metrics: list of (timestamp, Metric)
+    :return:
+    """
+    if not metrics:
+        return struct.pack('!i', 0)
+
+    items = []
+    for timestamp, metric in metrics:
+        value = metric.value
+        value = float(value) if isinstance(value, numbers.Number) else str(value)
+        dims = [[str(d.name), str(d.value)] for d in metric.dimensions]
+        items.append([metric.name, metric.unit, value, dims, metric.request_id, timestamp])
+    buf = json.dumps(items, separators=(",", ":")).encode("utf-8")
+    return struct.pack('!i', len(buf)) + buf
+
+
+def create_trace_section(trace):
+    """
+    Trace section that follows the metrics section: length and JSON encoded spans of each traced
+    request, 0 without traced requests. Spans are {request_id: [[name, milliseconds], ...]}.
+
+    :param trace: Trace of the batch, or None
+    :return:
+    """
+    if trace is None or not trace.spans:
+        return struct.pack('!i', 0)
+
+    spans = dict((req_id, [[name, round(duration, 3)] for name, duration in items])
+                 for req_id, items in trace.spans.items())
+    buf = json.dumps(spans, separators=(",", ":")).encode("utf-8")
+    return struct.pack('!i', len(buf)) + buf
+
+
+def create_errors_section(errors):
+    """
+    Errors section that ends the response frame: length and JSON encoded status code and message of
+    each request of the batch that failed on its own, 0 without such requests. Errors are
+    {request_id: [code, message]}.
+
+    :param errors: dict of (code, message) by request id, or None
+    :return:
+    """
+    if not errors:
+        return struct.pack('!i', 0)
+
+    buf = json.dumps(dict((req_id, [code, message]) for req_id, (code, message) in errors.items()),
+                     separators=(",", ":")).encode("utf-8")
+    return struct.pack('!i', len(buf)) + buf
+
+
+def _negotiate_content_type(context, req_id):
+    """
+    Select output serialization from the request Accept header, JSON by default.
+    """
+    if context is not None:
+        content_type = serializers.negotiate(context.get_request_header(req_id, "Accept"))
+        if content_type is not None:
+            return content_type
+
+    return serializers.JSON_CONTENT_TYPE
+
+
 def create_load_model_response(code, message):
     """
     Create load model response.
@@ -170,6 +281,26 @@ def _retrieve_load_msg(conn):
     return msg
 
 
+def _retrieve_profile_msg(conn):
+    """
+    MSG Frame Format:
+
+    | cmd value |
+    | int request-id length | request-id value |
+    | int duration in milliseconds, 0 to stop and collect the profile |
+
+    The same frame starts and collects CPU profiles (P) and memory profiles (M).
+
+    :param conn:
+    :return:
+    """
+    msg = dict()
+    length = _retrieve_int(conn)
+    msg["requestId"] = _retrieve_buffer(conn, length)
+    msg["duration"] = _retrieve_int(conn)
+    return msg
+
+
 def _retrieve_inference_msg(conn):
     """
     MSG Frame Format:
@@ -200,6 +331,7 @@ def _retrieve_request(conn):
     if length == -1:
         return None
 
+    start = time.time()
     request = dict()
     request["requestId"] = _retrieve_buffer(conn, length)
 
@@ -220,6 +352,11 @@ def _retrieve_request(conn):
         model_inputs.append(input_data)
 
     request["parameters"] = model_inputs
+    errors = [model_input["error"] for model_input in model_inputs if "error" in model_input]
+    if errors:
+        request["error"] = errors[0]
+    # Time spent reading and decoding the request, in milliseconds
+    request["decodeTime"] = (time.time() - start) * 1000
     return request
 
 
@@ -266,8 +403,15 @@ def _retrieve_input_data(conn):
     length = _retrieve_int(conn)
     value = _retrieve_buffer(conn, length)
 
-    if content_type == "application/json":
-        model_input["value"] = json.loads(value.decode("utf-8"))
+    if serializers.has_decoder(content_type):
+        # The payload, dtype and shape come from the client, a payload that does not decode only
+        # fails its request
+        # noinspection PyBroadException
+        try:
+            model_input["value"] = serializers.decode(content_type, value)
+        except Exception as e:  # pylint: disable=broad-except
+            model_input["value"] = value
+            model_input["error"] = "Invalid {} input {}: {}".format(content_type, model_input["name"], e)
     elif content_type.startswith("text"):
         model_input["value"] = value.decode("utf-8")
     else:
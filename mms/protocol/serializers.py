@@ -0,0 +1,323 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Serializer registry keyed by content type.
+
+Decoders turn request payload bytes into python objects, encoders turn model output
+into response bytes. JSON uses orjson or ujson when installed and falls back to the
+standard library. MessagePack is available when the msgpack package is installed.
+
+Binary tensors sent as application/x-npy, or as application/octet-stream with dtype and
+shape parameters, are decoded into numpy arrays that share memory with the request buffer.
+numpy arrays and MXNet NDArrays returned by handlers are encoded the same way on output.
+"""
+import io
+import json
+import struct
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+NPY_CONTENT_TYPE = "application/x-npy"
+OCTET_STREAM_CONTENT_TYPE = "application/octet-stream"
+
+_decoders = {}
+_encoders = {}
+_formatters = {}
+
+
+def parse_content_type(content_type):
+    """
+    Split a content type into a lower case media type and a dictionary of parameters.
+
+    :param content_type: e.g. "application/octet-stream; dtype=float32"
+    :return: tuple of media type and parameters
+    """
+    if not content_type:
+        return "", {}
+
+    tokens = content_type.split(";")
+    media_type = tokens[0].strip().lower()
+    params = dict()
+    for token in tokens[1:]:
+        if "=" not in token:
+            continue
+        key, value = token.split("=", 1)
+        params[key.strip().lower()] = value.strip().strip('"')
+
+    return media_type, params
+
+
+def register_serializer(content_type, decoder=None, encoder=None, formatter=None):
+    """
+    Register decoder and/or encoder for a media type. Existing entries are replaced.
+
+    :param content_type: media type, parameters are ignored
+    :param decoder: callable(buf, params) returning python object
+    :param encoder: callable(value) returning bytes
+    :param formatter: callable(value) returning the response content type of encoded value
+    """
+    media_type, _ = parse_content_type(content_type)
+    if decoder is not None:
+        _decoders[media_type] = decoder
+    if encoder is not None:
+        _encoders[media_type] = encoder
+    if formatter is not None:
+        _formatters[media_type] = formatter
+
+
+def has_decoder(content_type):
+    return parse_content_type(content_type)[0] in _decoders
+
+
+def has_encoder(content_type):
+    return parse_content_type(content_type)[0] in _encoders
+
+
+def decode(content_type, buf):
+    """
+    Decode request payload with the decoder registered for the content type.
+
+    :param content_type:
+    :param buf: bytes or bytearray
+    :return: decoded object
+    """
+    media_type, params = parse_content_type(content_type)
+    decoder = _decoders.get(media_type)
+    if decoder is None:
+        raise ValueError("No decoder registered for content type: {}".format(content_type))
+
+    return decoder(buf, params)
+
+
+def encode(content_type, value):
+    """
+    Encode model output with the encoder registered for the content type.
+
+    :param content_type:
+    :param value:
+    :return: bytes
+    """
+    media_type, _ = parse_content_type(content_type)
+    encoder = _encoders.get(media_type)
+    if encoder is None:
+        raise ValueError("No encoder registered for content type: {}".format(content_type))
+
+    return encoder(value)
+
+
+def format_content_type(content_type, value):
+    """
+    Response content type of value encoded as content_type. Encoders whose output
+    needs a description, like raw tensor bytes, add their parameters here.
+
+    :param content_type:
+    :param value:
+    :return: content type string
+    """
+    media_type, params = parse_content_type(content_type)
+    formatter = _formatters.get(media_type)
+    if formatter is None or params:
+        return content_type
+
+    return formatter(value)
+
+
+def negotiate(accept):
+    """
+    Pick the first media type from an Accept header that has a registered encoder.
+
+    :param accept: value of Accept header
+    :return: media type, or None when nothing matches
+    """
+    if not accept:
+        return None
+
+    for item in accept.split(","):
+        media_type, _ = parse_content_type(item)
+        if media_type in _encoders:
+            return media_type
+        if media_type in ("*/*", "application/*"):
+            return JSON_CONTENT_TYPE
+
+    return None
+
+
+def _json_decode(buf, params):  # pylint: disable=unused-argument
+    if orjson is not None:
+        return orjson.loads(buf)
+    if ujson is not None:
+        return ujson.loads(buf.decode("utf-8"))
+    return json.loads(buf.decode("utf-8"))
+
+
+def _to_builtin(value):
+    """
+    JSON fallback for array outputs: NDArray and numpy values are converted to lists.
+    """
+    if hasattr(value, "asnumpy"):
+        value = value.asnumpy()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError("Object of type {} is not JSON serializable".format(type(value).__name__))
+
+
+def _json_encode(value):
+    if orjson is not None:
+        return orjson.dumps(value, default=_to_builtin, option=orjson.OPT_SERIALIZE_NUMPY)
+    if ujson is not None:
+        try:
+            return ujson.dumps(value, ensure_ascii=False).encode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(value, separators=(",", ":"), default=_to_builtin).encode("utf-8")
+
+
+def _msgpack_decode(buf, params):  # pylint: disable=unused-argument
+    return msgpack.unpackb(bytes(buf), raw=False)
+
+
+def _msgpack_encode(value):
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def parse_shape(shape):
+    """
+    Parse a shape parameter such as "3,224,224", "(3, 224, 224)" or "3x224x224".
+    """
+    shape = shape.strip("()[] ").replace("x", ",")
+    return tuple(int(dim) for dim in shape.split(",") if dim.strip())
+
+
+def _npy_decode(buf, params):  # pylint: disable=unused-argument
+    """
+    Decode an npy file without copying the array data, the header is parsed and
+    the array is created with numpy.frombuffer on the request buffer.
+    """
+    view = memoryview(buf)
+    if len(view) < 10 or view[:6].tobytes() != b"\x93NUMPY":
+        raise ValueError("Invalid npy payload")
+
+    major = bytearray(view[6:7])[0]
+    if major == 1:
+        header_end = 10 + struct.unpack("<H", view[8:10].tobytes())[0]
+    elif major in (2, 3):
+        header_end = 12 + struct.unpack("<I", view[8:12].tobytes())[0]
+    else:
+        raise ValueError("Unsupported npy version: {}".format(major))
+
+    fp = io.BytesIO(view[:header_end].tobytes())
+    version = np.lib.format.read_magic(fp)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fp)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fp)
+    if dtype.hasobject:
+        raise ValueError("Object arrays are not supported")
+
+    count = 1
+    for dim in shape:
+        count *= dim
+    array = np.frombuffer(buf, dtype=dtype, count=count, offset=header_end)
+    return array.reshape(shape, order="F" if fortran_order else "C")
+
+
+def _raw_tensor_decode(buf, params):
+    """
+    Decode raw tensor bytes described by dtype and shape content type parameters.
+    Payloads without a dtype parameter are passed through as bytes.
+    """
+    dtype = params.get("dtype")
+    if dtype is None:
+        return buf
+
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        raise ValueError("Unsupported dtype: {}".format(dtype))
+    if dtype.hasobject:
+        raise ValueError("Object arrays are not supported")
+    array = np.frombuffer(buf, dtype=dtype)
+    shape = params.get("shape")
+    if shape is not None:
+        array = array.reshape(parse_shape(shape))
+    return array
+
+
+def _as_array(value):
+    if hasattr(value, "asnumpy"):
+        value = value.asnumpy()
+    return np.asarray(value, order="C")
+
+
+def _npy_encode(value):
+    """
+    Encode an array as npy file, the array data is appended to the header without
+    an intermediate file object.
+    """
+    array = _as_array(value)
+    if array.dtype.hasobject:
+        raise TypeError("Object arrays are not supported")
+
+    fp = io.BytesIO()
+    np.lib.format.write_array_header_1_0(fp, np.lib.format.header_data_from_array_1_0(array))
+    buf = bytearray(fp.getvalue())
+    buf += array.data
+    return buf
+
+
+def _raw_tensor_encode(value):
+    if isinstance(value, (bytes, bytearray)):
+        return value
+    return _as_array(value).tobytes()
+
+
+def _raw_tensor_content_type(value):
+    if isinstance(value, (bytes, bytearray)):
+        return OCTET_STREAM_CONTENT_TYPE
+    if hasattr(value, "asnumpy"):
+        # Avoid a second copy of NDArray data, dtype and shape are known without synchronizing
+        dtype, shape = np.dtype(value.dtype), value.shape
+    else:
+        array = _as_array(value)
+        dtype, shape = array.dtype, array.shape
+    return "{};dtype={};shape={}".format(OCTET_STREAM_CONTENT_TYPE, dtype.name, ",".join(str(dim) for dim in shape))
+
+
+register_serializer(JSON_CONTENT_TYPE, _json_decode, _json_encode)
+
+if msgpack is not None:
+    register_serializer(MSGPACK_CONTENT_TYPE, _msgpack_decode, _msgpack_encode)
+    register_serializer("application/x-msgpack", _msgpack_decode, _msgpack_encode)
+
+if np is not None:
+    register_serializer(NPY_CONTENT_TYPE, _npy_decode, _npy_encode)
+    register_serializer(OCTET_STREAM_CONTENT_TYPE, _raw_tensor_decode, _raw_tensor_encode,
+                        _raw_tensor_content_type)
@@ -12,16 +12,24 @@
 CustomService class definitions
 """
 import logging
+import os
+import random
 import time
 
-from builtins import str
 
 import mms
 from mms.context import Context, RequestProcessor
+from mms.metrics.metrics_aggregator import MetricsAggregator, METRICS_SAMPLE_RATE_ENV
+from mms.metrics.metrics_channel import metrics_channel
 from mms.metrics.metrics_store import MetricsStore
+from mms.metrics.statsd_emitter import StatsdEmitter
+from mms.metrics.trace import TRACE_HEADER, Trace
 from mms.protocol.otf_message_handler import create_predict_response
 
 PREDICTION_METRIC = 'PredictionTime'
+QUEUE_METRIC = 'QueueTime'
+# Epoch milliseconds at which the frontend queued the request, set by the frontend BatchAggregator
+ENQUEUE_TIME_HEADER = 'X-MMS-Enqueue-Time'
 logger = logging.getLogger(__name__)
 
 
@@ -30,9 +38,18 @@ class Service(object):
     Wrapper for custom entry_point
     """
 
+    _aggregator = None
+    _sample_rate = 0.0
+    _emitter = None
+
     def __init__(self, model_name, model_dir, manifest, entry_point, gpu, batch_size):
         self._context = Context(model_name, model_dir, manifest, batch_size, gpu, mms.__version__)
         self._entry_point = entry_point
+        # Metrics are aggregated in the worker, per request metrics are emitted for a sample of batches
+        self._aggregator = MetricsAggregator(model_name, emit=emit_metrics)
+        self._sample_rate = float(os.environ.get(METRICS_SAMPLE_RATE_ENV, 0))
+        # Metrics are also sent to a local StatsD agent when MMS_STATSD_ADDRESS is set
+        self._emitter = StatsdEmitter.from_env(model_name)
 
     @property
     def context(self):
@@ -94,12 +111,23 @@ class Service(object):
         :return:
 
         """
+        batch, errors = Service._reject_invalid(batch)
+        self.context.request_errors = errors
+        if errors and not batch:
+            self.context.metrics = None
+            self.context.trace = None
+            return create_predict_response([], {}, "Invalid request", 200)
+
         headers, input_batch, req_id_map = Service.retrieve_data_for_inference(batch)
 
         self.context.request_ids = req_id_map
         self.context.request_processor = RequestProcessor(headers)
-        metrics = MetricsStore(req_id_map, self.context.model_name)
+        sample = self._aggregator is None or (self._sample_rate > 0 and random.random() < self._sample_rate)
+        metrics = MetricsStore(req_id_map, self.context.model_name, self._aggregator, sample, self._emitter)
         self.context.metrics = metrics
+        self._add_batch_metrics(metrics, headers, req_id_map)
+        trace = self._start_trace(batch, headers, req_id_map)
+        self.context.trace = trace
 
         start_time = time.time()
 
@@ -119,15 +147,93 @@ class Service(object):
                            self.context.model_name, len(input_batch), len(ret))
             return create_predict_response(None, req_id_map, "number of batch response mismatched", 503)
 
+        # Outputs may be materialized while they are encoded, e.g. NDArrays of asynchronous
+        # forward computation, errors raised on encoding fail the prediction.
+        handler_end = time.time()
+        # noinspection PyBroadException
+        try:
+            resp = create_predict_response(ret, req_id_map, "Prediction success", 200, context=self.context)
+        except Exception:  # pylint: disable=broad-except
+            logger.warning("Materializing model output failed.", exc_info=True)
+            return create_predict_response(None, req_id_map, "Prediction failed", 503)
+        if trace is not None:
+            trace.add("handler", (handler_end - start_time) * 1000)
+            trace.add("response", (time.time() - handler_end) * 1000)
+
         duration = round((time.time() - start_time) * 1000, 2)
         metrics.add_time(PREDICTION_METRIC, duration)
 
-        return create_predict_response(ret, req_id_map, "Prediction success", 200, context=self.context)
+        return resp
+
+    @staticmethod
+    def _reject_invalid(batch):
+        """
+        Remove the requests whose inputs could not be decoded from the batch, they fail with a 400
+        while the rest of the batch is predicted.
+
+        :param batch: list of request
+        :return: valid requests, and dict of (400, message) by request id of the rejected requests
+        """
+        if batch is None:
+            return batch, dict()
+        errors = dict()
+        valid = []
+        for request in batch:
+            if request.get("error") is None:
+                valid.append(request)
+                continue
+            req_id = request["requestId"].decode("utf-8")
+            logger.info("Rejected request %s: %s", req_id, request["error"])
+            errors[req_id] = (400, request["error"])
+        return valid, errors
+
+    @staticmethod
+    def _start_trace(batch, headers, req_id_map):
+        """
+        Trace of the requests of the batch the frontend marked with the X-MMS-Trace header.
+
+        :return: Trace, or None when no request of the batch is traced
+        """
+        traced = dict((idx, req_id) for idx, req_id in req_id_map.items()
+                      if headers[req_id].get(TRACE_HEADER) is not None)
+        if not traced:
+            return None
+        trace = Trace(traced)
+        for idx in traced:
+            decode_time = batch[idx].get("decodeTime")
+            if decode_time is not None:
+                trace.add("decode", decode_time, idx)
+        return trace
+
+    def _add_batch_metrics(self, metrics, headers, req_id_map):
+        """
+        Batching efficiency: the size of the batch against the configured batch size, and the time
+        each request waited in the frontend since it was queued.
+
+        :param metrics: MetricsStore of the batch
+        :param headers: request headers, by request id
+        :param req_id_map: request ids, by index in the batch
+        """
+        now = time.time() * 1000
+        for idx, req_id in req_id_map.items():
+            enqueue_time = headers[req_id].get(ENQUEUE_TIME_HEADER)
+            if enqueue_time is None:
+                continue
+            try:
+                # Clocks of the frontend and the worker are the same host clock, skew is only rounding
+                metrics.add_time(QUEUE_METRIC, round(max(now - float(enqueue_time), 0), 2), idx)
+            except ValueError:
+                logger.debug("Invalid %s header: %s", ENQUEUE_TIME_HEADER, enqueue_time)
+
+        batch_size = self.context.system_properties.get("batch_size") or 1
+        metrics.add_metric("BatchSize", len(req_id_map), unit="count")
+        metrics.add_percent("BatchFill", round(100.0 * len(req_id_map) / batch_size, 2))
 
 
 def emit_metrics(metrics):
     """
-    Emit the metrics in the provided Dictionary
+    Queue the metrics in the provided Dictionary for the frontend, they are sent with the
+    next response frame. Does not block.
 
     Parameters
     ----------
@@ -136,5 +242,4 @@ def emit_metrics(metrics):
     value is a metric object
     """
     if metrics:
-        for met in metrics:
-            logger.info("[METRICS]%s", str(met))
+        metrics_channel.put(metrics)
@@ -109,7 +109,7 @@ class Pixel2pixelService(MXNetBaseService):
 
     def _postprocess(self, data):
         img_arr = ((data[0] + 1.0) * 127.5).astype(np.uint8)
-        return [image.write(img_arr)]
+        return [image.encode(img_arr)]
 
 
 
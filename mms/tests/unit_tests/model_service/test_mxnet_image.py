@@ -52,6 +52,13 @@ class TestMXNetImageUtils(unittest.TestCase):
         output2 = image.read(input_buf2, flag=0)
         assert output2.shape == (128, 128, 1), "Read method failed. Got %s shape." % (str(output2.shape))
 
+    def test_read_reduced(self):
+        input1 = mx.nd.random.uniform(0, 255, shape=(3, 512, 640))
+        input_buf1 = self._write_image(input1)
+        output1 = image.read(input_buf1, size=(224, 224))
+        assert output1.shape == (256, 320, 3), "Read method failed. Got %s shape." % (str(output1.shape))
+        assert output1.dtype == np.uint8, "Read method failed. Got %s dtype." % output1.dtype
+
     def test_write(self):
         input1 = mx.nd.random.uniform(0, 255, shape=(3, 256, 256))
         output1 = image.write(input1)
@@ -61,6 +68,19 @@ class TestMXNetImageUtils(unittest.TestCase):
         output2 = image.write(input2, flag=0, dim_order='HWC')
         assert isinstance(output2, str), "Write method failed. Output is not a string."
 
+    def test_encode(self):
+        input1 = mx.nd.random.uniform(0, 255, shape=(3, 64, 32))
+        output1 = image.encode(input1, format='png')
+        decoded = PIL.Image.open(BytesIO(output1))
+        assert decoded.size == (32, 64), "Encode method failed. Got %s size." % (str(decoded.size))
+        assert image.content_type('PNG') == 'image/png'
+        assert image.content_type('jpg') == 'image/jpeg'
+
+        inputs = mx.nd.random.uniform(0, 255, shape=(3, 3, 16, 16))
+        outputs = image.encode_batch(inputs)
+        assert len(outputs) == 3, "encode_batch method failed."
+        assert all(PIL.Image.open(BytesIO(o)).format == 'JPEG' for o in outputs)
+
     def test_resize(self):
         input1 = mx.nd.random.uniform(0, 255, shape=(245, 156, 3))
         output1 = image.resize(input1, 128, 256)
@@ -80,6 +100,7 @@ class TestMXNetImageUtils(unittest.TestCase):
         self.test_transform_shape()
         self.test_read()
         self.test_write()
+        self.test_encode()
         self.test_resize()
         self.test_fix_crop()
         self.test_color_normalize()
\ No newline at end of file
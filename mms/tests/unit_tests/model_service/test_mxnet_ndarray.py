@@ -15,6 +15,7 @@ sys.path.append(curr_path + '/../../..')
 
 import unittest
 import mxnet as mx
+import numpy as np
 import utils.mxnet.ndarray as ndarray
 
 class TestMXNetNDArrayUtils(unittest.TestCase):
@@ -25,5 +26,20 @@ class TestMXNetNDArrayUtils(unittest.TestCase):
         output = ndarray.top_probability(data, labels, top=top)
         assert len(output) == top, "top_probability method failed."
 
+    def test_top_k(self):
+        labels = ['label %d' % i for i in range(10)]
+        data = np.array([np.arange(10) / 10.0, np.arange(10)[::-1] / 10.0], dtype=np.float32)
+        output = ndarray.top_k(mx.nd.array(data), labels, top=3)
+        assert [[p['class'] for p in row] for row in output] == \
+            [['label 9', 'label 8', 'label 7'], ['label 0', 'label 1', 'label 2']]
+        assert abs(output[0][0]['probability'] - 0.9) < 1e-6
+
+    def test_top_k_all_classes(self):
+        labels = ['a', 'b', 'c']
+        output = ndarray.top_k(np.array([[0.2, 0.5, 0.3]]).reshape(1, 3, 1, 1), labels, top=5)
+        assert [p['class'] for p in output[0]] == ['b', 'c', 'a']
+
     def runTest(self):
         self.test_top_prob()
+        self.test_top_k()
+        self.test_top_k_all_classes()
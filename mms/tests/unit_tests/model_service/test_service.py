@@ -21,7 +21,10 @@ import mxnet as mx
 import numpy as np
 import pytest
 from helper.pixel2pixel_service import UnetGenerator
+from mms.context import Context
+from mms.metrics.metrics_store import MetricsStore
 from mms.model_service.mxnet_model_service import MXNetBaseService, GluonImperativeBaseService
+from mms.model_service.mxnet_vision_service import MXNetVisionService
 
 curr_path = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(curr_path + '/../..')
@@ -224,6 +227,246 @@ class TestService(unittest.TestCase):
             MXNetBaseService('test', model_path, manifest)
         os.system('rm -rf %s' % model_path)
 
+    def _export_dense_model(self, model_path):
+        data = mx.sym.Variable('data')
+        sym = mx.sym.softmax(mx.sym.FullyConnected(data=data, num_hidden=3, name='fc'), name='softmax')
+        mod = mx.mod.Module(symbol=sym, data_names=('data',), label_names=None)
+        mod.bind(for_training=False, data_shapes=[('data', (1, 4))])
+        mod.init_params()
+        mod.save_checkpoint('%s/dense' % model_path, 0)
+
+        with open('%s/signature.json' % model_path, 'w') as sig:
+            json.dump({
+                "input_type": "application/json",
+                "inputs": [{'data_name': 'data', 'data_shape': [1, 4]}],
+                "output_type": "application/json",
+                "outputs": [{'data_name': 'softmax', 'data_shape': [1, 3]}]
+            }, sig)
+
+        return {
+            "Model": {
+                "Symbol": "dense-symbol.json",
+                "Parameters": "dense-0000.params",
+                "Signature": "signature.json",
+                "Model-Name": "dense"
+            }
+        }
+
+    def test_mxnet_model_service_batch(self):
+        model_path = self.test_dir
+        manifest = self._export_dense_model(model_path)
+        requests = [{'data': json.dumps([[i, 1.0, 2.0, 3.0]]).encode('utf-8')} for i in range(3)]
+
+        single = MXNetBaseService('dense', model_path, manifest)
+        single.initialize(Context('dense', model_path, manifest, 1, None, '1.0'))
+        expected = [single.handle([request], None)[0] for request in requests]
+
+        service = MXNetBaseService('dense', model_path, manifest)
+        context = Context('dense', model_path, manifest, 4, None, '1.0')
+        service.initialize(context)
+        assert service.mx_model.data_shapes[0].shape == (4, 4)
+
+        context.metrics = MetricsStore({0: 'a', 1: 'b', 2: 'c'}, 'dense')
+        results = service.handle(requests, context)
+        assert [m.value for m in context.metrics.store if m.name == 'BatchPadding'] == [25]
+        assert len(results) == 3
+        for result, single_result in zip(results, expected):
+            assert result.shape == (1, 3)
+            np.testing.assert_allclose(result, single_result, rtol=1e-5)
+        # Partial batches are padded instead of reshaping the module
+        assert service.mx_model.data_shapes[0].shape == (4, 4)
+
+    def _export_conv_model(self, model_path, shape_buckets=None, global_pool=True):
+        data = mx.sym.Variable('data')
+        sym = mx.sym.Convolution(data=data, kernel=(3, 3), pad=(1, 1), num_filter=4, name='conv')
+        if global_pool:
+            sym = mx.sym.flatten(mx.sym.Pooling(data=sym, kernel=(1, 1), global_pool=True, pool_type='max'))
+        mod = mx.mod.Module(symbol=sym, data_names=('data',), label_names=None)
+        mod.bind(for_training=False, data_shapes=[('data', (1, 3, 8, 8))])
+        mod.init_params()
+        mod.save_checkpoint('%s/conv' % model_path, 0)
+
+        sig_input = {'data_name': 'data', 'data_shape': [0, 3, 0, 0]}
+        if shape_buckets is not None:
+            sig_input['shape_buckets'] = shape_buckets
+        with open('%s/signature.json' % model_path, 'w') as sig:
+            json.dump({
+                "input_type": "application/json",
+                "inputs": [sig_input],
+                "output_type": "application/json",
+                "outputs": [{'data_name': 'output', 'data_shape': [1, 4]}]
+            }, sig)
+
+        return {
+            "Model": {
+                "Symbol": "conv-symbol.json",
+                "Parameters": "conv-0000.params",
+                "Signature": "signature.json",
+                "Model-Name": "conv"
+            }
+        }
+
+    def test_mxnet_model_service_variable_shape(self):
+        model_path = self.test_dir
+        manifest = self._export_conv_model(model_path)
+        service = MXNetBaseService('conv', model_path, manifest)
+        service.max_cached_shapes = 2
+        service.initialize(Context('conv', model_path, manifest, 1, None, '1.0'))
+        assert service.signature['inputs'][0]['data_shape'] == [0, 3, 0, 0]
+
+        for size in (16, 24, 16, 32, 16):
+            output = service._inference([mx.nd.ones((1, 3, size, size))])
+            assert output[0].shape == (1, 4)
+
+        assert service.bind_count == 3
+        assert service.cache_hits == 2
+        assert len(service._executor_cache) == 2
+        # Executors share parameters with the main module
+        np.testing.assert_allclose(service._inference([mx.nd.ones((1, 3, 16, 16))])[0].asnumpy(),
+                                   service._inference([mx.nd.ones((1, 3, 32, 32))])[0].asnumpy(), rtol=1e-5)
+
+    def test_mxnet_model_service_shape_buckets(self):
+        model_path = self.test_dir
+        manifest = self._export_conv_model(model_path, {"2": [16, 32], "3": [16, 32]})
+        service = MXNetBaseService('conv', model_path, manifest)
+        service.initialize(Context('conv', model_path, manifest, 1, None, '1.0'))
+
+        for size in (10, 12, 16, 20, 30):
+            service._inference([mx.nd.ones((1, 3, size, size))])
+
+        assert service.bind_count == 2
+        assert sorted(service._executor_cache) == [((1, 3, 16, 16),), ((1, 3, 32, 32),)]
+
+    def test_mxnet_model_service_shape_buckets_crop_outputs(self):
+        model_path = self.test_dir
+        manifest = self._export_conv_model(model_path, {"2": [16, 32], "3": [16, 32]}, global_pool=False)
+        requests = [{'data': json.dumps(np.random.rand(1, 3, size, size).tolist()).encode('utf-8')}
+                    for size in (10, 12)]
+        service = MXNetBaseService('conv', model_path, manifest)
+        service._shape_buckets = [dict()]
+        service.initialize(Context('conv', model_path, manifest, 1, None, '1.0'))
+        expected = service.handle(requests, None)
+
+        service = MXNetBaseService('conv', model_path, manifest)
+        service.initialize(Context('conv', model_path, manifest, 2, None, '1.0'))
+        results = service.handle(requests, None)
+
+        # Outputs of the padded spatial axes are cropped back to the input size
+        assert [result.shape for result in results] == [(1, 4, 10, 10), (1, 4, 12, 12)]
+        for result, single_result in zip(results, expected):
+            np.testing.assert_allclose(result, single_result, rtol=1e-5)
+
+    def test_mxnet_model_service_lazy_outputs(self):
+        model_path = self.test_dir
+        manifest = self._export_conv_model(model_path)
+        requests = [{'data': json.dumps(np.ones((1, 3, size, size)).tolist()).encode('utf-8')}
+                    for size in (16, 24, 16)]
+
+        service = MXNetBaseService('conv', model_path, manifest)
+        service.initialize(Context('conv', model_path, manifest, 4, None, '1.0'))
+        expected = service.handle(requests, None)
+
+        service.lazy_outputs = True
+        results = service.handle(requests, None)
+        for result, expected_result in zip(results, expected):
+            assert isinstance(result, mx.nd.NDArray)
+            np.testing.assert_allclose(result.asnumpy(), expected_result, rtol=1e-5)
+
+    def test_mxnet_vision_service_batch(self):
+        model_path = self.test_dir
+        manifest = self._export_conv_model(model_path)
+        with open('%s/signature.json' % model_path, 'w') as sig:
+            json.dump({"input_type": "image/jpeg", "inputs": [{'data_name': 'data', 'data_shape': [1, 3, 16, 16]}],
+                       "output_type": "application/json"}, sig)
+        with open('%s/synset.txt' % model_path, 'w') as synset:
+            synset.write('\n'.join('label %d' % i for i in range(4)))
+        requests = [{'data': self._write_image(mx.nd.random.uniform(0, 255, shape=(3, h, w)))}
+                    for h, w in ((64, 48), (20, 30), (16, 16))]
+
+        service = MXNetVisionService('conv', model_path, manifest)
+        context = Context('conv', model_path, manifest, 4, None, '1.0')
+        service.initialize(context)
+        context.metrics = MetricsStore({0: 'a', 1: 'b', 2: 'c'}, 'conv')
+        results = service.handle(requests, None)
+        assert len(results) == 3
+        assert sorted(m.request_id for m in context.metrics.store if m.name == 'ImagePreprocessTime') == ['a', 'b', 'c']
+
+        # Batched preprocessing matches preprocessing each request
+        for request, result in zip(requests, results):
+            expected = service.inference([request['data']])[0]
+            assert [r['class'] for r in result] == [r['class'] for r in expected]
+            np.testing.assert_allclose([r['probability'] for r in result], [r['probability'] for r in expected],
+                                       rtol=1e-5)
+
+    def test_mxnet_model_service_quantize(self):
+        class QuantizedService(MXNetBaseService):
+            quantize = True
+
+        model_path = self.test_dir
+        manifest = self._export_conv_model(model_path)
+        data = mx.nd.random.uniform(shape=(2, 3, 8, 8))
+        expected = MXNetBaseService('conv', model_path, manifest)._inference([data])[0].asnumpy()
+
+        # Without calibration data the FP32 model runs
+        service = QuantizedService('conv', model_path, manifest)
+        assert not os.path.isfile(os.path.join(model_path, 'conv-int8-symbol.json'))
+
+        mx.nd.save(os.path.join(model_path, 'calibration.nd'), {'data': mx.nd.random.uniform(shape=(16, 3, 8, 8))})
+        service = QuantizedService('conv', model_path, manifest)
+        assert os.path.isfile(os.path.join(model_path, 'conv-int8-symbol.json'))
+        assert os.path.isfile(os.path.join(model_path, 'conv-int8-0000.params'))
+        output = service._inference([data])[0].asnumpy()
+        np.testing.assert_allclose(output, expected, atol=0.05 * np.abs(expected).max())
+
+        # Cached INT8 model is loaded without calibration
+        os.remove(os.path.join(model_path, 'calibration.nd'))
+        service = QuantizedService('conv', model_path, manifest)
+        np.testing.assert_allclose(service._inference([data])[0].asnumpy(), output, rtol=1e-5)
+
+    def test_mxnet_model_service_mmap_params(self):
+        class MappedService(MXNetBaseService):
+            mmap_params = True
+
+        model_path = self.test_dir
+        manifest = self._export_dense_model(model_path)
+        data = [mx.nd.random.uniform(shape=(1, 4))]
+        expected = MXNetBaseService('dense', model_path, manifest)._inference(data)[0].asnumpy()
+        assert not os.path.isfile(os.path.join(model_path, 'dense-0000.params.mmap'))
+
+        service = MappedService('dense', model_path, manifest)
+        assert os.path.isfile(os.path.join(model_path, 'dense-0000.params.mmap'))
+        assert os.path.isfile(os.path.join(model_path, 'dense-0000.params.mmap.json'))
+        np.testing.assert_allclose(service._inference(data)[0].asnumpy(), expected, rtol=1e-5)
+
+        # Archives with the mmap layout are mapped without opting in
+        service = MXNetBaseService('dense', model_path, manifest)
+        np.testing.assert_allclose(service._inference(data)[0].asnumpy(), expected, rtol=1e-5)
+        arg_params, _ = service.mx_model.get_params()
+        np.testing.assert_allclose(arg_params['fc_weight'].asnumpy(),
+                                   mx.nd.load('%s/dense-0000.params' % model_path)['arg:fc_weight'].asnumpy())
+
+    def test_gluon_hybrid_export(self):
+        class HybridService(GluonImperativeBaseService):
+            hybridize = True
+
+        model_path = module_dir(self.test_dir)
+        create_imperative_manifest(model_path)
+        manifest = json.load(open(os.path.join(model_path, 'MANIFEST.json')))
+        net = mx.gluon.nn.HybridSequential()
+        net.add(mx.gluon.nn.Dense(4, in_units=3))
+        net.initialize()
+        data = mx.nd.ones((1, 3))
+
+        service = HybridService('test', model_path, manifest, net)
+        expected = service._forward(data).asnumpy()
+        assert os.path.isfile(os.path.join(model_path, 'test-hybrid-symbol.json'))
+        assert os.path.isfile(os.path.join(model_path, 'test-hybrid-0000.params'))
+
+        # Later workers import the exported graph instead of the network given by the service
+        service = HybridService('test', model_path, manifest)
+        assert isinstance(service.net, mx.gluon.SymbolBlock)
+        np.testing.assert_allclose(service._forward(data).asnumpy(), expected, rtol=1e-5)
+
     def test_gluon_model_service(self):
         mod_dir = module_dir(self.test_dir)
         if mod_dir.startswith('~'):
@@ -0,0 +1,91 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Batch buffer pool tests
+"""
+
+import numpy as np
+import pytest
+
+from mms.utils.batch_buffer import BatchBuffer, BatchBufferPool
+
+SIGNATURE = {
+    "inputs": [{"data_name": "data", "data_shape": [0, 3, 4, 4]}]
+}
+
+
+# noinspection PyClassHasNoInit
+class TestBatchBuffer:
+
+    def test_append_and_padding(self):
+        buf = BatchBuffer("data", (4, 2, 2))
+        storage = buf.data
+        buf.append(np.ones((2, 2), dtype=np.uint8))
+        buf.next_slot()[:] = 2
+
+        assert buf.fill == 2
+        assert buf.pad == 2
+        assert buf.data.dtype == np.float32
+        assert buf.filled().shape == (2, 2, 2)
+        assert storage[1, 0, 0] == 2
+
+        buf.data[2:] = 7
+        buf.clear_padding()
+        assert not buf.data[2:].any()
+
+        buf.reset()
+        assert buf.fill == 0
+        assert buf.data is storage
+
+    def test_full(self):
+        buf = BatchBuffer("data", (1, 2))
+        buf.next_slot()
+        with pytest.raises(ValueError, match="is full"):
+            buf.next_slot()
+
+    def test_wildcard_shape(self):
+        with pytest.raises(ValueError, match="fixed shape"):
+            BatchBuffer("data", (1, 0, 2))
+
+    def test_ndarray_slots(self):
+        mx = pytest.importorskip("mxnet")
+        buf = BatchBuffer("data", (2, 3, 2, 2), ctx=mx.cpu())
+        img = mx.nd.ones((2, 2, 3), dtype="uint8")
+        buf.next_slot()[:] = mx.nd.transpose(img, (2, 0, 1))
+
+        assert isinstance(buf.data, mx.nd.NDArray)
+        result = buf.data.asnumpy()
+        assert (result[0] == 1).all()
+        assert not result[1].any()
+
+
+# noinspection PyClassHasNoInit
+class TestBatchBufferPool:
+
+    def test_from_signature(self):
+        pool = BatchBufferPool.from_signature(SIGNATURE, 8)
+        buffers = pool.acquire()
+        assert len(buffers) == 1
+        assert buffers[0].name == "data"
+        assert buffers[0].shape == (8, 3, 4, 4)
+
+    def test_round_robin(self):
+        pool = BatchBufferPool.from_signature(SIGNATURE, 2, depth=2)
+        first = pool.acquire()[0]
+        first.next_slot()
+        second = pool.acquire()[0]
+        assert second is not first
+        assert pool.acquire()[0] is first
+        assert first.fill == 0
+
+    def test_invalid_depth(self):
+        with pytest.raises(ValueError):
+            BatchBufferPool([("data", (1, 2))], depth=0)
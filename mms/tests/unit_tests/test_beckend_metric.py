@@ -3,6 +3,7 @@ import sys
 
 import pytest
 from mms.metrics.dimension import Dimension
+from mms.metrics.metrics_channel import metrics_channel
 from mms.metrics.metrics_store import MetricsStore
 from mms.service import emit_metrics
 
@@ -24,7 +25,7 @@ def get_error_key(name, unit):
     return '-'.join(dim_str)
 
 
-def test_metrics(caplog):
+def test_metrics():
     """
     Test if metric classes methods behave as expected
     Also checks global metric service methods
@@ -54,10 +55,12 @@ def test_metrics(caplog):
     test_metric = metrics.cache[get_model_key('CorrectCounter', 'count', all_req_ids, model_name)]
     assert test_metric.value == 4
     # Check what is emitted is correct
+    metrics_channel.drain()
     emit_metrics(metrics.store)
+    emitted = "\n".join(str(metric) for _, metric in metrics_channel.drain())
 
-    assert "hjshfj" in caplog.text
-    assert "ModelName:dummy model" in caplog.text
+    assert "hjshfj" in emitted
+    assert "ModelName:dummy model" in emitted
 
     # Adding other types of metrics
     # Check for time metric
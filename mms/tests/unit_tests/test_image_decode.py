@@ -0,0 +1,104 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Image decode tests
+"""
+
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image, ImageOps
+
+from mms.utils.image_decode import available_backends, decode, decode_batch, jpeg_header, scale_denominator, to_nchw
+
+
+def _jpeg(width, height, orientation=None):
+    img_arr = np.random.randint(0, 255, size=(height, width, 3)).astype(np.uint8)
+    image = Image.fromarray(img_arr)
+    output = BytesIO()
+    if orientation is None:
+        image.save(output, format="jpeg", quality=95)
+    else:
+        exif = image.getexif()
+        exif[0x0112] = orientation
+        image.save(output, format="jpeg", quality=95, exif=exif)
+    return output.getvalue()
+
+
+# noinspection PyClassHasNoInit
+class TestImageDecode:
+
+    def test_jpeg_header(self):
+        assert jpeg_header(_jpeg(64, 48)) == (64, 48, 1)
+        assert jpeg_header(_jpeg(64, 48, orientation=6)) == (64, 48, 6)
+
+    def test_scale_denominator(self):
+        assert scale_denominator(4000, 3000, (224, 224)) == 8
+        assert scale_denominator(1920, 1080, (224, 224)) == 4
+        assert scale_denominator(300, 300, (224, 224)) == 1
+        assert scale_denominator(450, 300, (224, 224)) == 1
+        assert scale_denominator(449, 449, (224, 224)) == 2
+        assert scale_denominator(4000, 3000, None) == 1
+
+    @pytest.mark.parametrize("backend", available_backends())
+    def test_reduced_decode(self, backend):
+        buf = _jpeg(1000, 600)
+        assert decode(buf, backend=backend).shape == (600, 1000, 3)
+        assert decode(buf, size=(224, 224), backend=backend).shape == (300, 500, 3)
+        assert decode(buf, size=(100, 70), flag=0, backend=backend).shape == (75, 125, 1)
+
+    @pytest.mark.parametrize("orientation", range(1, 9))
+    def test_orientation(self, orientation):
+        buf = _jpeg(40, 30, orientation)
+        expected = np.asarray(ImageOps.exif_transpose(Image.open(BytesIO(buf))).convert("RGB"))
+        for backend in available_backends():
+            assert np.array_equal(decode(buf, backend=backend), expected)
+
+        # Size applies to the oriented image
+        img_arr = decode(_jpeg(800, 400, orientation), size=(100, 200))
+        assert img_arr.shape[:2] == ((200, 100) if orientation > 4 else (200, 400))
+
+    def test_png(self):
+        img_arr = np.random.randint(0, 255, size=(20, 30, 3)).astype(np.uint8)
+        output = BytesIO()
+        Image.fromarray(img_arr).save(output, format="png")
+        assert np.array_equal(decode(output.getvalue(), size=(10, 10)), img_arr)
+        assert np.array_equal(decode(output.getvalue(), to_rgb=False), img_arr[:, :, ::-1])
+
+    @pytest.mark.parametrize("image_format", ["png", "webp"])
+    def test_orientation_other_formats(self, image_format):
+        img_arr = np.random.randint(0, 255, size=(30, 40, 3)).astype(np.uint8)
+        image = Image.fromarray(img_arr)
+        exif = image.getexif()
+        exif[0x0112] = 6
+        output = BytesIO()
+        image.save(output, format=image_format, lossless=True, exif=exif)
+        buf = output.getvalue()
+
+        assert np.array_equal(decode(buf, backend="pil"), np.rot90(img_arr, -1))
+        # The target size applies to the oriented image, like for JPEG
+        assert decode(buf, size=(16, 24), resize_to_size=True, backend="pil").shape == (24, 16, 3)
+        images, _ = decode_batch([buf, _jpeg(64, 48)], size=(16, 24), resize_to_size=True)
+        assert [img_arr.shape for img_arr in images] == [(24, 16, 3)] * 2
+
+    def test_decode_batch(self):
+        bufs = [_jpeg(640, 480), _jpeg(100, 300, orientation=6), _jpeg(32, 32)]
+        images, decode_times = decode_batch(bufs, size=(64, 48), resize_to_size=True)
+        assert [img_arr.shape for img_arr in images] == [(48, 64, 3)] * 3
+        assert len(decode_times) == 3
+
+        mean = np.array([1, 2, 3], dtype=np.float32)
+        std = np.array([2, 4, 8], dtype=np.float32)
+        batch = to_nchw(images, mean, std)
+        assert batch.shape == (3, 3, 48, 64) and batch.dtype == np.float32
+        expected = (np.stack(images).astype(np.float32) - mean) / std
+        np.testing.assert_allclose(batch, expected.transpose(0, 3, 1, 2), rtol=1e-6)
@@ -0,0 +1,111 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Memory profiler tests
+"""
+
+import json
+import struct
+import sys
+import time
+
+import pytest
+
+from mms.model_service_worker import MXNetModelServiceWorker
+from mms.utils import memory_profiler
+from mms.utils.memory_profiler import MemoryProfiler, is_supported
+
+pytestmark = pytest.mark.skipif(not is_supported(), reason="tracemalloc is not available")
+
+HANDLER = """
+leaked = []
+
+
+def handle(size):
+    leaked.append(bytearray(size))
+"""
+
+
+@pytest.fixture()
+def handler(tmpdir):
+    model_dir = tmpdir.mkdir("model")
+    model_dir.join("leaky_handler.py").write(HANDLER)
+    sys.path.insert(0, str(model_dir))
+    import leaky_handler  # pylint: disable=import-error
+    yield leaky_handler, str(model_dir)
+    sys.path.remove(str(model_dir))
+    del sys.modules["leaky_handler"]
+
+
+# noinspection PyClassHasNoInit
+class TestMemoryProfiler:
+
+    def test_model_growth(self, handler):
+        module, model_dir = handler
+        profiler = MemoryProfiler("leaky", model_dir)
+        profiler.start()
+        for _ in range(10):
+            module.handle(100000)
+        report = profiler.collect()
+
+        assert not memory_profiler.tracemalloc.is_tracing()
+        assert report["model"] == "leaky"
+        assert report["python_heap"]["growth_by_owner"]["model"] >= 1000000
+        site = report["top_sites"][0]
+        assert site["owner"] == "model"
+        assert site["count_diff"] >= 10
+        # Most recent frame first, the allocation in the handler is called by the test
+        assert site["traceback"][0].startswith(model_dir)
+        assert "test_memory_profiler.py" in site["traceback"][1]
+
+    def test_ndarray_storage(self):
+        mx = pytest.importorskip("mxnet")
+        profiler = MemoryProfiler()
+        profiler.start()
+        arrays = [mx.nd.zeros((100, 100)) for _ in range(3)]
+        report = profiler.collect()
+
+        assert report["ndarray_storage"]["growth"] == 3 * 100 * 100 * 4
+        assert report["ndarray_storage"]["after"]["cpu(0)"]["count"] >= 3
+        del arrays
+
+    def test_stops_by_itself(self, monkeypatch):
+        monkeypatch.setattr(memory_profiler, "GRACE_PERIOD", 0)
+        profiler = MemoryProfiler()
+        profiler.start(duration=0.05)
+        deadline = time.time() + 5
+        while profiler.running and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert not profiler.running
+        assert not memory_profiler.tracemalloc.is_tracing()
+        assert "python_heap" in profiler.collect()
+        with pytest.raises(RuntimeError, match=r"not running"):
+            profiler.collect()
+
+    def test_worker_memory_profile(self):
+        worker = object.__new__(MXNetModelServiceWorker)
+        resp = worker.memory_profile({"requestId": b"req", "duration": 1000}, None)
+        assert struct.unpack("!i", resp[:4])[0] == 200
+        resp = worker.memory_profile({"requestId": b"other", "duration": 1000}, None)
+        assert struct.unpack("!i", resp[:4])[0] == 409
+        # Only the collect command of the running profile stops it
+        resp = worker.memory_profile({"requestId": b"other", "duration": 0}, None)
+        assert struct.unpack("!i", resp[:4])[0] == 409
+        assert worker.memory_profiler.running
+
+        resp = worker.memory_profile({"requestId": b"req", "duration": 0}, None)
+        assert struct.unpack("!i", resp[:4])[0] == 200
+        assert b"application/json" in resp
+        body = resp[resp.index(b"application/json") + len(b"application/json") + 4:-4]
+        assert "python_heap" in json.loads(body.decode("utf-8"))
+        resp = worker.memory_profile({"requestId": b"req", "duration": 0}, None)
+        assert struct.unpack("!i", resp[:4])[0] == 409
@@ -0,0 +1,95 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+System metrics collector tests
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from mms.metrics import system_metrics
+from mms.metrics.metric_collector import MetricCollector
+from mms.metrics.process_memory_metric import ProcessMetrics, ProcessStats, model_metrics
+
+SYSTEM_METRICS = ["CPUUtilization", "MemoryUsed", "MemoryAvailable", "MemoryUtilization", "DiskUsage",
+                  "DiskUtilization", "DiskAvailable"]
+
+
+# noinspection PyClassHasNoInit
+class TestMetricCollector:
+
+    def test_collect_all_does_not_accumulate(self):
+        system_metrics.collect_all()
+        system_metrics.collect_all()
+        assert [m.name for m in system_metrics.system_metrics] == SYSTEM_METRICS
+
+    def test_sample(self):
+        collector = MetricCollector()
+        pid = os.getpid()
+        sample = collector.collect(["{}".format(pid), "", "999999999"])
+        metric_lines, process_lines, tail = sample.split("\n\n")
+        assert [line.split(".")[0] for line in metric_lines.split("\n")] == SYSTEM_METRICS
+        memory = dict(line.split(":", 1) for line in process_lines.split("\n"))
+        assert int(memory[str(pid)].split(":")[0]) > 0
+        assert memory["999999999"] == "0:0:0:0:0:0:0:0.0"
+        assert tail == ""
+
+    def test_process_metrics(self):
+        processes = ProcessMetrics()
+        pid = os.getpid()
+        stats, = processes.collect([str(pid)])
+        assert stats.pid == pid
+        assert 0 < stats.uss <= stats.pss <= stats.rss
+        assert stats.threads >= 1
+        assert stats.fds >= 1
+        assert stats.ctx_switches > 0
+        # Context switches are counted since the previous sample
+        total = stats.ctx_switches
+        stats, = processes.collect([pid])
+        assert stats.ctx_switches < total
+        # Handles of workers that are gone are released
+        processes.collect([])
+        assert not processes._processes
+
+    def test_model_metrics(self):
+        samples = [ProcessStats(1, 300 * 1024 * 1024, 200 * 1024 * 1024, 250 * 1024 * 1024, 0, 10, 20, 5, 50.0),
+                   ProcessStats(2, 300 * 1024 * 1024, 100 * 1024 * 1024, 150 * 1024 * 1024, 0, 10, 20, 7, 25.0),
+                   ProcessStats(3, 0, 0, 0, 0, 0, 0, 0, 0.0),
+                   ProcessStats(4, 100 * 1024 * 1024, 50 * 1024 * 1024, 60 * 1024 * 1024, 0, 5, 8, 1, 10.0)]
+        metrics = model_metrics(samples, {1: "resnet", 2: "resnet", 3: "resnet", 4: "squeezenet"})
+        values = dict(((m.name, m.dimensions[0].value), m.value) for m in metrics)
+        assert values[("Workers", "resnet")] == 2
+        assert values[("WorkerMemoryRSS", "resnet")] == 600
+        assert values[("WorkerMemoryUSS", "resnet")] == 300
+        assert values[("WorkerMemoryPSS", "resnet")] == 400
+        assert values[("WorkerContextSwitches", "resnet")] == 12
+        assert values[("WorkerCPUUtilization", "resnet")] == 75
+        assert values[("WorkerThreads", "squeezenet")] == 5
+
+    def test_stream(self):
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+        env = dict(os.environ, PYTHONPATH=root)
+        collector = subprocess.Popen([sys.executable, os.path.join(root, "mms", "metrics", "metric_collector.py")],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env,
+                                     universal_newlines=True)
+        for _ in range(2):
+            collector.stdin.write(json.dumps({str(os.getpid()): "model"}) + "\n")
+            collector.stdin.flush()
+            lines = [collector.stdout.readline() for _ in range(len(SYSTEM_METRICS) + 12)]
+            assert lines[len(SYSTEM_METRICS)].startswith("Workers.Count:1|#ModelName:model,Level:Model")
+            assert lines[len(SYSTEM_METRICS) + 9] == "\n"
+            assert lines[-2].startswith("{}:".format(os.getpid()))
+            assert lines[-1] == "\n"
+        collector.stdin.close()
+        assert collector.wait() == 0
+        collector.stdout.close()
@@ -0,0 +1,79 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Metrics aggregator tests
+"""
+
+import random
+import re
+
+from mms.metrics.dimension import Dimension
+from mms.metrics.metrics_aggregator import Histogram, MetricsAggregator
+from mms.metrics.metrics_store import MetricsStore
+
+# Pattern of com.amazonaws.ml.mms.metrics.Metric
+METRIC_PATTERN = re.compile(r"\s*(\w+)\.(\w+):([0-9\-,.e]+)\|#([^|]*)\|#hostname:([^,]+),([^,]+)(,(.*))?")
+
+
+# noinspection PyClassHasNoInit
+class TestMetricsAggregator:
+
+    def test_histogram_quantiles(self):
+        histogram = Histogram()
+        values = [random.uniform(0.5, 500) for _ in range(10000)] + [0] * 100
+        for value in values:
+            histogram.add(value)
+        values.sort()
+        for q in (0.5, 0.9, 0.99):
+            expected = values[int(q * len(values)) - 1]
+            assert abs(histogram.quantile(q) - expected) <= 0.025 * expected
+        assert histogram.quantile(0.001) == 0
+        assert histogram.count == len(values)
+        assert histogram.max == values[-1]
+
+    def test_summaries(self):
+        emitted = []
+        aggregator = MetricsAggregator("model", interval=0, emit=emitted.extend)
+        metrics = MetricsStore({0: "a", 1: "b"}, "model", aggregator, sample=False)
+        for value in range(1, 101):
+            metrics.add_time("PredictionTime", value)
+        metrics.add_counter("Hits", 1, 0)
+        metrics.add_counter("Hits", 2, 1)
+        metrics.add_size("InputSize", 3, 0, dimensions=[Dimension("Input", "image")])
+        metrics.add_error("Failure", "failed")
+
+        # Only error metrics are kept per request when the batch is not sampled
+        assert [m.name for m in metrics.store] == ["Failure"]
+
+        aggregator.flush()
+        lines = dict()
+        for metric in emitted:
+            match = METRIC_PATTERN.match(str(metric))
+            assert match is not None, str(metric)
+            lines[(match.group(1), match.group(4))] = float(match.group(3))
+
+        assert lines[("Hits", "ModelName:model,Level:Model")] == 3
+        assert lines[("PredictionTime", "ModelName:model,Level:Model,Stat:count")] == 100
+        assert lines[("PredictionTime", "ModelName:model,Level:Model,Stat:sum")] == 5050
+        assert abs(lines[("PredictionTime", "ModelName:model,Level:Model,Stat:p90")] - 90) < 2
+        assert lines[("InputSize", "ModelName:model,Level:Model,Input:image,Stat:p50")] == 3
+
+        # Aggregates are reset by the flush
+        del emitted[:]
+        aggregator.flush()
+        assert not emitted
+
+    def test_sampled_store(self):
+        aggregator = MetricsAggregator("model", interval=0, emit=lambda metrics: None)
+        metrics = MetricsStore({0: "a"}, "model", aggregator, sample=True)
+        metrics.add_time("PredictionTime", 5, 0)
+        assert metrics.store[0].request_id == "a"
+        assert len(aggregator.summaries()) == 5
@@ -0,0 +1,64 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Memory mapped parameter tests
+"""
+
+import json
+import warnings
+
+import mxnet as mx
+import numpy as np
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    from mms.model_service.mmap_params import ALIGNMENT, has_mmap_layout, load_checkpoint_params, load_params
+
+
+# noinspection PyClassHasNoInit
+class TestMmapParams:
+
+    def _save(self, tmpdir):
+        params_file = str(tmpdir.join("model-0000.params"))
+        mx.nd.save(params_file, {
+            "arg:weight": mx.nd.random.uniform(shape=(3, 5)),
+            "arg:bias": mx.nd.arange(3, dtype="float16"),
+            "aux:mean": mx.nd.ones((7,), dtype="int32"),
+        })
+        return params_file
+
+    def test_load_without_layout(self, tmpdir):
+        params_file = self._save(tmpdir)
+        params = load_params(params_file)
+        assert sorted(params) == ["arg:bias", "arg:weight", "aux:mean"]
+        assert not has_mmap_layout(params_file)
+
+    def test_convert_and_load(self, tmpdir):
+        params_file = self._save(tmpdir)
+        expected = mx.nd.load(params_file)
+
+        params = load_params(params_file, convert=True)
+        assert has_mmap_layout(params_file)
+        with open(params_file + ".mmap.json") as f:
+            assert all(entry["offset"] % ALIGNMENT == 0 for entry in json.load(f).values())
+
+        for name, value in expected.items():
+            assert params[name].dtype == value.dtype
+            np.testing.assert_array_equal(params[name].asnumpy(), value.asnumpy())
+
+    def test_copy_on_write(self, tmpdir):
+        params_file = self._save(tmpdir)
+        load_params(params_file, convert=True)["arg:weight"][:] = 0
+
+        arg_params, aux_params = load_checkpoint_params(params_file)
+        np.testing.assert_array_equal(arg_params["weight"].asnumpy(), mx.nd.load(params_file)["arg:weight"].asnumpy())
+        assert sorted(arg_params) == ["bias", "weight"]
+        assert list(aux_params) == ["mean"]
@@ -13,6 +13,7 @@ ModelServiceWorker is the worker that is started by the MMS front-end.
 """
 
 import socket
+import struct
 from collections import namedtuple
 
 import mock
@@ -166,6 +167,7 @@ class TestHandleConnection:
         model_service_worker.load_model = Mock()
         service = Mock()
         service.context = None
+        service.predict.return_value = bytearray(b"predict")
         model_service_worker.load_model.return_value = (service, "", 200)
         cl_socket = Mock()
 
@@ -173,3 +175,5 @@ class TestHandleConnection:
             model_service_worker.handle_connection(cl_socket)
 
         cl_socket.send.assert_called()
+        # Frames end with the metrics, trace and errors sections
+        assert cl_socket.send.call_args[0][0] == b"predict" + struct.pack("!i", 0) * 3
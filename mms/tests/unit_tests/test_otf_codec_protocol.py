@@ -21,6 +21,7 @@ import pytest
 
 import mms.protocol.otf_message_handler as codec
 from builtins import bytes
+from mms.context import Context, RequestProcessor
 
 
 @pytest.fixture()
@@ -96,6 +97,7 @@ class TestOtfCodecHandler:
         cmd, ret = codec.retrieve_msg(socket_patches.socket)
 
         assert cmd == b'I'
+        assert ret[0].pop("decodeTime") >= 0
         assert ret == expected
 
     def test_retrieve_msg_predict_text(self, socket_patches):
@@ -121,6 +123,7 @@ class TestOtfCodecHandler:
         cmd, ret = codec.retrieve_msg(socket_patches.socket)
 
         assert cmd == b'I'
+        assert ret[0].pop("decodeTime") >= 0
         assert ret == expected
 
     def test_retrieve_msg_predict_binary(self, socket_patches):
@@ -146,8 +149,51 @@ class TestOtfCodecHandler:
         cmd, ret = codec.retrieve_msg(socket_patches.socket)
 
         assert cmd == b'I'
+        assert ret[0].pop("decodeTime") >= 0
         assert ret == expected
 
+    def test_retrieve_msg_predict_tensor(self, socket_patches):
+        np = pytest.importorskip("numpy")
+        content_type = b"application/octet-stream;dtype=float32;shape=2,2"
+        socket_patches.socket.recv.side_effect = [
+            b"I",
+            b"\x00\x00\x00\x0a", b"request_id",
+            b"\xFF\xFF\xFF\xFF",
+            b"\x00\x00\x00\x0a", b"input_name",
+            b"\x00\x00\x00\x30", content_type,
+            b"\x00\x00\x00\x10", np.arange(4, dtype=np.float32).tobytes(),
+            b"\xFF\xFF\xFF\xFF",  # end of parameters
+            b"\xFF\xFF\xFF\xFF"  # end of batch
+        ]
+        _, ret = codec.retrieve_msg(socket_patches.socket)
+
+        value = ret[0]["parameters"][0]["value"]
+        assert value.shape == (2, 2)
+        assert value.dtype == np.float32
+        assert value.tolist() == [[0, 1], [2, 3]]
+
+    def test_retrieve_msg_predict_invalid_tensor(self, socket_patches):
+        content_type = b"application/octet-stream;dtype=float32;shape=3,3"
+        socket_patches.socket.recv.side_effect = [
+            b"I",
+            b"\x00\x00\x00\x0a", b"request_id",
+            b"\xFF\xFF\xFF\xFF",
+            b"\x00\x00\x00\x0a", b"input_name",
+            b"\x00\x00\x00\x30", content_type,
+            b"\x00\x00\x00\x08", b"\x00" * 8,
+            b"\xFF\xFF\xFF\xFF",  # end of parameters
+            b"\xFF\xFF\xFF\xFF"  # end of batch
+        ]
+        _, ret = codec.retrieve_msg(socket_patches.socket)
+
+        assert ret[0]["parameters"][0]["value"] == b"\x00" * 8
+        assert ret[0]["error"].startswith("Invalid application/octet-stream;dtype=float32;shape=3,3 input input_name")
+
+    def test_create_errors_section(self):
+        assert codec.create_errors_section(None) == b"\x00\x00\x00\x00"
+        section = codec.create_errors_section({"request_id": (400, "Invalid input")})
+        assert section == b'\x00\x00\x00\x24{"request_id":[400,"Invalid input"]}'
+
     def test_create_load_model_response(self):
         msg = codec.create_load_model_response(200, "model_loaded")
 
@@ -164,3 +210,38 @@ class TestOtfCodecHandler:
 
         assert msg == b"\x00\x00\x00\xc8\x00\x00\x00\x06failed\x00\x00\x00\x0a" \
                       b"request_id\x00\x00\x00\x00\x00\x00\x00\x05error\xff\xff\xff\xff"
+
+    def test_create_predict_response_json(self):
+        msg = codec.create_predict_response([{"a": 1}], {0: "request_id"}, "success", 200)
+
+        assert msg == b'\x00\x00\x00\xc8\x00\x00\x00\x07success\x00\x00\x00\nrequest_id' \
+                      b'\x00\x00\x00\x10application/json\x00\x00\x00\x07{"a":1}\xff\xff\xff\xff'
+
+    def test_create_predict_response_accept_msgpack(self):
+        msgpack = pytest.importorskip("msgpack")
+        context = Context("model", "model_dir", None, 1, None, "1.0")
+        context.request_processor = RequestProcessor({"request_id": {"accept": "application/msgpack"}})
+        msg = codec.create_predict_response([{"a": 1}], {0: "request_id"}, "success", 200, context=context)
+
+        body = msgpack.packb({"a": 1})
+        assert msg == b'\x00\x00\x00\xc8\x00\x00\x00\x07success\x00\x00\x00\nrequest_id' \
+                      b'\x00\x00\x00\x13application/msgpack' + \
+                      bytes([0, 0, 0, len(body)]) + body + b'\xff\xff\xff\xff'
+
+    def test_create_predict_response_unsupported(self):
+        msg = codec.create_predict_response([object()], {0: "request_id"}, "success", 200)
+
+        assert msg == b"\x00\x00\x01\xf7\x00\x00\x00\x23Unsupported model output data type." \
+                      b"\x00\x00\x00\x0arequest_id\x00\x00\x00\x00\x00\x00\x00\x05error\xff\xff\xff\xff"
+
+    def test_create_predict_response_raw_tensor(self):
+        np = pytest.importorskip("numpy")
+        context = Context("model", "model_dir", None, 1, None, "1.0")
+        context.request_processor = RequestProcessor({"request_id": {"Accept": "application/octet-stream"}})
+        output = np.zeros((1, 2), dtype=np.float32)
+        msg = codec.create_predict_response([output], {0: "request_id"}, "success", 200, context=context)
+
+        content_type = b"application/octet-stream;dtype=float32;shape=1,2"
+        assert msg == b'\x00\x00\x00\xc8\x00\x00\x00\x07success\x00\x00\x00\nrequest_id' + \
+                      bytes([0, 0, 0, len(content_type)]) + content_type + \
+                      b'\x00\x00\x00\x08' + output.tobytes() + b'\xff\xff\xff\xff'
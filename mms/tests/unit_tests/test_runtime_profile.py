@@ -0,0 +1,58 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Runtime profile tests
+"""
+
+import json
+import os
+
+import pytest
+
+from mms.utils.runtime_profile import apply_runtime_profile, load_runtime_profile, profile_environ
+
+
+# noinspection PyClassHasNoInit
+class TestRuntimeProfile:
+
+    def test_profile_environ(self):
+        environ = profile_environ({"engineType": "NaiveEngine", "cpuWorkerThreads": 2.0, "memoryPool": "Round",
+                                   "operatorTuning": False, "MXNET_EXEC_BULK_EXEC_INFERENCE": 1})
+        assert environ == {
+            "MXNET_ENGINE_TYPE": "NaiveEngine",
+            "MXNET_CPU_WORKER_NTHREADS": "2",
+            "MXNET_CPU_MEM_POOL_TYPE": "Round",
+            "MXNET_GPU_MEM_POOL_TYPE": "Round",
+            "MXNET_USE_OPERATOR_TUNING": "0",
+            "MXNET_EXEC_BULK_EXEC_INFERENCE": "1",
+        }
+
+    def test_unknown_setting(self, caplog):
+        assert profile_environ({"PATH": "/tmp", "engineType": "NaiveEngine"}) == {"MXNET_ENGINE_TYPE": "NaiveEngine"}
+        assert "Unknown runtime profile setting: PATH" in caplog.text
+
+    def test_load_from_manifest_and_registration(self, tmpdir, monkeypatch):
+        tmpdir.mkdir("MAR-INF").join("MANIFEST.json").write(json.dumps({
+            "engine": {"engineName": "MXNet", "runtimeProfile": {"engineType": "NaiveEngine", "ompThreads": 4}}
+        }))
+        assert load_runtime_profile(str(tmpdir)) == {"engineType": "NaiveEngine", "ompThreads": 4}
+
+        monkeypatch.setenv("MMS_RUNTIME_PROFILE", '{"engineType": "ThreadedEnginePerDevice"}')
+        assert load_runtime_profile(str(tmpdir)) == {"engineType": "ThreadedEnginePerDevice", "ompThreads": 4}
+
+    def test_load_without_manifest(self, tmpdir, monkeypatch):
+        monkeypatch.delenv("MMS_RUNTIME_PROFILE", raising=False)
+        assert load_runtime_profile(str(tmpdir)) == {}
+
+    def test_apply(self, monkeypatch):
+        monkeypatch.setenv("MXNET_SUBGRAPH_BACKEND", "")
+        apply_runtime_profile({"subgraphBackend": "MKLDNN"})
+        assert os.environ["MXNET_SUBGRAPH_BACKEND"] == "MKLDNN"
@@ -0,0 +1,85 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Sampling profiler tests
+"""
+
+import signal
+import struct
+
+import pytest
+
+from mms.model_service_worker import MXNetModelServiceWorker
+from mms.utils.sampling_profiler import SamplingProfiler, cpu_time, is_supported
+
+pytestmark = pytest.mark.skipif(not is_supported(), reason="SIGPROF interval timers are not available")
+
+
+def busy_loop(seconds):
+    end = cpu_time() + seconds
+    total = 0
+    while cpu_time() < end:
+        total += sum(range(100))
+    return total
+
+
+# noinspection PyClassHasNoInit
+class TestSamplingProfiler:
+
+    def test_collapsed_stacks(self):
+        handler = signal.getsignal(signal.SIGPROF)
+        profiler = SamplingProfiler(interval=0.005)
+        profiler.start()
+        busy_loop(0.3)
+        profile = profiler.collapsed()
+
+        assert not profiler.running
+        assert signal.getsignal(signal.SIGPROF) == handler
+        lines = profile.splitlines()
+        assert profiler.samples > 0
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profiler.samples
+        # Outermost frame first, the sampled function is a descendant of the test
+        names = [frame.split(" ")[0] for frame in lines[0].rsplit(" ", 1)[0].split(";")]
+        assert names.index("test_collapsed_stacks") < names.index("busy_loop")
+
+    def test_duration(self):
+        profiler = SamplingProfiler(interval=0.005)
+        profiler.start(duration=0.05)
+        busy_loop(0.3)
+        samples = profiler.samples
+        busy_loop(0.1)
+        assert profiler.samples == samples
+        profiler.collapsed()
+
+    def test_already_running(self):
+        profiler = SamplingProfiler()
+        profiler.start()
+        with pytest.raises(RuntimeError, match=r"already running"):
+            profiler.start()
+        profiler.stop()
+
+    def test_worker_profile(self):
+        worker = object.__new__(MXNetModelServiceWorker)
+        resp = worker.profile({"requestId": b"req", "duration": 1000})
+        assert struct.unpack("!i", resp[:4])[0] == 200
+        resp = worker.profile({"requestId": b"other", "duration": 1000})
+        assert struct.unpack("!i", resp[:4])[0] == 409
+        busy_loop(0.1)
+        # Only the collect command of the running profile stops it
+        resp = worker.profile({"requestId": b"other", "duration": 0})
+        assert struct.unpack("!i", resp[:4])[0] == 409
+        assert worker.profiler.running
+        resp = worker.profile({"requestId": b"req", "duration": 0})
+        assert struct.unpack("!i", resp[:4])[0] == 200
+        assert b"text/plain" in resp
+        assert b"busy_loop" in resp
+        resp = worker.profile({"requestId": b"req", "duration": 0})
+        assert struct.unpack("!i", resp[:4])[0] == 409
@@ -0,0 +1,155 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Serializer registry tests
+"""
+
+import io
+import json
+
+import pytest
+
+from mms.protocol import serializers
+
+
+# noinspection PyClassHasNoInit
+class TestSerializers:
+
+    def test_parse_content_type(self):
+        media_type, params = serializers.parse_content_type('Application/Octet-Stream; dtype=float32;shape="2,3"')
+        assert media_type == "application/octet-stream"
+        assert params == {"dtype": "float32", "shape": "2,3"}
+
+    def test_parse_empty_content_type(self):
+        assert serializers.parse_content_type(None) == ("", {})
+
+    def test_json_round_trip(self):
+        value = {"data": [1, 2.5, "text"]}
+        buf = serializers.encode("application/json; charset=utf-8", value)
+        assert json.loads(buf.decode("utf-8")) == value
+        assert serializers.decode("application/json", bytearray(buf)) == value
+
+    def test_stdlib_json_fallback(self, mocker):
+        mocker.patch.object(serializers, "orjson", None)
+        mocker.patch.object(serializers, "ujson", None)
+        buf = serializers.encode("application/json", {"a": 1})
+        assert buf == b'{"a":1}'
+        assert serializers.decode("application/json", bytearray(buf)) == {"a": 1}
+
+    def test_msgpack_round_trip(self):
+        pytest.importorskip("msgpack")
+        value = {"data": [1, 2.5, "text"]}
+        buf = serializers.encode("application/msgpack", value)
+        assert serializers.decode("application/x-msgpack", bytearray(buf)) == value
+
+    def test_unknown_content_type(self):
+        assert not serializers.has_decoder("image/png")
+        with pytest.raises(ValueError, match=r"No encoder registered .*"):
+            serializers.encode("image/png", {})
+
+    def test_register_serializer(self):
+        serializers.register_serializer("application/x-test", lambda buf, params: buf.upper(), lambda v: v.lower())
+        try:
+            assert serializers.decode("application/x-test", b"abc") == b"ABC"
+            assert serializers.encode("application/x-test", b"ABC") == b"abc"
+        finally:
+            del serializers._decoders["application/x-test"]
+            del serializers._encoders["application/x-test"]
+
+    def test_negotiate(self):
+        assert serializers.negotiate(None) is None
+        assert serializers.negotiate("text/html, */*;q=0.8") == "application/json"
+        assert serializers.negotiate("text/html") is None
+        if serializers.msgpack is not None:
+            assert serializers.negotiate("application/msgpack, application/json") == "application/msgpack"
+
+    def test_npy_decode(self):
+        np = pytest.importorskip("numpy")
+        expected = np.arange(12, dtype=np.float32).reshape(3, 4)
+        fp = io.BytesIO()
+        np.save(fp, expected)
+        buf = bytearray(fp.getvalue())
+
+        array = serializers.decode("application/x-npy", buf)
+        assert array.dtype == np.float32
+        assert (array == expected).all()
+        assert np.shares_memory(array, np.frombuffer(buf, dtype=np.uint8))
+
+    def test_npy_decode_fortran_order(self):
+        np = pytest.importorskip("numpy")
+        expected = np.asfortranarray(np.arange(6, dtype=np.int64).reshape(2, 3))
+        fp = io.BytesIO()
+        np.save(fp, expected)
+
+        assert (serializers.decode("application/x-npy", fp.getvalue()) == expected).all()
+
+    def test_npy_decode_invalid(self):
+        pytest.importorskip("numpy")
+        with pytest.raises(ValueError, match=r"Invalid npy payload"):
+            serializers.decode("application/x-npy", b"not a numpy file")
+
+    def test_raw_tensor_decode(self):
+        np = pytest.importorskip("numpy")
+        expected = np.arange(6, dtype=np.float32).reshape(1, 2, 3)
+        buf = bytearray(expected.tobytes())
+
+        array = serializers.decode("application/octet-stream; dtype=float32; shape=1,2,3", buf)
+        assert array.shape == (1, 2, 3)
+        assert (array == expected).all()
+        assert serializers.decode("application/octet-stream; dtype=float32; shape=(1x6)", buf).shape == (1, 6)
+
+    @pytest.mark.parametrize("content_type,buf,message", [
+        ("application/octet-stream; dtype=float32; shape=2,2", b"\x00" * 12, r"reshape"),
+        ("application/octet-stream; dtype=float32", b"\x00" * 6, r"multiple of element size"),
+        ("application/octet-stream; dtype=bogus", b"\x00" * 4, r"Unsupported dtype"),
+        ("application/octet-stream; dtype=O", b"\x00" * 8, r"Object arrays"),
+    ])
+    def test_raw_tensor_decode_invalid(self, content_type, buf, message):
+        pytest.importorskip("numpy")
+        with pytest.raises(ValueError, match=message):
+            serializers.decode(content_type, buf)
+
+    def test_npy_decode_truncated(self):
+        np = pytest.importorskip("numpy")
+        fp = io.BytesIO()
+        np.save(fp, np.zeros((4, 4), dtype=np.float32))
+        with pytest.raises(ValueError):
+            serializers.decode("application/x-npy", fp.getvalue()[:-8])
+
+    def test_raw_bytes_pass_through(self):
+        pytest.importorskip("numpy")
+        assert serializers.decode("application/octet-stream", b"binary") == b"binary"
+
+    def test_npy_encode(self):
+        np = pytest.importorskip("numpy")
+        expected = np.arange(6, dtype=np.float32).reshape(2, 3)
+
+        buf = serializers.encode("application/x-npy", expected)
+        assert (np.load(io.BytesIO(bytes(buf))) == expected).all()
+        assert serializers.format_content_type("application/x-npy", expected) == "application/x-npy"
+
+    def test_raw_tensor_encode(self):
+        np = pytest.importorskip("numpy")
+        expected = np.arange(6, dtype=np.int32).reshape(3, 2)
+
+        buf = serializers.encode("application/octet-stream", expected)
+        content_type = serializers.format_content_type("application/octet-stream", expected)
+        assert content_type == "application/octet-stream;dtype=int32;shape=3,2"
+        assert (serializers.decode(content_type, buf) == expected).all()
+
+    def test_json_encode_array(self, mocker):
+        np = pytest.importorskip("numpy")
+        value = {"output": np.array([[1, 2]], dtype=np.int64)}
+        assert json.loads(serializers.encode("application/json", value).decode("utf-8")) == {"output": [[1, 2]]}
+
+        mocker.patch.object(serializers, "orjson", None)
+        mocker.patch.object(serializers, "ujson", None)
+        assert serializers.encode("application/json", value) == b'{"output":[[1,2]]}'
@@ -0,0 +1,85 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Session store tests
+"""
+
+import numpy as np
+
+from mms.context import Context, RequestProcessor
+from mms.utils.session_store import SessionStore, estimate_size
+
+
+# noinspection PyClassHasNoInit
+class TestSessionStore:
+
+    def test_lru_eviction(self):
+        store = SessionStore(max_bytes=100)
+        store.put("a", None, size=40)
+        store.put("b", None, size=40)
+        assert store.get("a", "missing") is None
+        store.put("c", None, size=40)
+
+        assert "b" not in store
+        assert "a" in store and "c" in store
+        assert store.nbytes == 80
+        assert store.evictions == 1
+
+    def test_max_sessions(self):
+        store = SessionStore(max_bytes=1000, max_sessions=2)
+        for session_id in ("a", "b", "c"):
+            store.put(session_id, session_id, size=1)
+        assert len(store) == 2
+        assert "a" not in store
+
+    def test_replace_and_pop(self):
+        store = SessionStore(max_bytes=100)
+        store.put("a", 1, size=30)
+        store.put("a", 2, size=50)
+        assert store.nbytes == 50
+        assert store.pop("a") == 2
+        assert store.nbytes == 0
+        assert store.pop("a", "missing") == "missing"
+
+    def test_oversized_state(self):
+        store = SessionStore(max_bytes=10)
+        assert not store.put("a", np.zeros(16, dtype=np.float32))
+        assert "a" not in store
+
+    def test_default_size_from_env(self, monkeypatch):
+        monkeypatch.setenv("MMS_SESSION_STORE_SIZE", "2")
+        assert SessionStore().max_bytes == 2 * 1024 * 1024
+
+    def test_estimate_size(self):
+        array = np.zeros((4, 8), dtype=np.float32)
+        assert estimate_size(array) == 128
+        assert estimate_size([array, array]) >= 256
+
+    def test_estimate_ndarray_size(self):
+        import mxnet as mx
+        assert estimate_size(mx.nd.zeros((2, 8), dtype="float16")) == 32
+
+
+# noinspection PyClassHasNoInit
+class TestContextSession:
+
+    def test_session_state(self):
+        context = Context("model", "model_dir", None, 1, None, "1.0")
+        context.request_processor = RequestProcessor({"r1": {"x-mms-session-id": "s1"}, "r2": {}})
+
+        assert context.get_session_id("r1") == "s1"
+        assert context.get_session_state("r1") is None
+        assert context.set_session_state("r1", [1, 2])
+        assert context.get_session_state("r1") == [1, 2]
+
+        assert context.get_session_id("r2") is None
+        assert not context.set_session_state("r2", [1])
+        assert len(context.session_store) == 1
@@ -0,0 +1,89 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+StatsD emitter tests, against a local UDP listener
+"""
+
+import socket
+
+import pytest
+
+from mms.metrics.dimension import Dimension
+from mms.metrics.metrics_store import MetricsStore
+from mms.metrics.statsd_emitter import StatsdEmitter
+
+
+@pytest.fixture()
+def listener():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(5)
+    yield sock
+    sock.close()
+
+
+def receive(sock, count):
+    packets = []
+    lines = []
+    while len(lines) < count:
+        packet = sock.recv(65535)
+        packets.append(packet)
+        lines += packet.decode("utf-8").split("\n")
+    return packets, lines
+
+
+# noinspection PyClassHasNoInit
+class TestStatsdEmitter:
+
+    def test_metrics_store(self, listener):
+        emitter = StatsdEmitter("resnet", *listener.getsockname())
+        metrics = MetricsStore({0: "a", 1: "b"}, "resnet", emitter=emitter)
+        metrics.add_time("PredictionTime", 12.5)
+        metrics.add_time("Decode", 2, 1, unit="s")
+        metrics.add_counter("Images", 2, 0)
+        metrics.add_size("InputSize", 3, 0, dimensions=[Dimension("Input", "image")])
+        metrics.add_error("Failure", "failed")
+
+        _, lines = receive(listener, 4)
+        assert sorted(lines) == sorted([
+            "mms.PredictionTime:12.5|ms|#ModelName:resnet,Level:Model",
+            "mms.Decode:2000|ms|#ModelName:resnet,Level:Model",
+            "mms.Images:2|c|#ModelName:resnet,Level:Model",
+            "mms.InputSize:3|h|#ModelName:resnet,Level:Model,Input:image",
+        ])
+
+    def test_statsd_format(self, listener):
+        emitter = StatsdEmitter("my model", *listener.getsockname(), metric_format="statsd")
+        emitter.record("InputSize", 3, "MB", dimensions=[Dimension("Input", "image:0")])
+        _, lines = receive(listener, 1)
+        assert lines == ["mms.my_model.image_0.InputSize:3|g"]
+
+    def test_packing(self, listener):
+        emitter = StatsdEmitter("resnet", *listener.getsockname(), max_packet_size=512)
+        lines = ["mms.Metric{}:{}|ms|#ModelName:resnet,Level:Model".format(i, i) for i in range(100)]
+        packets = emitter.pack(lines)
+        assert all(len(packet) <= 512 for packet in packets)
+        assert b"\n".join(packets).decode("utf-8").split("\n") == lines
+
+        for i in range(100):
+            emitter.record("Metric{}".format(i), i, "ms")
+        packets, received = receive(listener, 100)
+        assert sorted(received) == sorted(lines)
+        assert all(len(packet) <= 512 for packet in packets)
+        assert len(packets) < 100
+
+    def test_drop_on_overflow(self):
+        # Nothing listens, the queue fills up while the sender thread is not started
+        emitter = StatsdEmitter("resnet", queue_size=10)
+        emitter._thread = True
+        for i in range(100):
+            emitter.record("PredictionTime", i, "ms")
+        assert emitter.dropped == 90
@@ -1,11 +1,19 @@
+import json
 import logging
 import os
+import struct
 import sys
+import time
 
 import pytest
 
 from mms.context import Context
-from mms.service import Service
+from mms.metrics.dimension import Dimension
+from mms.metrics.metric import Metric
+from mms.metrics.metrics_channel import metrics_channel
+from mms.metrics.trace import TRACE_HEADER
+from mms.protocol.otf_message_handler import create_metrics_section, create_trace_section, create_predict_response
+from mms.service import ENQUEUE_TIME_HEADER, Service
 from mms.service import emit_metrics
 
 logging.basicConfig(stream=sys.stdout, format="%(message)s", level=logging.INFO)
@@ -35,6 +43,68 @@ class TestService:
         service.predict(self.data)
         create_predict_response.assert_called()
 
+    def test_predict_materialize_failure(self, service, mocker):
+        output = mocker.MagicMock()
+        output.asnumpy.side_effect = RuntimeError("engine error")
+        service._entry_point.return_value = [output]
+        resp = service.predict(self.data)
+        assert resp[:4] == struct.pack("!i", 503)
+
+    def test_batch_metrics(self, service, mocker):
+        mocker.patch("mms.service.create_predict_response")
+        service._context = Context(self.model_name, self.model_dir, self.manifest, 4, 0, '1.0')
+        enqueue_time = str(int(time.time() * 1000) - 50).encode("utf-8")
+        data = [dict(self.data[0], headers=[{"name": ENQUEUE_TIME_HEADER.encode("utf-8"), "value": enqueue_time}])]
+        service.predict(data)
+        metrics = dict((m.name, m) for m in service.context.metrics.store)
+        assert metrics["QueueTime"].value >= 50
+        assert metrics["QueueTime"].request_id == "123"
+        assert metrics["BatchSize"].value == 1
+        assert metrics["BatchFill"].value == 25
+        assert metrics["BatchFill"].unit == "Percent"
+
+    def test_trace(self, service, mocker):
+        mocker.patch("mms.service.create_predict_response")
+
+        def entry_point(batch, context):
+            with context.timer("preprocess", 0):
+                pass
+            return ['prediction'] * len(batch)
+
+        service._entry_point = entry_point
+        traced = dict(self.data[0], headers=[{"name": TRACE_HEADER.encode("utf-8"), "value": b"true"}])
+        data = [traced, dict(self.data[0], requestId=b"456"), dict(traced, requestId=b"789")]
+        data[0]["decodeTime"] = 0.5
+        service.predict(data)
+
+        spans = service.context.trace.spans
+        assert sorted(spans) == ["123", "789"]
+        assert [name for name, _ in spans["123"]] == ["decode", "preprocess", "handler", "response"]
+        assert [name for name, _ in spans["789"]] == ["handler", "response"]
+        section = create_trace_section(service.context.trace)
+        assert json.loads(section[4:].decode("utf-8"))["123"][0] == ["decode", 0.5]
+
+        service.predict(self.data)
+        assert service.context.trace is None
+        assert create_trace_section(None) == struct.pack('!i', 0)
+
+    def test_predict_rejects_invalid_request(self, service):
+        invalid = dict(self.data[0], requestId=b"456", error="Invalid input xyz")
+        resp = service.predict([invalid, self.data[0]])
+
+        assert resp[:4] == struct.pack("!i", 200)
+        assert b"123" in resp and b"456" not in resp
+        assert service._entry_point.call_args[0][0] == [{"xyz": "abc"}]
+        assert service.context.request_errors == {"456": (400, "Invalid input xyz")}
+
+        resp = service.predict([invalid])
+        assert resp == create_predict_response([], {}, "Invalid request", 200)
+        assert service._entry_point.call_count == 1
+        assert service.context.metrics is None
+
+        service.predict(self.data)
+        assert service.context.request_errors == {}
+
     def test_with_nil_request(self, service):
         with pytest.raises(ValueError, match=r"Received invalid inputs"):
             service.retrieve_data_for_inference(None)
@@ -49,7 +119,17 @@ class TestService:
 # noinspection PyClassHasNoInit
 class TestEmitMetrics:
 
-    def test_emit_metrics(self, caplog):
-        metrics = {'test_emit_metrics': True}
-        emit_metrics(metrics)
-        assert "[METRICS]" in caplog.text
+    def test_emit_metrics(self):
+        metrics_channel.drain()
+        metric = Metric('test_emit_metrics', 1, 'count', [Dimension('Level', 'Model')])
+        emit_metrics([metric])
+        assert [m for _, m in metrics_channel.drain()] == [metric]
+
+    def test_metrics_section(self):
+        metric = Metric('PredictionTime', 12.5, 'ms', [Dimension('ModelName', 'm')], 'req-1')
+        section = create_metrics_section([(1540000000, metric)])
+        length = struct.unpack('!i', section[:4])[0]
+        assert length == len(section) - 4
+        assert json.loads(section[4:].decode('utf-8')) == [
+            ['PredictionTime', 'Milliseconds', 12.5, [['ModelName', 'm']], 'req-1', 1540000000]]
+        assert create_metrics_section([]) == struct.pack('!i', 0)
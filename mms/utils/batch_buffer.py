@@ -0,0 +1,138 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Preallocated batch input tensors.
+
+Batching handlers write every request of a batch directly into its slot of a batch
+sized tensor instead of stacking per request arrays and concatenating padding. The
+tensors are allocated once from the model signature and reused for every batch.
+"""
+import numpy as np
+
+
+class BatchBuffer(object):
+    """
+    Batch tensor for one model input. Requests are written to consecutive slots,
+    `fill` counts the slots holding request data and the remaining slots are padding.
+    The tensor is a numpy array, or an MXNet NDArray when a context is given.
+    """
+
+    def __init__(self, name, shape, dtype='float32', ctx=None):
+        shape = tuple(int(dim) for dim in shape)
+        if any(dim <= 0 for dim in shape):
+            raise ValueError("Batch buffer {} requires a fixed shape, got {}".format(name, shape))
+
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+        if ctx is None:
+            self.data = np.zeros(shape, dtype=dtype)
+        else:
+            import mxnet as mx
+            self.data = mx.nd.zeros(shape, ctx=ctx, dtype=dtype)
+        # Slot views are created once, indexing the first axis shares memory with data
+        self._slots = [self.data[i] for i in range(shape[0])]
+        self.fill = 0
+
+    @property
+    def batch_size(self):
+        return self.shape[0]
+
+    @property
+    def pad(self):
+        """
+        Number of padding slots in the current batch.
+        """
+        return self.batch_size - self.fill
+
+    def reset(self):
+        self.fill = 0
+
+    def next_slot(self):
+        """
+        Reserve the next slot for a request and return a view of it to write into.
+        """
+        if self.fill >= self.batch_size:
+            raise ValueError("Batch buffer {} is full, batch size is {}".format(self.name, self.batch_size))
+
+        slot = self._slots[self.fill]
+        self.fill += 1
+        return slot
+
+    def append(self, sample):
+        """
+        Copy one request sample into the next slot, casting to the buffer dtype.
+        """
+        self.next_slot()[:] = sample
+
+    def clear_padding(self, value=0):
+        """
+        Overwrite padding slots. Outputs of padding are discarded, so this is only needed
+        for models whose results depend on other entries of the batch.
+        """
+        if self.fill < self.batch_size:
+            self.data[self.fill:] = value
+
+    def filled(self):
+        """
+        View of the slots holding request data.
+        """
+        return self.data[:self.fill]
+
+
+class BatchBufferPool(object):
+    """
+    Round robin pool of batch buffer sets, one buffer per model input. With more than one
+    set, the next batch can be assembled while the engine still reads the previous one.
+    """
+
+    def __init__(self, shapes, dtype='float32', ctx=None, depth=2):
+        """
+        :param shapes: list of (input name, batch shape) tuples
+        :param dtype: buffer data type
+        :param ctx: MXNet context, numpy buffers are used when None
+        :param depth: number of buffer sets
+        """
+        if depth < 1:
+            raise ValueError("Buffer pool depth must be at least 1")
+
+        self._sets = [[BatchBuffer(name, shape, dtype, ctx) for name, shape in shapes]
+                      for _ in range(depth)]
+        self._next = 0
+
+    @classmethod
+    def from_signature(cls, signature, batch_size, dtype='float32', ctx=None, depth=2):
+        """
+        Size buffers from signature.json input shapes with the batch dimension
+        replaced by the configured batch size.
+
+        :param signature: parsed signature.json
+        :param batch_size: context.system_properties["batch_size"]
+        """
+        shapes = []
+        for sig_input in signature["inputs"]:
+            shape = list(sig_input["data_shape"])
+            shape[0] = batch_size or 1
+            shapes.append((sig_input["data_name"], shape))
+
+        return cls(shapes, dtype, ctx, depth)
+
+    def acquire(self):
+        """
+        Return the next set of buffers, reset to an empty batch.
+
+        :return: list of BatchBuffer in signature input order
+        """
+        buffers = self._sets[self._next]
+        self._next = (self._next + 1) % len(self._sets)
+        for buf in buffers:
+            buf.reset()
+        return buffers
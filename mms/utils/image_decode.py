@@ -0,0 +1,349 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Image decoding for vision services.
+
+Images are decoded with the fastest available backend: libjpeg-turbo through PyTurboJPEG, OpenCV,
+then PIL (or PIL-SIMD). Given the size the image is resized to afterwards, JPEG images are decoded
+at a reduced resolution: libjpeg scales the image in the DCT domain by 1/2, 1/4 or 1/8 (turbojpeg
+also by n/8) while the decoded image stays at least as large as the target size. EXIF orientation
+is read from the JPEG header without decoding the image, and applied to the decoded pixels.
+
+Batches are decoded and resized on a thread pool, and normalized and transposed to NCHW at once.
+"""
+import multiprocessing
+import struct
+import time
+from io import BytesIO
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+from PIL import Image
+
+BACKENDS = ("turbojpeg", "cv2", "pil")
+JPEG_SOI = b"\xff\xd8"
+ORIENTATION_TAG = 0x0112
+# Start of frame markers carrying the image size, SOF0-SOF15 without DHT, JPG and DAC
+SOF_MARKERS = frozenset(range(0xc0, 0xd0)) - {0xc4, 0xc8, 0xcc}
+CV2_REDUCED = {1: "IMREAD_COLOR", 2: "IMREAD_REDUCED_COLOR_2", 4: "IMREAD_REDUCED_COLOR_4",
+               8: "IMREAD_REDUCED_COLOR_8"}
+CV2_REDUCED_GRAY = {1: "IMREAD_GRAYSCALE", 2: "IMREAD_REDUCED_GRAYSCALE_2", 4: "IMREAD_REDUCED_GRAYSCALE_4",
+                    8: "IMREAD_REDUCED_GRAYSCALE_8"}
+
+# Resampling filters of PIL >= 9.1, module constants of older versions
+_RESAMPLING = getattr(Image, "Resampling", Image)
+PIL_FILTERS = {0: _RESAMPLING.NEAREST, 1: _RESAMPLING.BILINEAR, 2: _RESAMPLING.BOX, 3: _RESAMPLING.BICUBIC,
+               4: _RESAMPLING.LANCZOS}
+CV2_INTERP = {0: "INTER_NEAREST", 1: "INTER_LINEAR", 2: "INTER_AREA", 3: "INTER_CUBIC", 4: "INTER_LANCZOS4"}
+MAX_DECODE_THREADS = 4
+
+_turbojpeg = None
+_cv2 = None
+
+
+def _load_turbojpeg():
+    global _turbojpeg
+    if _turbojpeg is None:
+        try:
+            from turbojpeg import TurboJPEG
+            _turbojpeg = TurboJPEG()
+        except (ImportError, OSError, RuntimeError):
+            # Python bindings or the libturbojpeg shared library are missing
+            _turbojpeg = False
+    return _turbojpeg
+
+
+def _load_cv2():
+    global _cv2
+    if _cv2 is None:
+        try:
+            import cv2
+            _cv2 = cv2
+        except ImportError:
+            _cv2 = False
+    return _cv2
+
+
+def available_backends():
+    """
+    Backends usable in this environment, in order of preference.
+    """
+    loaders = {"turbojpeg": _load_turbojpeg, "cv2": _load_cv2, "pil": lambda: True}
+    return [name for name in BACKENDS if loaders[name]()]
+
+
+def is_jpeg(buf):
+    return bytes(buf[:2]) == JPEG_SOI
+
+
+def _exif_orientation(segment):
+    """
+    Orientation tag of the IFD0 of an APP1 Exif segment, 1 if missing.
+    """
+    if segment[:6] != b"Exif\0\0":
+        return 1
+    tiff = segment[6:]
+    order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if order is None or len(tiff) < 8:
+        return 1
+    ifd = struct.unpack(order + "I", tiff[4:8])[0]
+    if ifd + 2 > len(tiff):
+        return 1
+    count = struct.unpack(order + "H", tiff[ifd:ifd + 2])[0]
+    for idx in range(count):
+        entry = ifd + 2 + idx * 12
+        if entry + 12 > len(tiff):
+            break
+        tag, tp = struct.unpack(order + "HH", tiff[entry:entry + 4])
+        if tag == ORIENTATION_TAG and tp == 3:
+            value = struct.unpack(order + "H", tiff[entry + 8:entry + 10])[0]
+            return value if 1 <= value <= 8 else 1
+    return 1
+
+
+def jpeg_header(buf):
+    """
+    Read size and EXIF orientation of a JPEG image from its markers, without decoding it.
+
+    :param buf: JPEG image bytes
+    :return: (width, height, orientation), width and height are None if no frame header is found
+    """
+    buf = bytes(buf)
+    orientation = 1
+    pos = 2
+    while pos + 4 <= len(buf):
+        if buf[pos:pos + 1] != b"\xff":
+            break
+        marker = ord(buf[pos + 1:pos + 2])
+        if marker == 0xff:
+            # Fill byte
+            pos += 1
+            continue
+        length = struct.unpack(">H", buf[pos + 2:pos + 4])[0]
+        if marker == 0xe1:
+            orientation = _exif_orientation(buf[pos + 4:pos + 2 + length])
+        elif marker in SOF_MARKERS:
+            height, width = struct.unpack(">HH", buf[pos + 5:pos + 9])
+            return width, height, orientation
+        elif marker == 0xda:
+            break
+        pos += 2 + length
+    return None, None, orientation
+
+
+def scale_denominator(width, height, size, denominators=(8, 4, 2)):
+    """
+    Largest denominator the image can be scaled down by while it stays at least as large as size.
+
+    :param width: image width
+    :param height: image height
+    :param size: (width, height) the image is resized to afterwards
+    :return: 1, 2, 4 or 8
+    """
+    if size is None or not width or not height:
+        return 1
+    for denominator in denominators:
+        # libjpeg rounds the scaled size up
+        if -(-width // denominator) >= size[0] and -(-height // denominator) >= size[1]:
+            return denominator
+    return 1
+
+
+def apply_orientation(img_arr, orientation):
+    """
+    Rotate or flip a HWC image as indicated by its EXIF orientation.
+    """
+    if orientation == 2:
+        img_arr = img_arr[:, ::-1]
+    elif orientation == 3:
+        img_arr = img_arr[::-1, ::-1]
+    elif orientation == 4:
+        img_arr = img_arr[::-1]
+    elif orientation == 5:
+        img_arr = img_arr.transpose(1, 0, 2)
+    elif orientation == 6:
+        img_arr = np.rot90(img_arr, -1)
+    elif orientation == 7:
+        img_arr = np.rot90(img_arr, 2).transpose(1, 0, 2)
+    elif orientation == 8:
+        img_arr = np.rot90(img_arr, 1)
+    return img_arr
+
+
+def resize(img_arr, size, interp=2):
+    """
+    Resize a HWC or HW image to size, with OpenCV if available, PIL otherwise.
+
+    :param img_arr: uint8 numpy array
+    :param size: (width, height)
+    :param interp: interpolation in MXNet numbering, 0 nearest, 1 bilinear, 2 area, 3 bicubic, 4 lanczos
+    """
+    if (img_arr.shape[1], img_arr.shape[0]) == tuple(size):
+        return img_arr
+    cv2 = _load_cv2()
+    if cv2:
+        return cv2.resize(np.ascontiguousarray(img_arr), tuple(size), interpolation=getattr(cv2, CV2_INTERP[interp]))
+    return np.asarray(Image.fromarray(img_arr).resize(tuple(size), PIL_FILTERS[interp]))
+
+
+def _decode_turbojpeg(buf, size, flag, to_rgb, width, height):
+    from turbojpeg import TJPF_RGB, TJPF_BGR, TJPF_GRAY
+
+    jpeg = _load_turbojpeg()
+    scaling_factor = (1, 1)
+    if size is not None and width:
+        # Smallest n/8 style factor that keeps the image at least as large as size
+        for num, den in sorted(jpeg.scaling_factors, key=lambda f: float(f[0]) / f[1]):
+            if -(-width * num // den) >= size[0] and -(-height * num // den) >= size[1]:
+                scaling_factor = (num, den)
+                break
+    pixel_format = TJPF_GRAY if flag == 0 else (TJPF_RGB if to_rgb else TJPF_BGR)
+    img_arr = jpeg.decode(bytes(buf), pixel_format=pixel_format, scaling_factor=scaling_factor)
+    return img_arr[:, :, 0] if img_arr.ndim == 3 and flag == 0 else img_arr
+
+
+def _decode_cv2(buf, size, flag, width, height):
+    """
+    Decode with OpenCV, color images are returned in BGR order.
+    """
+    cv2 = _load_cv2()
+    denominator = scale_denominator(width, height, size)
+    names = CV2_REDUCED_GRAY if flag == 0 else CV2_REDUCED
+    # Orientation is applied the same way for all backends
+    flags = getattr(cv2, names[denominator]) | cv2.IMREAD_IGNORE_ORIENTATION
+    img_arr = cv2.imdecode(np.frombuffer(buf, dtype=np.uint8), flags)
+    if img_arr is None:
+        raise ValueError("Failed to decode image.")
+    return img_arr
+
+
+def _transpose_size(size):
+    return (size[1], size[0]) if size is not None else None
+
+
+def _decode_pil(buf, size, flag, orientation, resize_to, interp):
+    image = Image.open(BytesIO(buf))
+    mode = "L" if flag == 0 else "RGB"
+    if orientation is None:
+        # EXIF of formats other than JPEG, read before size and resize_to are applied
+        orientation = image.getexif().get(ORIENTATION_TAG, 1)
+        if orientation in (5, 6, 7, 8):
+            size = _transpose_size(size)
+            resize_to = _transpose_size(resize_to)
+    if size is not None and image.format == "JPEG":
+        # libjpeg DCT scaling, keeps the image at least as large as the requested size
+        image.draft(mode, size)
+    image = image.convert(mode)
+    if resize_to is not None and image.size != resize_to:
+        image = image.resize(resize_to, PIL_FILTERS[interp])
+    return np.asarray(image), orientation
+
+
+def decode(buf, size=None, flag=1, to_rgb=True, backend=None, resize_to_size=False, interp=2):
+    """
+    Decode an image, at a reduced resolution if the image is resized to size afterwards.
+
+    :param buf: image bytes
+    :param size: (width, height) the image is resized to afterwards, None to decode at full resolution
+    :param flag: 1 for three channel color output, 0 for grayscale output
+    :param to_rgb: True for RGB channel order, False for BGR
+    :param backend: "turbojpeg", "cv2" or "pil", the first available backend by default
+    :param resize_to_size: also resize the decoded image to exactly size
+    :param interp: interpolation of the resize, see `resize`
+    :return: uint8 numpy array of shape (height, width, channel), oriented as indicated by EXIF
+    """
+    jpeg = is_jpeg(buf)
+    width = height = orientation = None
+    if jpeg:
+        width, height, orientation = jpeg_header(buf)
+        if orientation in (5, 6, 7, 8) and size is not None:
+            # Image is stored transposed, size applies to the oriented image
+            size = _transpose_size(size)
+    resize_to = tuple(size) if resize_to_size else None
+
+    if backend is None:
+        backend = next(name for name in available_backends() if jpeg or name != "turbojpeg")
+
+    if backend == "pil":
+        img_arr, orientation = _decode_pil(buf, size, flag, orientation, resize_to, interp)
+    else:
+        if backend == "turbojpeg":
+            img_arr = _decode_turbojpeg(buf, size, flag, to_rgb, width, height)
+        elif backend == "cv2":
+            img_arr = _decode_cv2(buf, size, flag, width, height)
+            to_rgb = not to_rgb
+        else:
+            raise ValueError("Unknown image decode backend: {}".format(backend))
+        # EXIF of formats other than JPEG is only read by PIL
+        orientation = orientation or 1
+        if resize_to is not None:
+            img_arr = resize(img_arr, resize_to, interp)
+        to_rgb = True
+
+    if img_arr.ndim == 2:
+        img_arr = img_arr[:, :, np.newaxis]
+    elif not to_rgb:
+        img_arr = img_arr[:, :, ::-1]
+    return apply_orientation(img_arr, orientation)
+
+
+def decode_batch(bufs, size=None, flag=1, to_rgb=True, resize_to_size=False, interp=2):
+    """
+    Decode a batch of images on a thread pool, see `decode`. The backends release the GIL while
+    decoding and resizing, so images of a batch are decoded in parallel.
+
+    :return: list of decoded images and list of decode time of each image in milliseconds
+    """
+    def _decode(buf):
+        start = time.time()
+        img_arr = decode(buf, size, flag, to_rgb, resize_to_size=resize_to_size, interp=interp)
+        return img_arr, (time.time() - start) * 1000
+
+    if len(bufs) < 2:
+        results = [_decode(buf) for buf in bufs]
+    else:
+        results = thread_pool().map(_decode, bufs)
+    return [img_arr for img_arr, _ in results], [duration for _, duration in results]
+
+
+def to_nchw(images, mean=None, std=None, dtype=np.float32):
+    """
+    Stack HWC uint8 images of the same size into a NCHW batch. Normalization is applied on the
+    whole batch, fused with the transpose and the conversion to dtype.
+
+    :param images: list of numpy arrays of shape (height, width, channel)
+    :param mean: per channel mean subtracted from the images, optional
+    :param std: per channel standard deviation the images are divided by, optional
+    :param dtype: dtype of the batch
+    :return: numpy array of shape (batch, channel, height, width)
+    """
+    batch = np.stack(images).transpose(0, 3, 1, 2)
+    out = np.empty(batch.shape, dtype=dtype)
+    if mean is None:
+        out[...] = batch
+    else:
+        np.subtract(batch, np.asarray(mean, dtype=dtype).reshape(1, -1, 1, 1), out=out)
+    if std is not None:
+        np.multiply(out, 1 / np.asarray(std, dtype=dtype).reshape(1, -1, 1, 1), out=out)
+    return out
+
+
+_pool = None
+
+
+def thread_pool():
+    """
+    Thread pool of the worker for image decoding and encoding, created on first use.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ThreadPool(min(MAX_DECODE_THREADS, multiprocessing.cpu_count()))
+    return _pool
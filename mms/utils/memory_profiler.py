@@ -0,0 +1,237 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Memory growth profiler of a live worker.
+
+tracemalloc is only started when a profile is requested: a snapshot of the Python heap is taken
+when the profile starts and another when it is collected, and tracing stops again, so a worker
+that is not profiled pays nothing. Only memory allocated while tracing is seen, the diff of the
+snapshots is the memory allocated during the profile and still held at its end. The report lists
+the allocation sites whose memory grew the most, attributed to the model when the handler code of
+the model is on the stack of the allocation, to MMS, or to other code.
+
+The storage of MXNet NDArrays is allocated by the MXNet engine, outside of the Python heap, and is
+not seen by tracemalloc. It is reported separately, from the NDArrays alive at each snapshot.
+"""
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+
+try:
+    import tracemalloc
+except ImportError:  # python 2
+    tracemalloc = None
+
+DEFAULT_FRAMES = 5
+DEFAULT_TOP = 25
+# Collection is normally requested by the frontend at the end of the duration. Tracing stops by
+# itself after this grace period in case the collect command never comes.
+GRACE_PERIOD = 30
+MMS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+logger = logging.getLogger(__name__)
+
+
+def is_supported():
+    return tracemalloc is not None
+
+
+def ndarray_storage():
+    """
+    Storage of the NDArrays alive in the worker. Arrays that are views of another array are counted
+    with their own size. Nothing is reported when the handler did not import MXNet.
+
+    :return: dict of count and bytes per context, e.g. {"cpu(0)": {"count": 2, "bytes": 1024}}, or None
+    """
+    mx = sys.modules.get("mxnet")
+    if mx is None:
+        return None
+    import numpy as np
+
+    storage = dict()
+    for obj in gc.get_objects():
+        if not isinstance(obj, mx.nd.NDArray):
+            continue
+        try:
+            if obj.stype == "default":
+                parts = [obj]
+            else:
+                parts = [obj.data, obj.indices] + ([obj.indptr] if obj.stype == "csr" else [])
+            size = sum(part.size * np.dtype(part.dtype).itemsize for part in parts)
+            context = str(obj.context)
+        except Exception:  # pylint: disable=broad-except
+            # Arrays whose handle was freed
+            continue
+        entry = storage.setdefault(context, {"count": 0, "bytes": 0})
+        entry["count"] += 1
+        entry["bytes"] += int(size)
+    return storage
+
+
+def _frames(traceback):
+    """
+    :return: frames of a tracemalloc traceback, most recent first
+    """
+    frames = list(traceback)
+    if sys.version_info >= (3, 7):
+        frames.reverse()
+    return frames
+
+
+class MemoryProfiler(object):
+    """
+    Diff of two tracemalloc snapshots of the Python heap of the worker, with the NDArray storage.
+    """
+
+    def __init__(self, model_name=None, model_dir=None, nframes=DEFAULT_FRAMES):
+        """
+        :param model_name: model served by the worker
+        :param model_dir: directory of the handler code of the model
+        :param nframes: frames stored per allocation, attribution needs the handler on the stack
+        """
+        self.model_name = model_name
+        self.model_dir = os.path.abspath(model_dir) if model_dir else None
+        self.nframes = nframes
+        self.running = False
+        self._owns_tracing = False
+        self._begin = None
+        self._baseline = None
+        self._baseline_ndarray = None
+        self._final = None
+        self._final_ndarray = None
+        self._end = None
+        self._peak = None
+        self._overhead = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def start(self, duration=None):
+        """
+        Start tracing allocations and take the first snapshot.
+
+        :param duration: seconds after which tracing stops by itself, with a grace period, None to trace until collect
+        """
+        if not is_supported():
+            raise RuntimeError("Memory profiler requires tracemalloc, python 3.4 or later")
+        if self.running:
+            raise RuntimeError("Memory profiler is already running")
+
+        # Tracing started with PYTHONTRACEMALLOC is used as is and left running
+        self._owns_tracing = not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start(self.nframes)
+        self._final = None
+        self._final_ndarray = None
+        self._begin = time.time()
+        self._baseline = self._snapshot()
+        self._baseline_ndarray = ndarray_storage()
+        self.running = True
+        if duration:
+            self._timer = threading.Timer(duration + GRACE_PERIOD, self._finish)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def _finish(self):
+        with self._lock:
+            if not self.running:
+                return
+            self._final = self._snapshot()
+            self._final_ndarray = ndarray_storage()
+            self._end = time.time()
+            # Peak of the memory allocated while tracing, and memory used by tracemalloc itself
+            self._peak = tracemalloc.get_traced_memory()[1]
+            self._overhead = tracemalloc.get_tracemalloc_memory()
+            if self._owns_tracing:
+                tracemalloc.stop()
+            self.running = False
+        logger.info("Memory profiler stopped after %.1f s.", self._end - self._begin)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._finish()
+
+    def owner(self, frames):
+        """
+        :param frames: frames of an allocation, most recent first
+        :return: "model" when handler code of the model is on the stack, "mms" for MMS code, "other"
+        """
+        filenames = [os.path.abspath(frame.filename) for frame in frames]
+        if self.model_dir and any(f.startswith(self.model_dir + os.sep) for f in filenames):
+            return "model"
+        if any(f.startswith(MMS_DIR + os.sep) for f in filenames):
+            return "mms"
+        return "other"
+
+    def collect(self, top=DEFAULT_TOP):
+        """
+        Take the second snapshot, stop tracing and diff the snapshots. A profile whose tracing
+        already stopped by itself can still be collected.
+
+        :param top: number of allocation sites to report
+        :return: report dict, see docs/management_api.md
+        """
+        self.stop()
+        if self._final is None:
+            raise RuntimeError("Memory profiler is not running")
+        stats = self._final.compare_to(self._baseline, "traceback")
+        growth = {"model": 0, "mms": 0, "other": 0}
+        sites = []
+        for stat in stats:
+            frames = _frames(stat.traceback)
+            owner = self.owner(frames)
+            growth[owner] += stat.size_diff
+            # Sorted by absolute difference, the first growing sites are the largest
+            if len(sites) < top and stat.size_diff > 0:
+                sites.append({
+                    "owner": owner,
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                    "size": stat.size,
+                    "count": stat.count,
+                    "traceback": ["{}:{}".format(frame.filename, frame.lineno) for frame in frames],
+                })
+
+        report = {
+            "model": self.model_name,
+            "duration": round(self._end - self._begin, 3),
+            "python_heap": {
+                "growth": sum(growth.values()),
+                "growth_by_owner": growth,
+                "peak": self._peak,
+                "tracemalloc_overhead": self._overhead,
+            },
+            "top_sites": sites,
+        }
+        if self._final_ndarray is not None:
+            before = self._baseline_ndarray or dict()
+            report["ndarray_storage"] = {
+                "before": before,
+                "after": self._final_ndarray,
+                "growth": sum(e["bytes"] for e in self._final_ndarray.values()) - sum(
+                    e["bytes"] for e in before.values()),
+            }
+        self._baseline = None
+        self._final = None
+        self._final_ndarray = None
+        return report
@@ -18,6 +18,7 @@ import numpy as np
 from PIL import Image
 import mxnet as mx
 from mxnet import image as img
+from mms.utils import image_decode
 
 
 def transform_shape(img_arr, dim_order='NCHW'):
@@ -44,7 +45,7 @@ def transform_shape(img_arr, dim_order='NCHW'):
     return output
 
 
-def read(buf, flag=1, to_rgb=True, out=None):
+def read(buf, flag=1, to_rgb=True, out=None, size=None):
 
     """Read and decode an image to an NDArray.
     Input image NDArray should has dim_order of 'HWC'.
@@ -63,6 +64,9 @@ def read(buf, flag=1, to_rgb=True, out=None):
         False for BGR formatted output (OpenCV default).
     out : NDArray, optional
         Output buffer. Use `None` for automatic allocation.
+    size : tuple of (w, h), optional
+        Size the image is resized to afterwards. JPEG images are then decoded at a reduced
+        resolution no smaller than size, and EXIF orientation is applied. See `mms.utils.image_decode`.
 
     Returns
     -------
@@ -75,13 +79,22 @@ def read(buf, flag=1, to_rgb=True, out=None):
     >>> image.read(buf)
     <NDArray 224x224x3 @cpu(0)>
     """
-    return img.imdecode(buf, flag, to_rgb, out)
+    if size is None:
+        return img.imdecode(buf, flag, to_rgb, out)
+
+    img_arr = mx.nd.array(image_decode.decode(buf, size, flag, to_rgb), dtype=np.uint8)
+    if out is not None:
+        out[:] = img_arr
+        return out
+    return img_arr
 
 
 # TODO: Check where this is used and rename format
 def write(img_arr, flag=1, format='jpeg', dim_order='CHW'):  # pylint: disable=redefined-builtin
     """Write an NDArray to a base64 string
 
+    Prefer `encode`, which returns the raw image bytes without the base64 overhead.
+
     Parameters
     ----------
     img_arr : NDArray
@@ -98,23 +111,80 @@ def write(img_arr, flag=1, format='jpeg', dim_order='CHW'):  # pylint: disable=r
     str
         Image in base64 string format
     """
+    output = encode(img_arr, flag, format, dim_order)
+    if sys.version_info[0] < 3:
+        return base64.b64encode(output)
+    else:
+        return base64.b64encode(output).decode("utf-8")
+
+
+def encode(img_arr, flag=1, format='jpeg', dim_order='CHW'):  # pylint: disable=redefined-builtin
+    """Encode an NDArray to image bytes. The result can be returned from a handler
+    as is, together with `content_type(format)` set as response content type.
+
+    Parameters
+    ----------
+    img_arr : NDArray or numpy.ndarray
+        Image with shape (channel, height, width) or (height, width, channel).
+    flag : {0, 1}, default 1
+        1 for three channel color output. 0 for grayscale output.
+    format : str
+        Output image format.
+    dim_order : str
+        Input image dimension order. Valid values are 'CHW' and 'HWC'
+
+    Returns
+    -------
+    bytes
+        Encoded image
+    """
     assert dim_order in 'CHW' or dim_order in 'HWC', "dim_order must be 'CHW' or 'HWC'."
+    if isinstance(img_arr, mx.nd.NDArray):
+        img_arr = img_arr.asnumpy()
     if dim_order == 'CHW':
-        img_arr = mx.nd.transpose(img_arr, (1, 2, 0))
+        img_arr = np.transpose(img_arr, (1, 2, 0))
     if flag == 1:
         mode = 'RGB'
     else:
         mode = 'L'
-        img_arr = mx.nd.reshape(img_arr, (img_arr.shape[0], img_arr.shape[1]))
-    img_arr = img_arr.astype(np.uint8).asnumpy()
+        img_arr = np.reshape(img_arr, (img_arr.shape[0], img_arr.shape[1]))
+    img_arr = np.ascontiguousarray(img_arr.astype(np.uint8))
     image = Image.fromarray(img_arr, mode)
     output = BytesIO()
     image.save(output, format=format)
-    output.seek(0)
-    if sys.version_info[0] < 3:
-        return base64.b64encode(output.getvalue())
-    else:
-        return base64.b64encode(output.getvalue()).decode("utf-8")
+    return output.getvalue()
+
+
+def encode_batch(img_arrs, flag=1, format='jpeg', dim_order='CHW'):  # pylint: disable=redefined-builtin
+    """Encode a list of images on the thread pool of image decoding. PIL releases the GIL while
+    compressing, so images of a batch are encoded in parallel.
+
+    Parameters
+    ----------
+    img_arrs : list of NDArray or numpy.ndarray, or a batched NDArray
+        Images, see `encode` for the layout of each image.
+
+    Returns
+    -------
+    list of bytes
+        Encoded images
+    """
+    if isinstance(img_arrs, mx.nd.NDArray):
+        img_arrs = img_arrs.asnumpy()
+    # Copy to host once for the whole batch, worker threads only touch numpy arrays
+    img_arrs = [i.asnumpy() if isinstance(i, mx.nd.NDArray) else i for i in img_arrs]
+    if len(img_arrs) < 2:
+        return [encode(i, flag, format, dim_order) for i in img_arrs]
+
+    return image_decode.thread_pool().map(lambda i: encode(i, flag, format, dim_order), img_arrs)
+
+
+def content_type(format='jpeg'):  # pylint: disable=redefined-builtin
+    """Response content type of an image encoded with `encode`.
+    """
+    format = format.lower()
+    # The registered media type of JPEG is image/jpeg, also for the "jpg" format
+    return "image/jpeg" if format == "jpg" else "image/{}".format(format)
 
 
 def resize(src, new_width, new_height, interp=2):
@@ -12,7 +12,6 @@
 NDArray utils
 """
 import numpy as np
-import mxnet as mx
 
 
 def top_probability(data, labels, top=5):
@@ -30,12 +29,49 @@ def top_probability(data, labels, top=5):
     List
         List of probability: class pairs in sorted order
     """
-    dim = len(data.shape)
-    if dim > 2:
-        data = mx.nd.array(
-            np.squeeze(data.asnumpy(), axis=tuple(range(dim)[2:])))
-    sorted_prob = mx.nd.argsort(data[0], is_ascend=False)
-    # pylint: disable=deprecated-lambda
-    top_prob = map(lambda x: int(x.asscalar()), sorted_prob[0:top])
-    return [{'probability': float(data[0, i].asscalar()), 'class': labels[i]}
-            for i in top_prob]
+    if len(data.shape) > 1:
+        data = data[0:1]
+    return top_k(data, labels, top)[0]
+
+
+def top_k(data, labels, top=5):
+    """Get top probability predictions of every row of a batch output.
+
+    The output is copied from the device once and the top entries of all rows are
+    selected with numpy.argpartition, instead of a sort and device sync per value.
+
+    Parameters
+    ----------
+    data : NDArray or numpy array
+        Output of shape (batch, classes), trailing dimensions of size 1 are ignored
+    labels : List
+        List of class labels
+    top : int
+        Number of predictions of each row
+
+    Returns
+    -------
+    List
+        List of probability: class pairs in sorted order for every row
+    """
+    if hasattr(data, "asnumpy"):
+        data = data.asnumpy()
+    data = np.asarray(data)
+    if data.ndim == 1:
+        data = data[np.newaxis]
+    elif data.ndim > 2:
+        data = data.reshape(data.shape[0], -1)
+
+    num_classes = data.shape[1]
+    top = min(top, num_classes)
+    rows = np.arange(data.shape[0])[:, np.newaxis]
+    if top < num_classes:
+        idx = np.argpartition(data, num_classes - top, axis=1)[:, num_classes - top:]
+    else:
+        idx = np.tile(np.arange(num_classes), (data.shape[0], 1))
+    # argpartition leaves the top entries unordered, sort only those
+    idx = idx[rows, np.argsort(-data[rows, idx], axis=1)]
+    probs = data[rows, idx]
+
+    return [[{'probability': prob, 'class': labels[i]} for prob, i in zip(prob_row, idx_row)]
+            for prob_row, idx_row in zip(probs.tolist(), idx.tolist())]
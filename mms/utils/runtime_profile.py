@@ -0,0 +1,106 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Per model MXNet runtime profile.
+
+A profile is a dict of runtime settings, set in the "runtimeProfile" of the engine section of the
+model archive manifest, and overridden by the runtime_profile parameter of model registration, which
+the frontend passes to the worker in the MMS_RUNTIME_PROFILE environment variable. MXNet reads most
+of these settings once, when the library is loaded, so the worker applies the profile to the
+environment before the model handler imports mxnet.
+"""
+import json
+import logging
+import os
+import sys
+
+RUNTIME_PROFILE_ENV = "MMS_RUNTIME_PROFILE"
+
+# Profile settings and the environment variables they set
+PROFILE_SETTINGS = {
+    "engineType": ("MXNET_ENGINE_TYPE",),
+    "subgraphBackend": ("MXNET_SUBGRAPH_BACKEND",),
+    "cpuWorkerThreads": ("MXNET_CPU_WORKER_NTHREADS",),
+    "ompThreads": ("OMP_NUM_THREADS",),
+    "memoryPool": ("MXNET_CPU_MEM_POOL_TYPE", "MXNET_GPU_MEM_POOL_TYPE"),
+    "operatorTuning": ("MXNET_USE_OPERATOR_TUNING",),
+}
+
+# Environment variables that can be set directly in a profile
+ENV_PREFIXES = ("MXNET_", "OMP_", "KMP_")
+
+
+def load_runtime_profile(model_dir):
+    """
+    Runtime profile of a model: the profile of the archive manifest updated with the profile
+    given on model registration.
+
+    :param model_dir: model directory
+    :return: dict of runtime settings
+    """
+    profile = dict()
+    manifest_file = os.path.join(model_dir, "MAR-INF/MANIFEST.json")
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as f:
+            engine = json.load(f).get("engine") or {}
+        profile.update(engine.get("runtimeProfile") or {})
+
+    registered = os.environ.get(RUNTIME_PROFILE_ENV)
+    if registered:
+        profile.update(json.loads(registered))
+
+    return profile
+
+
+def profile_environ(profile):
+    """
+    Environment variables of a runtime profile. Unknown settings are validated when the model is
+    registered or archived, those that still reach the worker are skipped with a warning.
+
+    :param profile: dict of runtime settings or environment variables
+    :return: dict of environment variable names and values
+    """
+    environ = dict()
+    for name, value in profile.items():
+        if name in PROFILE_SETTINGS:
+            env_names = PROFILE_SETTINGS[name]
+        elif name.startswith(ENV_PREFIXES):
+            env_names = (name,)
+        else:
+            logging.warning("Unknown runtime profile setting: %s, ignored.", name)
+            continue
+
+        if isinstance(value, bool) or (isinstance(value, float) and value.is_integer()):
+            # JSON numbers of the frontend are floats
+            value = int(value)
+        for env_name in env_names:
+            environ[env_name] = str(value)
+
+    return environ
+
+
+def apply_runtime_profile(profile):
+    """
+    Set the environment variables of a runtime profile. Settings read by MXNet when the library
+    is loaded take no effect if mxnet is already imported.
+
+    :param profile: dict of runtime settings
+    :return: dict of environment variables that were set
+    """
+    environ = profile_environ(profile)
+    if environ and "mxnet" in sys.modules:
+        logging.warning("MXNet is already loaded, runtime profile may not take effect.")
+
+    for name, value in environ.items():
+        os.environ[name] = value
+        logging.info("Runtime profile: %s=%s", name, value)
+
+    return environ
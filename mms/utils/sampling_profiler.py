@@ -0,0 +1,106 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Sampling CPU profiler of a live worker.
+
+A SIGPROF interval timer interrupts the worker every interval seconds of CPU time consumed by the
+process. The signal handler runs in the main thread, which runs the handler of the model, and counts
+the Python stack it interrupted. Nothing is recorded while the worker waits for requests. Each sample
+only walks the stack and updates a counter, the stacks are formatted when the profile is collected.
+
+Profiles are returned as collapsed stacks, one "frame;frame;frame count" line per stack with the
+outermost frame first, the input format of flamegraph.pl and speedscope.
+"""
+import signal
+import time
+
+DEFAULT_INTERVAL = 0.01
+MAX_DEPTH = 128
+
+# CPU time of the process, the clock of the interval timer. time.clock was removed in Python 3.8.
+cpu_time = getattr(time, "process_time", None) or time.clock  # pylint: disable=no-member
+
+
+def is_supported():
+    return hasattr(signal, "setitimer") and hasattr(signal, "SIGPROF")
+
+
+def frame_label(code):
+    return "{} ({}:{})".format(code.co_name, code.co_filename, code.co_firstlineno)
+
+
+class SamplingProfiler(object):
+    """
+    Counts the Python stacks of the main thread, sampled on CPU time.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        """
+        :param interval: CPU seconds between samples
+        """
+        self.interval = interval
+        self.samples = 0
+        self.running = False
+        self._stacks = dict()
+        self._deadline = None
+        self._previous_handler = None
+
+    def start(self, duration=None):
+        """
+        Start sampling, must be called from the main thread.
+
+        :param duration: seconds after which sampling stops by itself, None to sample until stop
+        """
+        if not is_supported():
+            raise RuntimeError("Sampling profiler requires SIGPROF interval timers")
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+
+        self._stacks = dict()
+        self.samples = 0
+        self._deadline = time.time() + duration if duration else None
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        # System calls interrupted by a sample are restarted, python 2 would raise EINTR otherwise
+        signal.siginterrupt(signal.SIGPROF, False)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self.running = True
+
+    def stop(self):
+        if not self.running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        self.running = False
+
+    def _sample(self, signum, frame):  # pylint: disable=unused-argument
+        if self._deadline is not None and time.time() >= self._deadline:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            return
+
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        key = tuple(stack)
+        self._stacks[key] = self._stacks.get(key, 0) + 1
+        self.samples += 1
+
+    def collapsed(self):
+        """
+        Stop sampling and format the profile.
+
+        :return: collapsed stacks, one line per stack, most frequent stack first
+        """
+        self.stop()
+        lines = []
+        for stack, count in sorted(self._stacks.items(), key=lambda item: -item[1]):
+            lines.append("{} {}".format(";".join(frame_label(code) for code in reversed(stack)), count))
+        return "\n".join(lines) + "\n" if lines else ""
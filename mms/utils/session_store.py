@@ -0,0 +1,123 @@
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""
+Per worker store for state of stateful sessions, such as recurrent states or encoder outputs.
+
+Requests of a session carry the session header. The frontend routes them to the worker that
+served the first request of the session, so handlers can keep state between requests instead
+of recomputing it. The store is LRU ordered and bounded by the estimated size of the states.
+"""
+import os
+import sys
+from collections import OrderedDict
+
+SESSION_HEADER = "X-MMS-Session-Id"
+SESSION_STORE_SIZE_ENV = "MMS_SESSION_STORE_SIZE"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def estimate_size(state):
+    """
+    Estimate memory held by a session state. Array storage is counted by its byte size,
+    containers are counted by their items.
+
+    :param state: NDArray, numpy array, list, tuple, dict or other python object
+    :return: size in bytes
+    """
+    if hasattr(state, "nbytes"):
+        return int(state.nbytes)
+    if hasattr(state, "asnumpy"):
+        # MXNet NDArray
+        import numpy as np
+        return int(state.size) * np.dtype(state.dtype).itemsize
+    if isinstance(state, (list, tuple)):
+        return sys.getsizeof(state) + sum(estimate_size(item) for item in state)
+    if isinstance(state, dict):
+        return sys.getsizeof(state) + sum(estimate_size(item) for item in state.values())
+    return sys.getsizeof(state)
+
+
+class SessionStore(object):
+    """
+    LRU store of session states bounded by total size. Least recently used sessions are
+    evicted once the total size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes=None, max_sessions=None):
+        """
+        :param max_bytes: size bound of all states, MMS_SESSION_STORE_SIZE (in MB) or 256 MB by default
+        :param max_sessions: optional bound on number of sessions
+        """
+        if max_bytes is None:
+            size = os.environ.get(SESSION_STORE_SIZE_ENV)
+            max_bytes = int(float(size) * 1024 * 1024) if size else DEFAULT_MAX_BYTES
+
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self.nbytes = 0
+        self.evictions = 0
+        self._states = OrderedDict()
+
+    def __len__(self):
+        return len(self._states)
+
+    def __contains__(self, session_id):
+        return session_id in self._states
+
+    def get(self, session_id, default=None):
+        """
+        Return the state of a session and mark the session as most recently used.
+        """
+        entry = self._states.pop(session_id, None)
+        if entry is None:
+            return default
+
+        self._states[session_id] = entry
+        return entry[0]
+
+    def put(self, session_id, state, size=None):
+        """
+        Store the state of a session, replacing its previous state.
+
+        :param session_id:
+        :param state:
+        :param size: size of state in bytes, estimated when not given
+        :return: False if the state alone exceeds the store size and was not stored
+        """
+        self.pop(session_id)
+        if size is None:
+            size = estimate_size(state)
+        if size > self.max_bytes:
+            return False
+
+        self._states[session_id] = (state, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes or \
+                (self.max_sessions is not None and len(self._states) > self.max_sessions):
+            _, (_, evicted_size) = self._states.popitem(last=False)
+            self.nbytes -= evicted_size
+            self.evictions += 1
+        return True
+
+    def pop(self, session_id, default=None):
+        """
+        Remove a session and return its state.
+        """
+        entry = self._states.pop(session_id, None)
+        if entry is None:
+            return default
+
+        self.nbytes -= entry[1]
+        return entry[0]
+
+    def clear(self):
+        self._states.clear()
+        self.nbytes = 0
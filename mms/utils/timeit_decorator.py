@@ -14,6 +14,9 @@ timeit decorator
 import time
 from functools import wraps
 
+# time.clock was removed in Python 3.8, process_time is the CPU time of the process
+cpu_time = getattr(time, "process_time", None) or time.clock  # pylint: disable=no-member
+
 
 def timeit(func):
     """
@@ -24,11 +27,11 @@ def timeit(func):
     @wraps(func)
     def time_and_log(*args, **kwargs):
         start = time.time()
-        start_cpu = time.clock()
+        start_cpu = cpu_time()
         result = func(*args, **kwargs)
         end = time.time()
-        end_cpu = time.clock()
-        print("func: %r took a total of %2.4f sec to run and %2.4f sec of CPU time\n",
+        end_cpu = cpu_time()
+        print("func: %r took a total of %2.4f sec to run and %2.4f sec of CPU time\n" %
               (func.__name__, (end-start), (end_cpu - start_cpu)))
         return result
     return time_and_log
@@ -66,6 +66,14 @@ class ArgParser(object):
                                         'The default runtime is {}. At the present moment we support the '
                                         'following runtimes \n {}'.format(RuntimeType.PYTHON, runtime_types))
 
+        parser_export.add_argument('--runtime-profile',
+                                   required=False,
+                                   type=str,
+                                   default=None,
+                                   help='MXNet runtime settings applied by the model server worker before MXNet is '
+                                        'loaded, as a JSON object or the path to a JSON file, for example '
+                                        '{"engineType": "NaiveEngine", "cpuWorkerThreads": 2}. ')
+
         parser_export.add_argument('--export-path',
                                    required=False,
                                    type=str,
@@ -24,9 +24,10 @@ class Engine(object):
     Engine is a part of the final manifest.json. It defines which framework to run the inference on
     """
 
-    def __init__(self, engine_name, engine_version=None):
+    def __init__(self, engine_name, engine_version=None, runtime_profile=None):
         self.engine_name = EngineType(engine_name)
         self.engine_version = engine_version
+        self.runtime_profile = runtime_profile
 
         self.engine_dict = self.__to_dict__()
 
@@ -37,6 +38,9 @@ class Engine(object):
         if self.engine_version is not None:
             engine_dict['engineVersion'] = self.engine_version
 
+        if self.runtime_profile is not None:
+            engine_dict['runtimeProfile'] = self.runtime_profile
+
         return engine_dict
 
     def __str__(self):
@@ -19,7 +19,7 @@ import re
 import zipfile
 from .model_archiver_error import ModelArchiverError
 
-from .manifest_components.engine import Engine
+from .manifest_components.engine import Engine, EngineType
 from .manifest_components.manifest import Manifest
 from .manifest_components.model import Model
 from .manifest_components.publisher import Publisher
@@ -30,6 +30,11 @@ MODEL_ARCHIVE_VERSION = '1.0'
 MANIFEST_FILE_NAME = 'MANIFEST.json'
 MAR_INF = 'MAR-INF'
 ONNX_TYPE = '.onnx'
+# Runtime profile settings and environment variable prefixes the model server accepts, as in
+# mms/utils/runtime_profile.py
+RUNTIME_PROFILE_SETTINGS = ('engineType', 'subgraphBackend', 'cpuWorkerThreads', 'ompThreads', 'memoryPool',
+                            'operatorTuning')
+RUNTIME_PROFILE_ENV_PREFIXES = ('MXNET_', 'OMP_', 'KMP_')
 
 
 class ModelExportUtils(object):
@@ -182,9 +187,34 @@ class ModelExportUtils(object):
         publisher = Publisher(author=publisherargs.author, email=publisherargs.email)
         return publisher
 
+    @staticmethod
+    def load_runtime_profile(runtime_profile):
+        """
+        Parse a runtime profile given as a JSON object or the path to a JSON file
+        :param runtime_profile:
+        :return: dict of runtime settings
+        """
+        if os.path.isfile(runtime_profile):
+            with open(runtime_profile) as f:
+                runtime_profile = f.read()
+        try:
+            profile = json.loads(runtime_profile)
+        except ValueError:
+            raise ModelArchiverError("Invalid runtime profile: {}".format(runtime_profile))
+        if not isinstance(profile, dict):
+            raise ModelArchiverError("Runtime profile must be a JSON object: {}".format(runtime_profile))
+        for name in profile:
+            if name not in RUNTIME_PROFILE_SETTINGS and not name.startswith(RUNTIME_PROFILE_ENV_PREFIXES):
+                raise ModelArchiverError("Unknown runtime profile setting: {}".format(name))
+        return profile
+
     @staticmethod
     def generate_engine(engineargs):
-        engine = Engine(engine_name=engineargs.engine)
+        runtime_profile = getattr(engineargs, 'runtime_profile', None)
+        if runtime_profile is not None:
+            runtime_profile = ModelExportUtils.load_runtime_profile(runtime_profile)
+        engine = Engine(engine_name=getattr(engineargs, 'engine', EngineType.MXNET.value),
+                        runtime_profile=runtime_profile)
         return engine
 
     @staticmethod
@@ -203,7 +233,8 @@ class ModelExportUtils(object):
 
         publisher = ModelExportUtils.generate_publisher(args) if 'author' in arg_dict and 'email' in arg_dict else None
 
-        engine = ModelExportUtils.generate_engine(args) if 'engine' in arg_dict else None
+        engine = ModelExportUtils.generate_engine(args) \
+            if 'engine' in arg_dict or arg_dict.get('runtime_profile') is not None else None
 
         model = ModelExportUtils.generate_model(args)
 
@@ -160,6 +160,23 @@ class TestExportModelUtils:
             eng = ModelExportUtils.generate_engine(self.args)
             assert eng.engine_name == EngineType(self.engine)
 
+        def test_engine_runtime_profile(self):
+            args = self.Namespace(model_name=self.model_name, handler=self.handler, runtime=RuntimeType.PYTHON.value,
+                                  runtime_profile='{"engineType": "NaiveEngine"}')
+            manifest_json = json.loads(ModelExportUtils.generate_manifest_json(args))
+            assert manifest_json['engine'] == {'engineName': EngineType.MXNET.value,
+                                               'runtimeProfile': {'engineType': 'NaiveEngine'}}
+
+        def test_engine_invalid_runtime_profile(self):
+            args = self.Namespace(engine=self.engine, runtime_profile='[1, 2]')
+            with pytest.raises(ModelArchiverError):
+                ModelExportUtils.generate_engine(args)
+
+        def test_engine_unknown_runtime_profile_setting(self):
+            args = self.Namespace(engine=self.engine, runtime_profile='{"engineType": "NaiveEngine", "PATH": "/tmp"}')
+            with pytest.raises(ModelArchiverError, match=r"Unknown runtime profile setting: PATH"):
+                ModelExportUtils.generate_engine(args)
+
         def test_model(self):
             mod = ModelExportUtils.generate_model(self.args)
             assert mod.model_name == self.model_name
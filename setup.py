@@ -139,6 +139,7 @@ if __name__ == '__main__':
             'mxnet-mkl': ['mxnet-mkl'],
             'mxnet-cu90mkl': ['mxnet-cu90mkl'],
             'mxnet': ['mxnet'],
+            'msgpack': ['msgpack'],
         },
         entry_points={
             'console_scripts': [